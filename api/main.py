@@ -1,7 +1,10 @@
 from __future__ import annotations
 import os
-import json
-from typing import Optional, Dict
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Optional, Dict, List, Tuple
 
 import numpy as np
 import pandas as pd
@@ -12,14 +15,23 @@ from sklearn.preprocessing import MinMaxScaler
 
 try:
     import yfinance as yf
-    from tensorflow.keras.models import load_model
 except Exception as e:
-    # Defer import errors to request time to return a clear message
+    # Without yfinance only the local CSV fallback is available
     yf = None
-    load_model = None
+
+# Models load from their NumPy export when present; TensorFlow is only needed for un-exported models
+from numpy_lstm import load_lstm
+from model_registry import find_bundle
 
 
 LOOKBACK = 60
+# Micro-batching: concurrent predictions on the same model are coalesced into one predict()
+# call of up to BATCH_MAX_SIZE windows, waiting at most BATCH_MAX_WAIT_MS for the batch to fill.
+# BATCH_MAX_SIZE=1 disables batching.
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', '32'))
+BATCH_MAX_WAIT_MS = float(os.getenv('BATCH_MAX_WAIT_MS', '5'))
+# Loaded models kept in memory; the least recently used is dropped (and its batcher closed) beyond this
+MODEL_CACHE_SIZE = int(os.getenv('MODEL_CACHE_SIZE', '16'))
 ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
 MODELS_DIR = os.path.join(ROOT_DIR, 'models')
 
@@ -36,8 +48,130 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Simple in-memory cache of loaded models/scalers by model_path
-MODEL_CACHE: Dict[str, Dict] = {}
+# Simple in-memory cache of loaded models by model_path; a pooled model is loaded once for all its tickers
+MODEL_CACHE: 'OrderedDict[str, Dict]' = OrderedDict()
+_MODEL_CACHE_LOCK = threading.Lock()
+
+
+class MicroBatcher:
+    """Collects windows from concurrent callers and runs them through one batched model.predict.
+
+    A single worker thread per model drains the queue: once the first window arrives it
+    waits up to max_wait_ms for more (or until max_size are queued), predicts the stacked
+    batch and resolves each caller's future with its own row. close() lets the worker
+    finish what is queued and exit; windows arriving after that are predicted directly.
+    """
+
+    def __init__(self, model, max_size: int = BATCH_MAX_SIZE, max_wait_ms: float = BATCH_MAX_WAIT_MS):
+        self.model = model
+        self.max_size = max(1, max_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: List[Tuple[np.ndarray, Future, float]] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.batches = 0
+        self.requests = 0
+        self.largest_batch = 0
+        self._wait_total = 0.0
+        self._predict_total = 0.0
+
+    def predict(self, window: np.ndarray) -> np.ndarray:
+        """Predict a single (LOOKBACK, 1) window; blocks until its batch has run."""
+        fut: Future = Future()
+        with self._cond:
+            if self._closed:
+                fut = None
+            elif self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._thread.start()
+            if fut is not None:
+                self._queue.append((window, fut, time.perf_counter()))
+                self._cond.notify()
+        if fut is None:
+            return self.model.predict(window[None, ...], verbose=0)
+        return fut.result()
+
+    def close(self) -> None:
+        """Stop the worker once the queue is empty."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _next_batch(self) -> List[Tuple[np.ndarray, Future, float]]:
+        with self._cond:
+            while not self._queue:
+                if self._closed:
+                    return []
+                self._cond.wait()
+            deadline = time.perf_counter() + self.max_wait
+            while len(self._queue) < self.max_size and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._queue[:self.max_size]
+            del self._queue[:self.max_size]
+            return batch
+
+    def _run(self) -> None:
+        try:
+            while True:
+                batch = self._next_batch()
+                if not batch:
+                    return
+                self._run_batch(batch)
+        finally:
+            with self._cond:
+                self._thread = None
+                # Only reached on close or a BaseException; nothing may stay queued without a worker
+                orphans, self._queue = self._queue, []
+            for _, fut, _ in orphans:
+                fut.set_exception(RuntimeError('Micro-batcher stopped'))
+
+    def _run_batch(self, batch: List[Tuple[np.ndarray, Future, float]]) -> None:
+        started = time.perf_counter()
+        try:
+            out = self.model.predict(np.stack([w for w, _, _ in batch]), verbose=0)
+        except BaseException as e:
+            for _, fut, _ in batch:
+                fut.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        finished = time.perf_counter()
+        for i, (_, fut, _) in enumerate(batch):
+            fut.set_result(out[i:i + 1])
+        with self._cond:
+            self.batches += 1
+            self.requests += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self._wait_total += sum(started - t for _, _, t in batch)
+            self._predict_total += finished - started
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                'max_size': self.max_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'batches': self.batches,
+                'requests': self.requests,
+                'queued': len(self._queue),
+                'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+                'largest_batch': self.largest_batch,
+                'mean_queue_wait_ms': 1000.0 * self._wait_total / self.requests if self.requests else 0.0,
+                'mean_predict_ms': 1000.0 * self._predict_total / self.batches if self.batches else 0.0,
+            }
+
+
+def _predict_window(cache: Dict, window: np.ndarray) -> np.ndarray:
+    if BATCH_MAX_SIZE <= 1:
+        return cache['model'].predict(window[None, ...], verbose=0)
+    batcher = cache.get('batcher')
+    if batcher is None:
+        # setdefault keeps a single batcher per model when two requests race here
+        batcher = cache.setdefault('batcher', MicroBatcher(cache['model'], BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS))
+    return batcher.predict(window)
 
 
 class PredictIn(BaseModel):
@@ -46,15 +180,43 @@ class PredictIn(BaseModel):
     interval: str = Field(default="1d")
 
 
+class PredictBatchIn(BaseModel):
+    tickers: List[str] = Field(..., min_length=1, max_length=500)
+    period: str = Field(default="6mo")
+    interval: str = Field(default="1d")
+
+
 def load_latest_bundle(ticker: str) -> Optional[Dict]:
-    if not os.path.isdir(MODELS_DIR):
-        return None
-    candidates = [f for f in os.listdir(MODELS_DIR) if f.startswith(f"model_{ticker}_") and f.endswith('.pkl')]
-    if not candidates:
-        return None
-    latest = sorted(candidates)[-1]
-    with open(os.path.join(MODELS_DIR, latest)) as f:
-        return json.load(f)
+    # Per-ticker or pooled bundle; pooled ones come back with this ticker's scaler stats
+    return find_bundle(ticker, MODELS_DIR)
+
+
+def _cached_model(key: str, load) -> Dict:
+    """MODEL_CACHE entry for key, created with load() on a miss; evicted entries have their batcher closed."""
+    with _MODEL_CACHE_LOCK:
+        entry = MODEL_CACHE.get(key)
+        if entry is not None:
+            MODEL_CACHE.move_to_end(key)
+            return entry
+    entry = load()
+    evicted = []
+    with _MODEL_CACHE_LOCK:
+        # Another request may have loaded it meanwhile; keep the first so there is one batcher per model
+        entry = MODEL_CACHE.setdefault(key, entry)
+        MODEL_CACHE.move_to_end(key)
+        while len(MODEL_CACHE) > max(1, MODEL_CACHE_SIZE):
+            evicted.append(MODEL_CACHE.popitem(last=False)[1])
+    for old in evicted:
+        if old.get('batcher') is not None:
+            old['batcher'].close()
+    return entry
+
+
+def _load(model_path: str, npz_path: Optional[str] = None):
+    try:
+        return load_lstm(model_path, npz_path)
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=f"Missing ML dependencies: {e}")
 
 
 def get_model_and_scaler(ticker: str) -> Dict:
@@ -63,37 +225,32 @@ def get_model_and_scaler(ticker: str) -> Dict:
         # Legacy fallback
         legacy = os.path.join(ROOT_DIR, 'lstm_stock_model.h5')
         if os.path.exists(legacy):
-            key = legacy
-            if key not in MODEL_CACHE:
-                MODEL_CACHE[key] = {
-                    'model': load_model(legacy),
-                    'scaler_min_': None,
-                    'scaler_scale_': None,
-                }
-            return MODEL_CACHE[key]
+            return _cached_model(legacy, lambda: {
+                'model': _load(legacy),
+                'scaler_min_': None,
+                'scaler_scale_': None,
+            })
         raise HTTPException(status_code=404, detail=f"No model bundle found for {ticker}")
 
     model_path = bundle.get('model_path')
     if not model_path or not os.path.exists(model_path):
         raise HTTPException(status_code=404, detail=f"Model file missing for {ticker}")
 
-    if model_path not in MODEL_CACHE:
-        MODEL_CACHE[model_path] = {
-            'model': load_model(model_path),
-            'scaler_min_': np.array(bundle['scaler_min_']),
-            'scaler_scale_': np.array(bundle['scaler_scale_']),
-            'bundle': bundle,
-        }
-    return MODEL_CACHE[model_path]
-
+    entry = _cached_model(model_path, lambda: {'model': _load(model_path, bundle.get('npz_path'))})
+    # Scaler stats are per ticker even when the model is shared; the batcher stays on the shared entry
+    return {
+        'model': entry['model'],
+        'entry': entry,
+        'scaler_min_': np.array(bundle['scaler_min_']),
+        'scaler_scale_': np.array(bundle['scaler_scale_']),
+        'bundle': bundle,
+    }
 
-def predict_next_close(ticker: str, period: str, interval: str) -> Dict:
-    if yf is None or load_model is None:
-        raise HTTPException(status_code=500, detail="Missing ML dependencies. Install tensorflow, yfinance.")
 
+def _read_closes(ticker: str, period: str, interval: str) -> pd.DataFrame:
     # Try yfinance first unless explicitly using SAMPLE/local
     df = pd.DataFrame()
-    if ticker.upper() != 'SAMPLE':
+    if yf is not None and ticker.upper() != 'SAMPLE':
         try:
             df = yf.download(ticker, period=period, interval=interval, progress=False, auto_adjust=True)
         except Exception as e:
@@ -111,8 +268,10 @@ def predict_next_close(ticker: str, period: str, interval: str) -> Dict:
             raise HTTPException(status_code=500, detail=f"Local CSV read failed: {e}")
     if df.empty or 'Close' not in df.columns:
         raise HTTPException(status_code=404, detail="No valid Close data available")
+    return df
 
-    cache = get_model_and_scaler(ticker)
+
+def _scaled_window(df: pd.DataFrame, cache: Dict) -> Tuple[MinMaxScaler, np.ndarray, np.ndarray]:
     values = df['Close'].astype(float).values.reshape(-1, 1)
     if len(values) < LOOKBACK:
         raise HTTPException(status_code=400, detail=f"Need at least {LOOKBACK} closes; got {len(values)}")
@@ -126,15 +285,15 @@ def predict_next_close(ticker: str, period: str, interval: str) -> Dict:
     else:
         scaled = scaler.fit_transform(values)
 
-    last_window = scaled[-LOOKBACK:].reshape(1, LOOKBACK, 1)
-    next_scaled = cache['model'].predict(last_window, verbose=0)
-    next_price = float(scaler.inverse_transform(next_scaled)[0][0])
-    last_close = float(values[-1][0])
+    return scaler, values, scaled[-LOOKBACK:].reshape(LOOKBACK, 1)
 
+
+def _prediction(ticker: str, df: pd.DataFrame, cache: Dict, scaler: MinMaxScaler, values: np.ndarray,
+                next_scaled: np.ndarray) -> Dict:
     out = {
         'ticker': ticker,
-        'last_close': last_close,
-        'prediction_next': next_price,
+        'last_close': float(values[-1][0]),
+        'prediction_next': float(scaler.inverse_transform(next_scaled)[0][0]),
         'as_of': df.index[-1].strftime('%Y-%m-%d'),
     }
     bundle = cache.get('bundle')
@@ -143,11 +302,39 @@ def predict_next_close(ticker: str, period: str, interval: str) -> Dict:
     return out
 
 
+def predict_next_close(ticker: str, period: str, interval: str) -> Dict:
+    df = _read_closes(ticker, period, interval)
+    cache = get_model_and_scaler(ticker)
+    scaler, values, window = _scaled_window(df, cache)
+    return _prediction(ticker, df, cache, scaler, values, _predict_window(cache.get('entry', cache), window))
+
+
+def predict_many(tickers: List[str], period: str, interval: str) -> List[Dict]:
+    """Score many tickers with one predict call per distinct model (one call for a pooled universe)."""
+    groups: Dict[int, List[Tuple]] = {}
+    for ticker in tickers:
+        df = _read_closes(ticker, period, interval)
+        cache = get_model_and_scaler(ticker)
+        scaler, values, window = _scaled_window(df, cache)
+        groups.setdefault(id(cache['model']), []).append((ticker, df, cache, scaler, values, window))
+    out: Dict[str, Dict] = {}
+    for items in groups.values():
+        preds = items[0][2]['model'].predict(np.stack([item[5] for item in items]), verbose=0)
+        for i, (ticker, df, cache, scaler, values, _) in enumerate(items):
+            out[ticker] = _prediction(ticker, df, cache, scaler, values, preds[i:i + 1])
+    return [out[t] for t in tickers]
+
+
 @app.get('/health')
 def health():
     return {
         'ok': True,
         'models_cached': len(MODEL_CACHE),
+        'batching': {
+            'max_size': BATCH_MAX_SIZE,
+            'max_wait_ms': BATCH_MAX_WAIT_MS,
+            'models': {path: c['batcher'].stats() for path, c in list(MODEL_CACHE.items()) if c.get('batcher')},
+        },
     }
 
 
@@ -163,3 +350,9 @@ def models_latest(ticker: str = Query(..., min_length=1, max_length=10)):
 @app.post('/predict')
 def predict(inp: PredictIn):
     return predict_next_close(inp.ticker.upper(), inp.period, inp.interval)
+
+
+@app.post('/predict/batch')
+def predict_batch(inp: PredictBatchIn):
+    tickers = list(dict.fromkeys(t.upper() for t in inp.tickers))
+    return {'predictions': predict_many(tickers, inp.period, inp.interval)}
@@ -0,0 +1,5 @@
+"""
+Offline performance benchmarks for the prediction core, research backtesters and API.
+
+Run with `python -m benchmarks.run`; see benchmarks/run.py for options.
+"""
@@ -0,0 +1,186 @@
+"""
+Benchmark cases.
+
+Each case is registered with @benchmark and is a setup function that receives the
+OfflineEnv and returns a zero-argument callable; only that callable is timed.
+"""
+from __future__ import annotations
+import tempfile
+from dataclasses import dataclass
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+from .env import OfflineEnv, research_module
+
+TICKER = 'BENCH'
+
+
+@dataclass
+class Benchmark:
+    name: str
+    group: str
+    setup: Callable[[OfflineEnv], Callable[[], object]]
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, group: str):
+    def _register(setup):
+        BENCHMARKS[name] = Benchmark(name=name, group=group, setup=setup)
+        return setup
+    return _register
+
+
+# ----------------------------- core --------------------------------------
+
+@benchmark('core.feature_engineer', 'core')
+def _feature_engineer(env: OfflineEnv):
+    df = env.frames[TICKER]
+    return lambda: env.core._feature_engineer(df)
+
+
+@benchmark('core.train_model', 'core')
+def _train_model(env: OfflineEnv):
+    return lambda: env.core.train_model(TICKER)
+
+
+def _predict(days: int):
+    def _setup(env: OfflineEnv):
+        env.ensure_model(TICKER)
+        # Cleared each run so the full rollout is timed, not a cached trajectory
+        def _run():
+            env.core.clear_forecast_cache()
+            return env.core.predict_stock(TICKER, prediction_days=days)
+        return _run
+    return _setup
+
+
+for _days in (1, 30, 365):
+    benchmark(f'core.predict_stock_{_days}d', 'core')(_predict(_days))
+
+
+@benchmark('core.predict_stock_dashboard', 'core')
+def _predict_dashboard(env: OfflineEnv):
+    """The dashboard's 7/30/90/365-day requests on one page view, sharing one trajectory."""
+    env.ensure_model(TICKER)
+    def _run():
+        env.core.clear_forecast_cache()
+        return [env.core.predict_stock(TICKER, prediction_days=d) for d in (7, 30, 90, 365)]
+    return _run
+
+
+def _cold(env: OfflineEnv, fn):
+    """Run fn with the evaluation memo cleared so the full computation is timed."""
+    def _run():
+        env.core.clear_eval_cache()
+        return fn()
+    return _run
+
+
+@benchmark('core.evaluate_model_walkforward', 'core')
+def _walkforward(env: OfflineEnv):
+    return _cold(env, lambda: env.core.evaluate_model_walkforward(TICKER, steps=10))
+
+
+@benchmark('core.evaluate_model', 'core')
+def _evaluate(env: OfflineEnv):
+    env.ensure_model(TICKER)
+    # A fresh report store each run, otherwise the stored report is reloaded instead of recomputed
+    def _run():
+        env.core.REPORTS_DIR = tempfile.mkdtemp(dir=env.dir)
+        return env.core.evaluate_model(TICKER)
+    return _cold(env, _run)
+
+
+@benchmark('core.evaluate_model_cached', 'core')
+def _evaluate_cached(env: OfflineEnv):
+    env.ensure_model(TICKER)
+    env.core.evaluate_model(TICKER)
+    return lambda: env.core.evaluate_model(TICKER)
+
+
+# ---------------------------- research -----------------------------------
+
+@benchmark('research.engineer_features', 'research')
+def _engineer_features(env: OfflineEnv):
+    features = research_module('features')
+    df = env.frames[TICKER]
+    return lambda: features.engineer_features(df)
+
+
+@benchmark('research.backtester_run', 'research')
+def _backtester(env: OfflineEnv):
+    backtester = research_module('backtester')
+    rng = np.random.default_rng(0)
+    n = 2520
+    preds = pd.DataFrame({
+        'date': pd.bdate_range('2014-01-01', periods=n),
+        'predicted_prob': rng.uniform(0, 1, n),
+        'actual_return': rng.normal(0, 0.01, n),
+    })
+    return lambda: backtester.Backtester(preds).run()
+
+
+@benchmark('research.portfolio_backtester_run', 'research')
+def _portfolio_backtester(env: OfflineEnv):
+    backtester = research_module('backtester')
+    rng = np.random.default_rng(0)
+    # PortfolioBacktester rebalances weekly and expects one row per ticker per week
+    dates = pd.date_range('2022-01-07', periods=104, freq='W-FRI')
+    tickers = [f'T{i:02d}' for i in range(50)]
+    idx = pd.MultiIndex.from_product([dates, tickers], names=['date', 'ticker'])
+    preds = pd.DataFrame({
+        'predicted_prob': rng.uniform(0, 1, len(idx)),
+        'actual_return': rng.normal(0, 0.01, len(idx)),
+    }, index=idx).reset_index()
+    return lambda: backtester.PortfolioBacktester(preds, K=10).run()
+
+
+# ------------------------------- api -------------------------------------
+
+def _client(env: OfflineEnv):
+    from fastapi.testclient import TestClient
+    return TestClient(env.api().app)
+
+
+@benchmark('api.history', 'api')
+def _api_history(env: OfflineEnv):
+    api = env.api()
+    client = _client(env)
+    # Cleared each run so the data load and row encoding are timed, not a cached response
+    def _run():
+        api._HISTORY_CACHE.clear()
+        api._HISTORY_DATA.clear()
+        return client.get(f'/api/v1/stocks/{TICKER}/history').raise_for_status()
+    return _run
+
+
+@benchmark('api.indicators', 'api')
+def _api_indicators(env: OfflineEnv):
+    client = _client(env)
+    return lambda: client.get(f'/api/v1/stocks/{TICKER}/indicators').raise_for_status()
+
+
+@benchmark('api.predict_30d', 'api')
+def _api_predict(env: OfflineEnv):
+    env.ensure_model(TICKER)
+    client = _client(env)
+    # Cleared each run so the request pays for the rollout, as in core.predict_stock_30d
+    def _run():
+        env.core.clear_forecast_cache()
+        return client.post('/api/v1/predict', json={'ticker': TICKER, 'days': 30, 'model': 'rf'}).raise_for_status()
+    return _run
+
+
+@benchmark('api.backtest', 'api')
+def _api_backtest(env: OfflineEnv):
+    env.ensure_model(TICKER)
+    client = _client(env)
+    # Same cold path as core.evaluate_model: no memoized evaluation and no stored report to reload
+    def _run():
+        env.core.REPORTS_DIR = tempfile.mkdtemp(dir=env.dir)
+        return client.get(f'/api/v1/stocks/{TICKER}/backtest', params={'model': 'rf'}).raise_for_status()
+    return _cold(env, _run)
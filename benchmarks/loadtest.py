@@ -0,0 +1,295 @@
+"""
+Closed-loop load tester for the prediction API.
+
+A fixed number of virtual users each send one request, wait for the response and
+immediately send the next, so offered load adapts to what the server sustains.
+Endpoints are drawn from a weighted mix and tickers uniformly from the universe.
+
+Targets:
+    in-process (default)  src.api.main driven through httpx's ASGI transport
+    --serve               the same app behind a local uvicorn on --port, over TCP
+    --url URL             an already running server (tickers must exist there)
+
+The first two run inside an OfflineEnv: synthetic data for --tickers tickers and, with
+--models stub (default), cheap stand-in models so no training or network is needed.
+--models rf trains the real random forest per ticker first.
+
+Examples:
+    python -m benchmarks.loadtest --users 16 --duration 30
+    python -m benchmarks.loadtest --mix predict=1,history=1 --tickers 50 --csv /tmp/load.csv
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --ticker-list AAPL,MSFT
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .env import OfflineEnv, ROOT
+
+RESULTS_DIR = os.path.join(ROOT, 'reports', 'loadtest')
+DEFAULT_MIX = {'predict': 0.5, 'history': 0.25, 'indicators': 0.2, 'backtest': 0.05}
+CSV_FIELDS = ['t', 'endpoint', 'ticker', 'status', 'latency_ms', 'outcome']
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse 'predict=0.5,history=0.3' into normalized endpoint weights."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        name, _, weight = part.partition('=')
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown endpoint '{name}'; choose from {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight or 1.0)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError('Mix weights must sum to a positive number')
+    return {k: v / total for k, v in mix.items()}
+
+
+def _request(endpoint: str, ticker: str, days: int, model: str):
+    if endpoint == 'predict':
+        return 'POST', '/api/v1/predict', {'json': {'ticker': ticker, 'days': days, 'model': model}}
+    if endpoint == 'backtest':
+        return 'GET', f'/api/v1/stocks/{ticker}/backtest', {'params': {'model': model}}
+    return 'GET', f'/api/v1/stocks/{ticker}/{endpoint}', {}
+
+
+async def _user(client, mix: Dict[str, float], tickers: Sequence[str], deadline: float, budget: Dict[str, int],
+                records: List[Dict], started: float, rng: random.Random, days: int, model: str, timeout: float):
+    import httpx
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        if budget['left'] is not None:
+            if budget['left'] <= 0:
+                return
+            budget['left'] -= 1
+        endpoint = rng.choices(names, weights)[0]
+        ticker = rng.choice(tickers)
+        method, path, kwargs = _request(endpoint, ticker, days, model)
+        t0 = time.perf_counter()
+        try:
+            r = await client.request(method, path, timeout=timeout, **kwargs)
+            status = r.status_code
+            outcome = 'ok' if status < 400 else {504: 'timeout', 429: 'rejected'}.get(status, 'error')
+        except httpx.TimeoutException:
+            status, outcome = 0, 'timeout'
+        except httpx.HTTPError:
+            status, outcome = 0, 'error'
+        records.append({
+            't': round(t0 - started, 6),
+            'endpoint': endpoint,
+            'ticker': ticker,
+            'status': status,
+            'latency_ms': round((time.perf_counter() - t0) * 1000, 3),
+            'outcome': outcome,
+        })
+
+
+async def run_load(client, mix: Dict[str, float], tickers: Sequence[str], users: int = 8, duration: float = 10.0,
+                   requests: Optional[int] = None, days: int = 30, model: str = 'rf', timeout: float = 30.0,
+                   seed: int = 0) -> Dict:
+    """Drive `client` with `users` closed-loop users for `duration` seconds (or `requests` total)."""
+    records: List[Dict] = []
+    budget = {'left': requests}
+    started = time.perf_counter()
+    deadline = started + duration if requests is None else float('inf')
+    await asyncio.gather(*(
+        _user(client, mix, tickers, deadline, budget, records, started, random.Random(seed + i), days, model, timeout)
+        for i in range(users)
+    ))
+    return {'records': records, 'elapsed': time.perf_counter() - started}
+
+
+def summarize(records: List[Dict], elapsed: float) -> Dict:
+    """Throughput, latency percentiles and error/timeout/load-shedding rates overall and per endpoint."""
+    def _stats(rows):
+        lat = np.array([r['latency_ms'] for r in rows], dtype=float)
+        n = len(rows)
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99]) if n else (float('nan'),) * 3
+        return {
+            'requests': n,
+            'throughput_rps': n / elapsed if elapsed > 0 else 0.0,
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'error_rate': sum(r['outcome'] == 'error' for r in rows) / n if n else 0.0,
+            'timeout_rate': sum(r['outcome'] == 'timeout' for r in rows) / n if n else 0.0,
+            'rejected_rate': sum(r['outcome'] == 'rejected' for r in rows) / n if n else 0.0,
+        }
+    endpoints = sorted({r['endpoint'] for r in records})
+    return {
+        'elapsed_s': elapsed,
+        'overall': _stats(records),
+        'endpoints': {e: _stats([r for r in records if r['endpoint'] == e]) for e in endpoints},
+    }
+
+
+def write_csv(records: List[Dict], path: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(sorted(records, key=lambda r: r['t']))
+
+
+def format_summary(summary: Dict) -> str:
+    header = f"{'endpoint':<12}{'reqs':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'err %':>8}{'tmo %':>8}{'shed %':>8}"
+    lines = [header]
+    rows = list(summary['endpoints'].items()) + [('overall', summary['overall'])]
+    for name, s in rows:
+        lines.append(
+            f"{name:<12}{s['requests']:>8}{s['throughput_rps']:>9.1f}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}"
+            f"{s['p99_ms']:>10.1f}{s['error_rate'] * 100:>8.1f}{s['timeout_rate'] * 100:>8.1f}"
+            f"{s['rejected_rate'] * 100:>8.1f}"
+        )
+    return '\n'.join(lines)
+
+
+# ------------------------------ stub models --------------------------------
+
+def install_stub_models(env: OfflineEnv, latency_ms: float = 0.0):
+    """
+    Bind cheap stand-ins for predict_stock / evaluate_model into the API, returning the module.
+
+    They read the same local data as the real models so history and I/O costs stay
+    realistic; `latency_ms` adds a sleep to emulate model compute on the worker thread.
+    """
+    api = env.api()
+    core = env.core
+
+    def predict_stock(ticker: str, prediction_days: int = 30) -> Dict:
+        close = core._load_data(ticker)['Close']
+        if latency_ms:
+            time.sleep(latency_ms / 1000.0)
+        drift = float(close.diff().tail(20).mean())
+        sigma = float(close.diff().tail(60).std())
+        last = float(close.iloc[-1])
+        preds = [last + drift * (i + 1) for i in range(prediction_days)]
+        return {
+            'ticker': ticker,
+            'predictions': preds,
+            'intervals': [[p - 1.96 * sigma, p + 1.96 * sigma] for p in preds],
+            'model_version': 'stub',
+            'timestamp': datetime.utcnow().isoformat(),
+            'as_of': close.index[-1].isoformat(),
+            'last_close': last,
+        }
+
+    def evaluate_model(ticker: str) -> Dict:
+        close = core._load_data(ticker)['Close']
+        if latency_ms:
+            time.sleep(latency_ms / 1000.0)
+        err = (close - close.shift(1)).dropna()
+        rmse = float(np.sqrt((err ** 2).mean()))
+        return {'ticker': ticker, 'test_metrics': {'rmse': rmse, 'mae': float(err.abs().mean())}, 'model_version': 'stub'}
+
+    api.predict_stock = predict_stock
+    api.evaluate_model = evaluate_model
+    api.evaluate_model_walkforward = lambda ticker, steps=60: evaluate_model(ticker)
+    return api
+
+
+@contextmanager
+def _uvicorn(app, port: int):
+    """Serve `app` on 127.0.0.1:`port` from a background thread."""
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        end = time.time() + 10
+        while not server.started:
+            if time.time() > end:
+                raise RuntimeError('uvicorn did not start')
+            time.sleep(0.05)
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description='Closed-loop load test for the prediction API')
+    p.add_argument('--users', type=int, default=8, help='Concurrent closed-loop users')
+    p.add_argument('--duration', type=float, default=10.0, help='Seconds to run')
+    p.add_argument('--requests', type=int, default=None, help='Stop after this many requests instead of --duration')
+    p.add_argument('--mix', default=','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items()),
+                   help='Endpoint weights, e.g. predict=0.5,history=0.25,indicators=0.2,backtest=0.05')
+    p.add_argument('--tickers', type=int, default=20, help='Synthetic tickers to generate (in-process/--serve)')
+    p.add_argument('--ticker-list', default=None, help='Comma-separated tickers to hit (required with --url)')
+    p.add_argument('--history-days', type=int, default=730, help='Synthetic history length per ticker')
+    p.add_argument('--models', choices=('stub', 'rf'), default='stub', help='Stand-in models or trained random forests')
+    p.add_argument('--stub-latency-ms', type=float, default=0.0, help='Emulated compute per stub model call')
+    p.add_argument('--days', type=int, default=30, help='Prediction horizon sent to /predict')
+    p.add_argument('--timeout', type=float, default=30.0, help='Client-side timeout per request (s)')
+    p.add_argument('--url', default=None, help='Target an existing server instead of the in-process app')
+    p.add_argument('--serve', action='store_true', help='Run the app under a local uvicorn and drive it over TCP')
+    p.add_argument('--port', type=int, default=8765)
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--csv', default=None, help='Per-request CSV (default: reports/loadtest/load_<ts>.csv)')
+    p.add_argument('--json', default=None, help='Optional summary JSON path')
+    args = p.parse_args(argv)
+
+    import httpx
+    mix = parse_mix(args.mix)
+    load_kwargs = dict(users=args.users, duration=args.duration, requests=args.requests, days=args.days,
+                       timeout=args.timeout, seed=args.seed)
+
+    if args.url:
+        if not args.ticker_list:
+            p.error('--ticker-list is required with --url')
+        tickers = [t.strip().upper() for t in args.ticker_list.split(',') if t.strip()]
+
+        async def _remote():
+            async with httpx.AsyncClient(base_url=args.url) as client:
+                return await run_load(client, mix, tickers, **load_kwargs)
+        result = asyncio.run(_remote())
+    else:
+        tickers = [t.strip().upper() for t in args.ticker_list.split(',')] if args.ticker_list \
+            else [f'LT{i:04d}' for i in range(args.tickers)]
+        with OfflineEnv(tickers=tickers, days=args.history_days) as env:
+            if args.models == 'stub':
+                api = install_stub_models(env, args.stub_latency_ms)
+            else:
+                for i, t in enumerate(tickers):
+                    print(f"training {t} ({i + 1}/{len(tickers)})", file=sys.stderr)
+                    env.ensure_model(t)
+                api = env.api()
+
+            async def _local(base_url=None):
+                transport = None if base_url else httpx.ASGITransport(app=api.app)
+                async with httpx.AsyncClient(transport=transport, base_url=base_url or 'http://testserver') as client:
+                    return await run_load(client, mix, tickers, **load_kwargs)
+            if args.serve:
+                with _uvicorn(api.app, args.port) as base_url:
+                    result = asyncio.run(_local(base_url))
+            else:
+                result = asyncio.run(_local())
+
+    summary = summarize(result['records'], result['elapsed'])
+    summary.update({'users': args.users, 'mix': mix, 'tickers': len(tickers), 'models': 'remote' if args.url else args.models})
+    print(format_summary(summary))
+
+    stamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
+    csv_path = args.csv or os.path.join(RESULTS_DIR, f'load_{stamp}.csv')
+    write_csv(result['records'], csv_path)
+    print(f"Per-request CSV written to {csv_path}", file=sys.stderr)
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Benchmark runner.
+
+Examples:
+    python -m benchmarks.run                              # run everything, write reports/benchmarks/bench_<ts>.json
+    python -m benchmarks.run --filter core.predict        # only cases whose name contains the filter
+    python -m benchmarks.run --compare reports/benchmarks/baseline.json --threshold 0.15
+
+With --compare, each case's median is compared against the baseline file and the
+process exits with status 1 if any case is slower by more than the threshold.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .cases import BENCHMARKS
+from .env import OfflineEnv, ROOT
+
+RESULTS_DIR = os.path.join(ROOT, 'reports', 'benchmarks')
+
+
+def time_case(fn, repeat: int, warmup: int) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        'repeat': repeat,
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def run_benchmarks(names: List[str], repeat: int = 5, warmup: int = 1) -> Dict:
+    results = {}
+    with OfflineEnv() as env:
+        for name in names:
+            case = BENCHMARKS[name]
+            fn = case.setup(env)
+            results[name] = dict(group=case.group, **time_case(fn, repeat, warmup))
+            print(f"{name:<40} median {results[name]['median'] * 1000:10.2f} ms", file=sys.stderr)
+    return {
+        'created_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float = 0.10) -> List[Dict]:
+    """Return cases whose median is more than `threshold` slower than the baseline."""
+    regressions = []
+    for name, cur in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base or not base.get('median'):
+            continue
+        ratio = cur['median'] / base['median']
+        if ratio > 1.0 + threshold:
+            regressions.append({'name': name, 'baseline': base['median'], 'current': cur['median'], 'ratio': ratio})
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description='Run offline performance benchmarks')
+    p.add_argument('--filter', default='', help='Only run cases whose name contains this substring')
+    p.add_argument('--repeat', type=int, default=5)
+    p.add_argument('--warmup', type=int, default=1)
+    p.add_argument('--out', default=None, help='Result JSON path (default: reports/benchmarks/bench_<ts>.json)')
+    p.add_argument('--compare', default=None, help='Baseline result JSON to compare against')
+    p.add_argument('--threshold', type=float, default=0.10, help='Allowed slowdown ratio before flagging (0.10 = 10%%)')
+    p.add_argument('--list', action='store_true', help='List available cases and exit')
+    args = p.parse_args(argv)
+
+    names = [n for n in BENCHMARKS if args.filter in n]
+    if args.list:
+        for n in names:
+            print(n)
+        return 0
+    if not names:
+        print(f"No benchmarks match '{args.filter}'", file=sys.stderr)
+        return 2
+
+    current = run_benchmarks(names, repeat=args.repeat, warmup=args.warmup)
+    out = args.out or os.path.join(RESULTS_DIR, f"bench_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f"Results written to {out}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(current, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['name']}: {r['baseline'] * 1000:.2f} ms -> {r['current'] * 1000:.2f} ms ({r['ratio']:.2f}x)", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
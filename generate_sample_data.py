@@ -2,94 +2,252 @@
 Sample/Real Stock Data Generator
 Adds generate_training_data(ticker, start_date, end_date) using yfinance,
 validates, and saves to data/raw/{ticker}_{date}.csv
+
+generate_market / write_market_parquet build large synthetic universes (many
+tickers x many years, daily or intraday bars) with GBM or regime-switching
+dynamics and a shared market factor, for load and scaling tests:
+
+    python generate_sample_data.py --tickers 500 --years 10 --dynamics regime \\
+        --correlation 0.3 --out data/synthetic/market.parquet
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from data.validate import validate_dataframe
 import os
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 try:
     import yfinance as yf
 except Exception:
     yf = None
 
-def generate_sample_data(ticker='SAMPLE', days=365, start_price=100):
+TRADING_DAYS = 252
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+SESSION_CLOSE = pd.Timedelta(hours=16)
+
+# Annualized (drift, volatility) and expected duration in trading days per regime
+REGIMES = {
+    'gbm': [(0.07, 0.20, None)],
+    'regime': [(0.15, 0.14, 250), (-0.25, 0.35, 60)],
+}
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def generate_sample_data(ticker='SAMPLE', days=365, start_price=100, seed=42):
     """
     Generate realistic sample stock data with consistent OHLC relationships
-    
+
     Args:
         ticker: Stock ticker symbol
         days: Number of days of data to generate
         start_price: Starting price
-    
+        seed: Seed for a private np.random.Generator (the global RNG is left untouched)
+
     Returns:
         DataFrame with stock data
     """
-    np.random.seed(42)
-    dates = [datetime.now() - timedelta(days=x) for x in range(days, 0, -1)]
-
-    prices = [start_price]
-    for _ in range(days - 1):
-        change = np.random.normal(0, 2)
-        new_price = max(prices[-1] + change, 50)
-        prices.append(new_price)
-
-    opens = []
-    highs = []
-    lows = []
-    closes = []
-    volumes = []
-
-    for p in prices:
-        o = p + np.random.uniform(-1.0, 1.0)
-        c = p + np.random.uniform(-1.0, 1.0)
-        base_max = max(o, c)
-        base_min = min(o, c)
-        h = base_max + np.random.uniform(0.0, 3.0)
-        l = base_min - np.random.uniform(0.0, 3.0)
-        opens.append(o)
-        closes.append(c)
-        highs.append(h)
-        lows.append(l)
-        volumes.append(np.random.randint(1_000_000, 5_000_000))
-
-    data = {
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    dates = [now - timedelta(days=x) for x in range(days, 0, -1)]
+
+    # Random walk floored at 50: the reflected walk is S_t - min(0, min_k S_k) on the excess over the floor
+    floor = 50.0
+    steps = np.concatenate([[max(start_price, floor) - floor], rng.normal(0, 2, days - 1)])
+    walk = np.cumsum(steps)
+    prices = floor + walk - np.minimum(np.minimum.accumulate(walk), 0.0)
+
+    opens = prices + rng.uniform(-1.0, 1.0, days)
+    closes = prices + rng.uniform(-1.0, 1.0, days)
+    highs = np.maximum(opens, closes) + rng.uniform(0.0, 3.0, days)
+    lows = np.minimum(opens, closes) - rng.uniform(0.0, 3.0, days)
+    volumes = rng.integers(1_000_000, 5_000_000, days)
+
+    df = pd.DataFrame({
         'Date': dates,
         'Open': opens,
         'High': highs,
         'Low': lows,
         'Close': closes,
         'Volume': volumes,
-    }
-
-    df = pd.DataFrame(data)
+    })
     df.set_index('Date', inplace=True)
     return df
 
-if __name__ == '__main__':
-    # Generate sample data
-    print("Generating sample stock data...")
-    df = generate_sample_data(days=365)
 
-    # Validate
-    ok, errors, meta = validate_dataframe(df, ticker='SAMPLE')
-    if not ok:
-        print("Validation errors:")
-        for e in errors[:10]:
-            print(" -", e)
-    else:
-        print("✓ Data validation passed:", meta.model_dump())
+def _ticker_names(tickers: Union[int, Sequence[str]]) -> List[str]:
+    if isinstance(tickers, int):
+        width = max(4, len(str(tickers - 1)))
+        return [f"T{i:0{width}d}" for i in range(tickers)]
+    return [str(t).upper() for t in tickers]
 
-    # Save to CSV
-    df.to_csv('stock_data.csv')
-    print("✓ Sample data saved to 'stock_data.csv'")
 
-    print("\nFirst few rows:")
-    print(df.head())
+def _bar_timestamps(start: str, years: float, freq: str) -> Tuple[np.ndarray, int]:
+    """Bar timestamps (business days, regular session for intraday) and bars per day."""
+    days = pd.bdate_range(start, periods=max(1, int(round(years * TRADING_DAYS)))).values.astype('datetime64[ns]')
+    if freq.upper() in ('D', '1D'):
+        return days, 1
+    step = pd.Timedelta(freq)
+    bars = int((SESSION_CLOSE - SESSION_OPEN) / step)
+    offsets = SESSION_OPEN.to_timedelta64() + step.to_timedelta64() * np.arange(bars)
+    ts = (days[:, None] + offsets[None, :]).ravel()
+    return ts, len(offsets)
+
+
+def _regime_path(rng: np.random.Generator, n: int, regimes, bars_per_day: int) -> np.ndarray:
+    """Market-wide regime index per bar from a Markov chain with geometric durations."""
+    if len(regimes) == 1:
+        return np.zeros(n, dtype=np.int8)
+    mean_bars = np.array([r[2] * bars_per_day for r in regimes], dtype=float)
+    states, durations, total = [], [], 0
+    state = int(rng.integers(len(regimes)))
+    while total < n:
+        # Draw a batch of alternating spells; usually one batch covers the whole horizon
+        k = int(n / mean_bars.mean()) + 2
+        seq = (state + np.arange(k)) % len(regimes)
+        d = rng.geometric(1.0 / mean_bars[seq])
+        states.append(seq)
+        durations.append(d)
+        total += int(d.sum())
+        state = int((seq[-1] + 1) % len(regimes))
+    return np.repeat(np.concatenate(states), np.concatenate(durations))[:n].astype(np.int8)
 
-    print("\nData statistics:")
-    print(df.describe())
+
+def _market_chunks(tickers: Union[int, Sequence[str]] = 100, years: float = 5.0, start: str = '2015-01-02',
+                   freq: str = '1D', dynamics: str = 'gbm', correlation: float = 0.3, start_price: float = 100.0,
+                   seed: Optional[int] = 42, chunk_rows: int = 2_000_000) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Yield column arrays for blocks of (tickers x bars), rows grouped by ticker then time.
+
+    Returns follow log-GBM per bar with drift/vol taken from the current market regime.
+    Shocks mix one market factor shared by all tickers with idiosyncratic noise, giving
+    a constant pairwise correlation of `correlation` between tickers' returns. Output
+    is deterministic for a given seed and chunk_rows.
+    """
+    if dynamics not in REGIMES:
+        raise ValueError(f"dynamics must be one of {sorted(REGIMES)}")
+    if not 0.0 <= correlation < 1.0:
+        raise ValueError('correlation must be in [0, 1)')
+    names = _ticker_names(tickers)
+    ts, bars_per_day = _bar_timestamps(start, years, freq)
+    n_bars, n_tickers = len(ts), len(names)
+    rng = np.random.default_rng(seed)
+
+    regimes = REGIMES[dynamics]
+    dt = 1.0 / (TRADING_DAYS * bars_per_day)
+    state = _regime_path(rng, n_bars, regimes, bars_per_day)
+    mu = np.array([r[0] for r in regimes])[state]
+    sigma = np.array([r[1] for r in regimes])[state]
+    market = rng.standard_normal(n_bars)
+
+    # Per-ticker dispersion in volatility, starting price and liquidity
+    vol_scale = rng.lognormal(0.0, 0.3, n_tickers)
+    p0 = start_price * rng.lognormal(0.0, 0.5, n_tickers)
+    base_volume = rng.lognormal(np.log(2_000_000), 0.8, n_tickers) / bars_per_day
+
+    k = int(np.clip(chunk_rows // n_bars, 1, n_tickers))
+    t_len = max(1, chunk_rows // k)
+    a, b = np.sqrt(correlation), np.sqrt(1.0 - correlation)
+    for t0 in range(0, n_tickers, k):
+        idx = np.arange(t0, min(t0 + k, n_tickers))
+        bar_sigma = sigma[None, :] * vol_scale[idx, None] * np.sqrt(dt)
+        last_close = np.log(p0[idx])
+        for s0 in range(0, n_bars, t_len):
+            sl = slice(s0, min(s0 + t_len, n_bars))
+            sig = bar_sigma[:, sl]
+            z = a * market[None, sl] + b * rng.standard_normal(sig.shape)
+            r = (mu[None, sl] * dt - 0.5 * sig ** 2) + sig * z
+            log_close = last_close[:, None] + np.cumsum(r, axis=1)
+            prev_close = np.concatenate([last_close[:, None], log_close[:, :-1]], axis=1)
+            # Open gaps a fraction of a bar's volatility away from the previous close
+            log_open = prev_close + 0.2 * sig * rng.standard_normal(sig.shape)
+            top = np.maximum(log_open, log_close)
+            bottom = np.minimum(log_open, log_close)
+            high = top + 0.5 * sig * np.abs(rng.standard_normal(sig.shape))
+            low = bottom - 0.5 * sig * np.abs(rng.standard_normal(sig.shape))
+            # Volume is lognormal around each ticker's base and rises with the size of the move
+            volume = base_volume[idx, None] * rng.lognormal(0.0, 0.25, sig.shape) * (1.0 + np.abs(r) / sig)
+            last_close = log_close[:, -1]
+            width = sl.stop - sl.start
+            yield {
+                'Date': np.tile(ts[sl], len(idx)),
+                'ticker_idx': np.repeat(idx, width).astype(np.int32),
+                'Open': np.exp(log_open).ravel(),
+                'High': np.exp(high).ravel(),
+                'Low': np.exp(low).ravel(),
+                'Close': np.exp(log_close).ravel(),
+                'Volume': np.maximum(volume, 1.0).astype(np.int64).ravel(),
+                'names': names,
+            }
+
+
+def generate_market(tickers: Union[int, Sequence[str]] = 10, years: float = 2.0, **kwargs) -> pd.DataFrame:
+    """
+    Generate a synthetic universe in memory.
+
+    Args:
+        tickers: Number of tickers (named T0000, T0001, ...) or explicit ticker symbols
+        years: Length of history in trading years (252 business days each)
+        **kwargs: start, freq ('1D' or an intraday pandas offset such as '5min'), dynamics
+            ('gbm' or 'regime'), correlation, start_price, seed, chunk_rows
+
+    Returns:
+        Long-format DataFrame with Date, Ticker (categorical) and OHLCV columns
+    """
+    frames = []
+    for chunk in _market_chunks(tickers, years, **kwargs):
+        names = chunk['names']
+        frames.append(pd.DataFrame({
+            'Date': chunk['Date'],
+            'Ticker': pd.Categorical.from_codes(chunk['ticker_idx'], categories=names),
+            **{c: chunk[c] for c in OHLCV_COLUMNS},
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_market_parquet(path: str, tickers: Union[int, Sequence[str]] = 100, years: float = 5.0, **kwargs) -> Dict:
+    """
+    Stream a synthetic universe straight to a Parquet file, one row group per chunk.
+
+    Only one chunk (about `chunk_rows` rows) is held in memory at a time, so output
+    size is bounded by disk rather than RAM. Takes the same arguments as generate_market.
+
+    Returns:
+        Summary dict with path, rows, tickers, bars per ticker, bytes and seconds
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('Date', pa.timestamp('ns')),
+        ('Ticker', pa.dictionary(pa.int32(), pa.string())),
+        ('Open', pa.float64()), ('High', pa.float64()), ('Low', pa.float64()), ('Close', pa.float64()),
+        ('Volume', pa.int64()),
+    ])
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    started = time.perf_counter()
+    rows = 0
+    names: List[str] = []
+    with pq.ParquetWriter(path, schema, compression='snappy') as writer:
+        for chunk in _market_chunks(tickers, years, **kwargs):
+            names = chunk['names']
+            ticker = pa.DictionaryArray.from_arrays(pa.array(chunk['ticker_idx']), pa.array(names, pa.string()))
+            table = pa.Table.from_arrays(
+                [pa.array(chunk['Date']), ticker] + [pa.array(chunk[c]) for c in OHLCV_COLUMNS],
+                schema=schema,
+            )
+            writer.write_table(table)
+            rows += table.num_rows
+    return {
+        'path': path,
+        'rows': rows,
+        'tickers': len(names),
+        'bars_per_ticker': rows // max(1, len(names)),
+        'bytes': os.path.getsize(path),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
 
 
 def generate_training_data(ticker: str, start_date: str, end_date: str) -> str:
@@ -97,6 +255,7 @@ def generate_training_data(ticker: str, start_date: str, end_date: str) -> str:
     Fetch real data via yfinance, validate and save to data/raw.
     Returns path to saved CSV.
     """
+    from data.validate import validate_dataframe
     if yf is None:
         raise RuntimeError('yfinance not available')
     df = yf.download(ticker, start=start_date, end=end_date, progress=False, auto_adjust=True)
@@ -110,3 +269,59 @@ def generate_training_data(ticker: str, start_date: str, end_date: str) -> str:
     out_path = os.path.join(raw_dir, f"{ticker}_{datetime.now().strftime('%Y%m%d')}.csv")
     df.to_csv(out_path)
     return out_path
+
+
+def _sample_csv():
+    # Schema validation lives in the data package; only needed when writing files
+    from data.validate import validate_dataframe
+
+    # Generate sample data
+    print("Generating sample stock data...")
+    df = generate_sample_data(days=365)
+
+    # Validate
+    ok, errors, meta = validate_dataframe(df, ticker='SAMPLE')
+    if not ok:
+        print("Validation errors:")
+        for e in errors[:10]:
+            print(" -", e)
+    else:
+        print("✓ Data validation passed:", meta.model_dump())
+
+    # Save to CSV
+    df.to_csv('stock_data.csv')
+    print("✓ Sample data saved to 'stock_data.csv'")
+
+    print("\nFirst few rows:")
+    print(df.head())
+
+    print("\nData statistics:")
+    print(df.describe())
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description='Generate synthetic stock data (no --out: single-ticker stock_data.csv)')
+    p.add_argument('--out', default=None, help='Parquet path for a large synthetic universe')
+    p.add_argument('--tickers', type=int, default=100, help='Number of tickers')
+    p.add_argument('--years', type=float, default=5.0, help='Trading years of history per ticker')
+    p.add_argument('--start', default='2015-01-02', help='First trading day')
+    p.add_argument('--freq', default='1D', help="Bar size: '1D' or an intraday offset such as 1min, 5min, 1h")
+    p.add_argument('--dynamics', choices=sorted(REGIMES), default='gbm')
+    p.add_argument('--correlation', type=float, default=0.3, help='Pairwise return correlation via a market factor')
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--chunk-rows', type=int, default=2_000_000, help='Rows generated and written per row group')
+    args = p.parse_args(argv)
+
+    if not args.out:
+        _sample_csv()
+        return
+    summary = write_market_parquet(
+        args.out, tickers=args.tickers, years=args.years, start=args.start, freq=args.freq,
+        dynamics=args.dynamics, correlation=args.correlation, seed=args.seed, chunk_rows=args.chunk_rows,
+    )
+    print(f"✓ Wrote {summary['rows']:,} rows ({summary['tickers']} tickers x {summary['bars_per_ticker']:,} bars, "
+          f"{summary['bytes'] / 1e6:.1f} MB) to {summary['path']} in {summary['seconds']}s")
+
+
+if __name__ == '__main__':
+    main()
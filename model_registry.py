@@ -0,0 +1,104 @@
+"""
+LSTM model registry.
+
+Bundles are JSON files in models/ (named .pkl for historical reasons):
+    model_{TICKER}_{ts}_{hash}.pkl   one model for one ticker
+    pooled_{name}_{ts}_{hash}.pkl    one shared model for many tickers, with per-ticker scaler stats
+                                     under "tickers": {TICKER: {"scaler_min_": ..., "scaler_scale_": ...}}
+
+find_bundle(ticker) returns the newest bundle covering the ticker, whichever kind it is.
+Pooled bundles are resolved to a per-ticker view with top-level scaler_min_/scaler_scale_,
+so callers handle both kinds the same way. The RandomForest joblib bundles that share
+the models/ directory are skipped.
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+# Parsed bundle JSON keyed by path, invalidated on mtime change
+_CACHE: Dict[str, Tuple[float, Optional[Dict]]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _read(path: str) -> Optional[Dict]:
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _CACHE_LOCK:
+        cached = _CACHE.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    try:
+        with open(path) as f:
+            bundle = json.load(f)
+    except (ValueError, UnicodeDecodeError, OSError):
+        bundle = None  # joblib RandomForest bundle or unreadable
+    if not isinstance(bundle, dict):
+        bundle = None
+    with _CACHE_LOCK:
+        _CACHE[path] = (mtime, bundle)
+    return bundle
+
+
+def ticker_view(bundle: Dict, ticker: str) -> Dict:
+    """Per-ticker view of a bundle; pooled bundles get that ticker's scaler stats at top level."""
+    if not bundle.get('pooled'):
+        return bundle
+    stats = bundle['tickers'][ticker]
+    view = {k: v for k, v in bundle.items() if k != 'tickers'}
+    view.update(ticker=ticker, scaler_min_=stats['scaler_min_'], scaler_scale_=stats['scaler_scale_'])
+    return view
+
+
+def _bundles(models_dir: str):
+    if not os.path.isdir(models_dir):
+        return
+    for name in sorted(os.listdir(models_dir)):
+        if name.endswith('.pkl') and (name.startswith('model_') or name.startswith('pooled_')):
+            path = os.path.join(models_dir, name)
+            bundle = _read(path)
+            if bundle is not None:
+                yield name, path, bundle
+
+
+def find_bundle(ticker: str, models_dir: str = MODELS_DIR) -> Optional[Dict]:
+    """Newest per-ticker or pooled bundle covering `ticker` (per-ticker wins ties), or None."""
+    best: Optional[Tuple[Tuple[str, int], str, Dict]] = None
+    for name, path, bundle in _bundles(models_dir):
+        if name.startswith('model_'):
+            if not name.startswith(f'model_{ticker}_'):
+                continue
+            rank = (str(bundle.get('created_at', '')), 1)
+        elif ticker in bundle.get('tickers', {}):
+            rank = (str(bundle.get('created_at', '')), 0)
+        else:
+            continue
+        if best is None or rank >= best[0]:
+            best = (rank, path, bundle)
+    if best is None:
+        return None
+    view = dict(ticker_view(best[2], ticker))
+    view.setdefault('bundle_path', best[1])
+    return view
+
+
+def list_bundles(models_dir: str = MODELS_DIR) -> List[Dict]:
+    """Summary of every LSTM bundle: kind, tickers covered, created_at, paths."""
+    out = []
+    for name, path, bundle in _bundles(models_dir):
+        pooled = bool(bundle.get('pooled'))
+        out.append({
+            'kind': 'pooled' if pooled else 'ticker',
+            'name': bundle.get('name') if pooled else bundle.get('ticker'),
+            'tickers': sorted(bundle.get('tickers', {})) if pooled else [bundle.get('ticker')],
+            'created_at': bundle.get('created_at'),
+            'hash': bundle.get('hash'),
+            'model_path': bundle.get('model_path'),
+            'bundle_path': path,
+        })
+    return out
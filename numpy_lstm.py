@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Pure-NumPy inference for the Keras LSTM models (LSTM/Dropout/Dense stacks).
+
+Serving only needs the forward pass, so a trained `.keras`/`.h5` model is exported once
+to an `.npz` next to it, and the serving paths load that with NumPy instead of importing
+TensorFlow. Outputs match Keras within float32 tolerance.
+
+Export (needs TensorFlow):
+    python numpy_lstm.py models/lstm_AAPL_20250101000000.keras     # -> models/lstm_AAPL_....npz
+    python numpy_lstm.py --all                                     # every bundle in models/ lacking an export
+
+Environment:
+    LSTM_BACKEND=auto (default, prefer .npz and fall back to Keras) | numpy | keras
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+
+LSTM_BACKEND = os.getenv('LSTM_BACKEND', 'auto').lower()
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+FORMAT_VERSION = 1
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+ACTIVATIONS = {
+    'tanh': np.tanh,
+    'sigmoid': _sigmoid,
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0),
+}
+
+
+def _activation(name: str):
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation '{name}'")
+    return ACTIVATIONS[name]
+
+
+def npz_path_for(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + '.npz'
+
+
+# ------------------------------ export -----------------------------------
+
+def export_model(model, npz_path: str) -> str:
+    """Write the weights and layer spec of a Keras LSTM/Dense/Dropout stack to `npz_path`."""
+    layers: List[Dict] = []
+    arrays: Dict[str, np.ndarray] = {}
+    for layer in model.layers:
+        kind = layer.__class__.__name__
+        cfg = layer.get_config()
+        if kind in ('Dropout', 'InputLayer'):
+            continue  # identity at inference
+        i = len(layers)
+        weights = layer.get_weights()
+        if kind == 'LSTM':
+            if cfg.get('go_backwards') or cfg.get('stateful'):
+                raise ValueError('go_backwards/stateful LSTM layers are not supported')
+            kernel, recurrent = weights[0], weights[1]
+            bias = weights[2] if cfg.get('use_bias', True) else np.zeros(kernel.shape[1], dtype=kernel.dtype)
+            layers.append({
+                'kind': 'lstm',
+                'units': int(recurrent.shape[0]),
+                'return_sequences': bool(cfg.get('return_sequences', False)),
+                'activation': cfg.get('activation', 'tanh'),
+                'recurrent_activation': cfg.get('recurrent_activation', 'sigmoid'),
+            })
+            _activation(layers[-1]['activation'])
+            _activation(layers[-1]['recurrent_activation'])
+            arrays.update({f'l{i}_kernel': kernel, f'l{i}_recurrent': recurrent, f'l{i}_bias': bias})
+        elif kind == 'Dense':
+            kernel = weights[0]
+            bias = weights[1] if cfg.get('use_bias', True) else np.zeros(kernel.shape[1], dtype=kernel.dtype)
+            layers.append({'kind': 'dense', 'activation': cfg.get('activation', 'linear')})
+            _activation(layers[-1]['activation'])
+            arrays.update({f'l{i}_kernel': kernel, f'l{i}_bias': bias})
+        else:
+            raise ValueError(f"Unsupported layer type '{kind}'")
+    spec = {'version': FORMAT_VERSION, 'layers': layers}
+    np.savez(npz_path, spec=np.array(json.dumps(spec)), **{k: np.asarray(v, dtype=np.float32) for k, v in arrays.items()})
+    return npz_path
+
+
+def export_keras(model_path: str, npz_path: Optional[str] = None) -> str:
+    from tensorflow.keras.models import load_model
+    return export_model(load_model(model_path), npz_path or npz_path_for(model_path))
+
+
+# ------------------------------ inference --------------------------------
+
+class NumpyLSTM:
+    """Forward pass of an exported model; `predict` mirrors keras Model.predict for (batch, steps, features)."""
+
+    def __init__(self, spec: Dict, arrays: Dict[str, np.ndarray], path: Optional[str] = None):
+        if spec.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported export format version {spec.get('version')}")
+        self.layers = spec['layers']
+        self.arrays = arrays
+        self.path = path
+
+    @classmethod
+    def load(cls, npz_path: str) -> 'NumpyLSTM':
+        with np.load(npz_path) as data:
+            spec = json.loads(str(data['spec']))
+            arrays = {k: data[k] for k in data.files if k != 'spec'}
+        return cls(spec, arrays, npz_path)
+
+    def _lstm(self, i: int, layer: Dict, x: np.ndarray) -> np.ndarray:
+        kernel, recurrent, bias = self.arrays[f'l{i}_kernel'], self.arrays[f'l{i}_recurrent'], self.arrays[f'l{i}_bias']
+        act = _activation(layer['activation'])
+        rec_act = _activation(layer['recurrent_activation'])
+        u = layer['units']
+        batch, steps, _ = x.shape
+        # Input projections for every timestep at once; only the recurrent matmul is sequential
+        xz = x @ kernel + bias
+        h = np.zeros((batch, u), dtype=np.float32)
+        c = np.zeros((batch, u), dtype=np.float32)
+        seq = np.empty((batch, steps, u), dtype=np.float32) if layer['return_sequences'] else None
+        for t in range(steps):
+            z = xz[:, t] + h @ recurrent
+            # Keras gate order: input, forget, cell candidate, output
+            i_g = rec_act(z[:, :u])
+            f_g = rec_act(z[:, u:2 * u])
+            c = f_g * c + i_g * act(z[:, 2 * u:3 * u])
+            h = rec_act(z[:, 3 * u:]) * act(c)
+            if seq is not None:
+                seq[:, t] = h
+        return seq if seq is not None else h
+
+    def predict(self, X, verbose: int = 0, batch_size: Optional[int] = None) -> np.ndarray:
+        x = np.asarray(X, dtype=np.float32)
+        for i, layer in enumerate(self.layers):
+            if layer['kind'] == 'lstm':
+                x = self._lstm(i, layer, x)
+            else:
+                x = _activation(layer['activation'])(x @ self.arrays[f'l{i}_kernel'] + self.arrays[f'l{i}_bias'])
+        return x
+
+    __call__ = predict
+
+
+def load_lstm(model_path: str, npz_path: Optional[str] = None):
+    """
+    Load a model for inference: the NumPy export when available, else Keras.
+
+    Returns an object with a Keras-compatible `predict(X, verbose=0)`.
+    """
+    npz = npz_path or npz_path_for(model_path)
+    if LSTM_BACKEND != 'keras' and os.path.exists(npz):
+        return NumpyLSTM.load(npz)
+    if LSTM_BACKEND == 'numpy':
+        raise FileNotFoundError(f"No NumPy export at {npz}; run: python numpy_lstm.py {model_path}")
+    try:
+        from tensorflow.keras.models import load_model
+    except Exception:
+        raise RuntimeError(
+            f"No NumPy export at {npz} and TensorFlow is not installed; export with: python numpy_lstm.py {model_path}"
+        )
+    return load_model(model_path)
+
+
+def export_all(models_dir: str = MODELS_DIR) -> List[str]:
+    """Export every bundle's model lacking an .npz and record `npz_path` in the bundle JSON."""
+    written = []
+    for name in sorted(os.listdir(models_dir)) if os.path.isdir(models_dir) else []:
+        if not (name.startswith(('model_', 'pooled_')) and name.endswith('.pkl')):
+            continue
+        path = os.path.join(models_dir, name)
+        try:
+            with open(path) as f:
+                bundle = json.load(f)
+        except (ValueError, UnicodeDecodeError):
+            continue  # joblib RF bundles share the naming scheme
+        model_path = bundle.get('model_path')
+        if not model_path or not os.path.exists(model_path):
+            continue
+        npz = bundle.get('npz_path') or npz_path_for(model_path)
+        if not os.path.exists(npz):
+            export_keras(model_path, npz)
+            written.append(npz)
+        if bundle.get('npz_path') != npz:
+            bundle['npz_path'] = npz
+            with open(path, 'w') as f:
+                json.dump(bundle, f)
+    return written
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description='Export Keras LSTM models to .npz for TensorFlow-free serving')
+    p.add_argument('model', nargs='?', help='Path to a .keras/.h5 model')
+    p.add_argument('--out', default=None, help='Output .npz (default: alongside the model)')
+    p.add_argument('--all', action='store_true', help='Export every LSTM bundle in models/')
+    args = p.parse_args(argv)
+    if args.all:
+        for path in export_all():
+            print(path)
+        return 0
+    if not args.model:
+        p.error('model path or --all required')
+    print(export_keras(args.model, args.out))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
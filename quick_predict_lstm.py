@@ -11,12 +11,14 @@ from sklearn.preprocessing import MinMaxScaler
 
 try:
     import yfinance as yf
-    import tensorflow as tf
-    from tensorflow.keras.models import load_model
 except Exception as e:
     print(json.dumps({"ok": False, "error": f"imports failed: {e}"}))
     sys.exit(1)
 
+# TensorFlow is optional: models exported with numpy_lstm.py run on NumPy alone
+from numpy_lstm import load_lstm
+from model_registry import find_bundle
+
 LOOKBACK = 60
 
 MODELS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'models'))
@@ -26,14 +28,8 @@ LEGACY_MODEL_CANDIDATES: List[str] = [
 
 
 def load_latest_bundle(ticker: str) -> Optional[Dict]:
-    if not os.path.isdir(MODELS_DIR):
-        return None
-    candidates = [f for f in os.listdir(MODELS_DIR) if f.startswith(f"model_{ticker}_") and f.endswith('.pkl')]
-    if not candidates:
-        return None
-    latest = sorted(candidates)[-1]
-    with open(os.path.join(MODELS_DIR, latest)) as f:
-        return json.load(f)
+    # Per-ticker or pooled bundle covering the ticker
+    return find_bundle(ticker, MODELS_DIR)
 
 
 def get_model_path(ticker: str) -> Optional[str]:
@@ -71,7 +67,7 @@ def predict_next(close_series: pd.Series, ticker: str):
     if not model_path:
         raise RuntimeError('LSTM model file not found. Train a model (bundle .keras) or provide lstm_stock_model.h5')
 
-    model = load_model(model_path)
+    model = load_lstm(model_path)
 
     # Predict next
     next_scaled = model.predict(last_window, verbose=0)
@@ -0,0 +1,164 @@
+"""
+Per-model admission control for the prediction API.
+
+Each model type gets its own lane: a thread pool sized to the model's concurrency limit
+plus a bounded wait queue. A request that finds the lane full is rejected at once
+(Overloaded, mapped to 429 + Retry-After by the API) instead of waiting behind slow
+models, so a burst of `lstm_tuned` or `ensemble` requests cannot starve cheap `rf`
+predictions. Time spent queued is recorded per model; a request that times out or
+disconnects while still queued gives its slot back and its work is dropped unstarted.
+
+Limits come from defaults below, overridable as comma-separated `model=value` lists:
+    ADMISSION_CONCURRENCY=rf=8,ensemble=1   ADMISSION_QUEUE=rf=64,ensemble=2
+"""
+from __future__ import annotations
+import asyncio
+import contextvars
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Tuple
+
+from .cancellation import checkpoint
+from .metrics import ADMISSION_DROPPED, ADMISSION_QUEUE_WAIT, ADMISSION_QUEUED, ADMISSION_REJECTED
+
+# model -> (concurrent predictions, requests allowed to wait)
+DEFAULT_LIMITS: Dict[str, Tuple[int, int]] = {
+    'rf': (8, 64),
+    'xgb': (4, 32),
+    'lstm': (2, 16),
+    'arima': (2, 16),
+    'transformer': (2, 16),
+    'lstm_tuned': (1, 4),
+    'ensemble': (1, 4),
+}
+FALLBACK_LIMIT = (2, 8)
+
+
+def _parse_limits(value: str) -> Dict[str, int]:
+    out = {}
+    for part in filter(None, (p.strip() for p in value.split(','))):
+        name, _, num = part.partition('=')
+        out[name.strip().lower()] = int(num)
+    return out
+
+
+class Overloaded(Exception):
+    """The model's lane is full; retry_after is a seconds estimate for the queue to drain."""
+
+    def __init__(self, model: str, retry_after: int):
+        super().__init__(f"Too many pending '{model}' predictions")
+        self.model = model
+        self.retry_after = retry_after
+
+
+class ModelLane:
+    """Bounded executor for one model type."""
+
+    def __init__(self, model: str, concurrency: int, queue: int):
+        self.model = model
+        self.concurrency = max(1, concurrency)
+        self.queue = max(0, queue)
+        self._executor = ThreadPoolExecutor(self.concurrency, thread_name_prefix=f'predict-{model}')
+        self._lock = threading.Lock()
+        self.running = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.dropped = 0
+        # EWMA of service time, used to estimate Retry-After
+        self._service = 1.0
+
+    def retry_after(self) -> int:
+        with self._lock:
+            backlog = self.waiting + self.running
+            service = self._service
+        return max(1, math.ceil(service * (backlog / self.concurrency)))
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self.running + self.waiting >= self.concurrency + self.queue:
+                self.rejected += 1
+                full = True
+            else:
+                self.waiting += 1
+                full = False
+        if full:
+            ADMISSION_REJECTED.inc(model=self.model)
+            raise Overloaded(self.model, self.retry_after())
+        ADMISSION_QUEUED.inc(model=self.model)
+
+    def _call(self, fn: Callable, args: tuple, enqueued: float):
+        started = time.perf_counter()
+        with self._lock:
+            self.waiting -= 1
+            self.running += 1
+        ADMISSION_QUEUED.dec(model=self.model)
+        ADMISSION_QUEUE_WAIT.observe(started - enqueued, model=self.model)
+        try:
+            # A request that timed out or disconnected while queued is not started at all
+            checkpoint()
+            return fn(*args)
+        finally:
+            # The slot is freed when the work ends, even if the caller already timed out
+            with self._lock:
+                self.running -= 1
+                self._service = 0.8 * self._service + 0.2 * (time.perf_counter() - started)
+
+    def _on_done(self, fut: Future) -> None:
+        # Cancelled before a worker picked it up: _call never ran, so give the queue slot back here
+        if not fut.cancelled():
+            return
+        with self._lock:
+            self.waiting -= 1
+            self.dropped += 1
+        ADMISSION_QUEUED.dec(model=self.model)
+        ADMISSION_DROPPED.inc(model=self.model)
+
+    async def run(self, fn: Callable, *args, timeout: float):
+        """Run fn(*args) in this lane; raises Overloaded when full and asyncio.TimeoutError past `timeout`."""
+        self._admit()
+        ctx = contextvars.copy_context()
+        fut = self._executor.submit(ctx.run, self._call, fn, args, time.perf_counter())
+        fut.add_done_callback(self._on_done)
+        # Timing out or disconnecting cancels the wrapper, which cancels fut if it has not started yet
+        return await asyncio.wait_for(asyncio.wrap_future(fut), timeout=timeout)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'concurrency': self.concurrency,
+                'queue': self.queue,
+                'running': self.running,
+                'waiting': self.waiting,
+                'rejected': self.rejected,
+                'dropped': self.dropped,
+                'mean_service_s': round(self._service, 4),
+            }
+
+
+class Admission:
+    """Lanes keyed by model type, created on first use."""
+
+    def __init__(self, limits: Dict[str, Tuple[int, int]] = None):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        concurrency = _parse_limits(os.getenv('ADMISSION_CONCURRENCY', ''))
+        queue = _parse_limits(os.getenv('ADMISSION_QUEUE', ''))
+        for model in set(concurrency) | set(queue):
+            c, q = self.limits.get(model, FALLBACK_LIMIT)
+            self.limits[model] = (concurrency.get(model, c), queue.get(model, q))
+        self._lanes: Dict[str, ModelLane] = {}
+        self._lock = threading.Lock()
+
+    def lane(self, model: str) -> ModelLane:
+        with self._lock:
+            lane = self._lanes.get(model)
+            if lane is None:
+                lane = self._lanes[model] = ModelLane(model, *self.limits.get(model, FALLBACK_LIMIT))
+            return lane
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            lanes = dict(self._lanes)
+        return {name: lane.stats() for name, lane in lanes.items()}
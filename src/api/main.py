@@ -1,15 +1,43 @@
 from __future__ import annotations
 import os
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime
+import time
 import pandas as pd
-from fastapi import FastAPI, HTTPException
+import numpy as np
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from pydantic import BaseModel, Field
 
+from ..metrics import (
+    REGISTRY, CONTENT_TYPE, REQUEST_LATENCY, REQUESTS_IN_FLIGHT, PREDICTIONS, PREDICTION_TIMEOUTS,
+    PREDICTIONS_IN_FLIGHT, span, start_request_timings, end_request_timings, server_timing_header, record_cache,
+)
+from ..profiling import PROFILE_MODES, profile, profiled
+from ..jobs import JobManager, JOBS_DB, FINISHED, SUCCEEDED, CANCELLED
+from ..report_store import get_store
+from ..admission import Admission, Overloaded
+from ..cancellation import Cancelled, cancel_scope
+from ..warmup import Warmup
+from ..downsample import METHODS as DOWNSAMPLE_METHODS, lttb, ohlc
+from ..fingerprint import data_fingerprint
+
 # Model and core imports are optional to allow running tests without heavy native deps.
 # If SKIP_MODELS env var is set (1/true/yes), we install lightweight stubs instead.
 SKIP_MODELS = os.getenv('SKIP_MODELS', '0').lower() in ('1', 'true', 'yes')
+# Per-request profiling (X-Profile header or ?profile= query flag) is only honoured when enabled here.
+PROFILING_ENABLED = os.getenv('API_PROFILING', '0').lower() in ('1', 'true', 'yes')
 _model_loaded = False
+# Per-model concurrency limits and wait queues (see src/admission.py); ADMISSION_ENABLED=0 uses the shared default pool
+ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', '1').lower() in ('1', 'true', 'yes')
+ADMISSION = Admission()
+# Deadline for synchronous backtests; the evaluation stops at its next checkpoint once it passes
+BACKTEST_TIMEOUT = float(os.getenv('BACKTEST_TIMEOUT', '300'))
+# Tuning is stopped this long after its own timeout_sec if a trial is still running
+TUNE_GRACE_SEC = 60
 
 
 def _make_stub_raise(name):
@@ -23,6 +51,7 @@ if SKIP_MODELS:
     predict_stock = _make_stub_raise('predict_stock')
     _load_latest_model = lambda ticker: (_ for _ in ()).throw(FileNotFoundError('Models disabled'))
     MODELS_DIR = os.path.join(os.getcwd(), 'models')
+    REPORTS_DIR = None  # default reports/ store
     def _load_data(ticker):
         # return empty DataFrame with a datetime index to avoid attribute errors
         return pd.DataFrame(index=pd.DatetimeIndex([]))
@@ -42,6 +71,7 @@ if SKIP_MODELS:
     def _obv(close, volume):
         return pd.Series([], dtype=float)
     evaluate_model = _make_stub_raise('evaluate_model')
+    train_model = _make_stub_raise('train_model')
     evaluate_model_walkforward = _make_stub_raise('evaluate_model_walkforward')
     predict_stock_lstm = _make_stub_raise('predict_stock_lstm')
     predict_stock_lstm_tuned = _make_stub_raise('predict_stock_lstm_tuned')
@@ -57,18 +87,14 @@ if SKIP_MODELS:
     evaluate_stock_ensemble = _make_stub_raise('evaluate_stock_ensemble')
 else:
     try:
-        from ..core import predict_stock, _load_latest_model, MODELS_DIR, _load_data, _rsi, _ema, _macd, _bollinger_bands, _stochastic_oscillator, _atr, _obv, evaluate_model, evaluate_model_walkforward
-        from ..models.lstm_service import predict_stock_lstm, predict_stock_lstm_tuned, train_stock_lstm_tuned, evaluate_stock_lstm
-        from ..models.xgb_service import predict_stock_xgb, evaluate_stock_xgb
-        from ..models.arima_service import predict_stock_arima, evaluate_stock_arima
-        from ..models.transformer_service import predict_stock_transformer, evaluate_stock_transformer
-        from ..models.ensemble_service import predict_stock_ensemble, evaluate_stock_ensemble
+        from ..core import predict_stock, _load_latest_model, MODELS_DIR, _load_data, _rsi, _ema, _macd, _bollinger_bands, _stochastic_oscillator, _atr, _obv, evaluate_model, evaluate_model_walkforward, train_model, REPORTS_DIR
         _model_loaded = True
     except Exception:
         # if imports fail, fall back to stubs to keep the API importable
         predict_stock = _make_stub_raise('predict_stock')
         _load_latest_model = lambda ticker: (_ for _ in ()).throw(FileNotFoundError('Models disabled'))
         MODELS_DIR = os.path.join(os.getcwd(), 'models')
+        REPORTS_DIR = None  # default reports/ store
         def _load_data(ticker):
             return pd.DataFrame(index=pd.DatetimeIndex([]))
         def _rsi(series, period=14):
@@ -87,17 +113,34 @@ else:
         def _obv(close, volume):
             return pd.Series([], dtype=float)
         evaluate_model = _make_stub_raise('evaluate_model')
+        train_model = _make_stub_raise('train_model')
         evaluate_model_walkforward = _make_stub_raise('evaluate_model_walkforward')
+    # Each backend imports on its own, so one that is missing or broken only stubs its own model
+    try:
+        from ..models.lstm_service import predict_stock_lstm, predict_stock_lstm_tuned, train_stock_lstm_tuned, evaluate_stock_lstm
+    except Exception:
         predict_stock_lstm = _make_stub_raise('predict_stock_lstm')
         predict_stock_lstm_tuned = _make_stub_raise('predict_stock_lstm_tuned')
         train_stock_lstm_tuned = _make_stub_raise('train_stock_lstm_tuned')
         evaluate_stock_lstm = _make_stub_raise('evaluate_stock_lstm')
+    try:
+        from ..models.xgb_service import predict_stock_xgb, evaluate_stock_xgb
+    except Exception:
         predict_stock_xgb = _make_stub_raise('predict_stock_xgb')
         evaluate_stock_xgb = _make_stub_raise('evaluate_stock_xgb')
+    try:
+        from ..models.arima_service import predict_stock_arima, evaluate_stock_arima
+    except Exception:
         predict_stock_arima = _make_stub_raise('predict_stock_arima')
         evaluate_stock_arima = _make_stub_raise('evaluate_stock_arima')
+    try:
+        from ..models.transformer_service import predict_stock_transformer, evaluate_stock_transformer
+    except Exception:
         predict_stock_transformer = _make_stub_raise('predict_stock_transformer')
         evaluate_stock_transformer = _make_stub_raise('evaluate_stock_transformer')
+    try:
+        from ..models.ensemble_service import predict_stock_ensemble, evaluate_stock_ensemble
+    except Exception:
         predict_stock_ensemble = _make_stub_raise('predict_stock_ensemble')
         evaluate_stock_ensemble = _make_stub_raise('evaluate_stock_ensemble')
 import joblib
@@ -106,7 +149,24 @@ import glob
 import re
 
 
-app = FastAPI(title='Stock Prediction API', version='1.0.0')
+# Start-up warm-up (src/warmup.py); /api/v1/ready stays 503 until it has finished
+WARMUP: Warmup | None = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global WARMUP, _job_manager
+    WARMUP = Warmup(_load_data, _load_latest_model, _predictor)
+    WARMUP.start()
+    # Resume persisted jobs and start heartbeating now, not on the first job request
+    job_manager()
+    yield
+    if _job_manager is not None:
+        _job_manager.shutdown(wait=False)
+        _job_manager = None
+
+
+app = FastAPI(title='Stock Prediction API', version='1.0.0', lifespan=lifespan)
 
 cors_env = os.getenv('API_CORS_ORIGINS', '*')
 origins = [o.strip() for o in cors_env.split(',') if o.strip()]
@@ -119,42 +179,280 @@ app.add_middleware(
 )
 
 
+@app.middleware('http')
+async def metrics_middleware(request: Request, call_next):
+    timings, token = start_request_timings()
+    REQUESTS_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - start
+        REQUESTS_IN_FLIGHT.dec()
+        end_request_timings(token)
+        # Label by route template rather than raw path to keep cardinality bounded
+        route = request.scope.get('route')
+        REQUEST_LATENCY.observe(elapsed, method=request.method, route=getattr(route, 'path', 'unmatched'), status=str(status))
+    timings['total'] = elapsed
+    response.headers['Server-Timing'] = server_timing_header(timings)
+    return response
+
+
 class PredictBody(BaseModel):
     ticker: str = Field(..., min_length=1, max_length=10)
     days: int = Field(30, ge=1, le=365)
     model: str = Field('rf', description="Model to use: 'rf' (default), 'lstm', 'lstm_tuned', 'xgb', 'arima', 'transformer', or 'ensemble'")
 
 
+def _requested_profile_mode(request: Request) -> str | None:
+    if not PROFILING_ENABLED:
+        return None
+    flag = (request.headers.get('x-profile') or request.query_params.get('profile') or '').lower()
+    if flag in ('1', 'true', 'yes'):
+        return 'sample'
+    return flag if flag in PROFILE_MODES else None
+
+
+def _predictor(model_choice: str):
+    """Return (function, timeout seconds) for a prediction backend."""
+    return {
+        'lstm': (predict_stock_lstm, 120.0),
+        'lstm_tuned': (predict_stock_lstm_tuned, 300.0),
+        'xgb': (predict_stock_xgb, 60.0),
+        'arima': (predict_stock_arima, 60.0),
+        'transformer': (predict_stock_transformer, 120.0),
+        'ensemble': (predict_stock_ensemble, 180.0),
+    }.get(model_choice, (predict_stock, 30.0))
+
+
 class TuneBody(BaseModel):
     ticker: str = Field(..., min_length=1, max_length=10)
     n_trials: int = Field(15, ge=1, le=200)
     timeout_sec: int | None = Field(600, ge=30, le=7200)
 
 
+class TrainJobBody(BaseModel):
+    ticker: str = Field(..., min_length=1, max_length=10)
+
+
+class BacktestJobBody(BaseModel):
+    ticker: str = Field(..., min_length=1, max_length=10)
+    model: str = Field('rf')
+    mode: str = Field('static', description="'static' or 'walk' (rf only)")
+
+
+def _clean_ticker(ticker: str) -> str:
+    t = ticker.upper().strip()
+    if not t.isalnum():
+        raise HTTPException(status_code=400, detail='Invalid ticker')
+    return t
+
+
+# ------------------------------ background jobs ------------------------------
+# Tuning, training and job-submitted backtests run on per-kind worker pools (src/jobs.py);
+# JOBS_{KIND}_WORKERS overrides the pool sizes below.
+
+def _tune_job(params: dict, ctx) -> dict:
+    ctx.progress(0.0, 'tuning')
+    timeout = params.get('timeout_sec')
+    with cancel_scope(timeout + TUNE_GRACE_SEC if timeout else None):
+        path = train_stock_lstm_tuned(params['ticker'], params['n_trials'], timeout)
+    return {'ticker': params['ticker'], 'bundle': path}
+
+
+def _train_job(params: dict, ctx) -> dict:
+    ctx.progress(0.0, 'training')
+    r = train_model(params['ticker'])
+    return {'ticker': r.ticker, 'model_path': r.model_path, 'metrics': r.metrics, 'timestamp': r.timestamp}
+
+
+def _backtest_job(params: dict, ctx) -> dict:
+    ctx.progress(0.0, 'backtesting')
+    return _run_backtest(params['ticker'], params['model'], params['mode'])['data']
+
+
+_job_manager: JobManager | None = None
+
+
+def job_manager() -> JobManager:
+    global _job_manager
+    if _job_manager is None:
+        jm = JobManager(JOBS_DB)
+        jm.register('tune', _tune_job, workers=1)
+        jm.register('train', _train_job, workers=1)
+        jm.register('backtest', _backtest_job, workers=2)
+        jm.start()
+        _job_manager = jm
+    return _job_manager
+
+
+def _submit(kind: str, params: dict, response: Response) -> dict:
+    job, created = job_manager().submit(kind, params)
+    response.status_code = 202
+    return {'status': 'accepted', 'job_id': job['id'], 'deduplicated': not created, 'job': job}
+
+
+def _get_job(job_id: str) -> dict:
+    job = job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='Job not found')
+    return job
+
+
 @app.get('/api/v1/health')
 def health():
-    return {'status': 'ok', 'model_loaded': True}
+    return {'status': 'ok', 'model_loaded': _model_loaded, 'ready': WARMUP is not None and WARMUP.ready,
+            'admission': ADMISSION.stats() if ADMISSION_ENABLED else None}
+
+
+@app.get('/api/v1/ready')
+def ready(response: Response):
+    """Readiness probe: 200 once warm-up has finished, 503 before, so load balancers hold traffic meanwhile."""
+    is_ready = WARMUP is not None and WARMUP.ready
+    if not is_ready:
+        response.status_code = 503
+    return {'ready': is_ready, 'warmup': WARMUP.stats() if WARMUP is not None else None}
+
+
+@app.get('/metrics')
+def metrics():
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+# Price frames behind /history are reused for HISTORY_DATA_TTL seconds, so a cached response costs no data load.
+# Responses are keyed by (ticker, filters, points, method, data fingerprint): a new or restated bar changes the key.
+HISTORY_CACHE_SIZE = int(os.getenv('HISTORY_CACHE_SIZE', '128'))
+# Loaded frames are kept for at most HISTORY_DATA_SIZE tickers, least recently used evicted first
+HISTORY_DATA_SIZE = int(os.getenv('HISTORY_DATA_SIZE', '64'))
+HISTORY_DATA_TTL = float(os.getenv('HISTORY_DATA_TTL', '60'))
+_HISTORY_CACHE: 'OrderedDict[tuple, dict]' = OrderedDict()
+_HISTORY_DATA: 'OrderedDict[str, tuple]' = OrderedDict()  # ticker -> (loaded at, frame, fingerprint)
+_HISTORY_CACHE_LOCK = threading.Lock()
+
+
+def _history_frame(ticker: str) -> tuple:
+    """(price frame, content fingerprint) for a ticker, loaded at most once per HISTORY_DATA_TTL."""
+    now = time.monotonic()
+    with _HISTORY_CACHE_LOCK:
+        entry = _HISTORY_DATA.get(ticker)
+        if entry is not None:
+            if now - entry[0] < HISTORY_DATA_TTL:
+                _HISTORY_DATA.move_to_end(ticker)
+                return entry[1], entry[2]
+            del _HISTORY_DATA[ticker]
+    df = _load_data(ticker)
+    fingerprint = data_fingerprint(df)
+    with _HISTORY_CACHE_LOCK:
+        for t in [t for t, e in _HISTORY_DATA.items() if now - e[0] >= HISTORY_DATA_TTL]:
+            del _HISTORY_DATA[t]
+        _HISTORY_DATA[ticker] = (now, df, fingerprint)
+        _HISTORY_DATA.move_to_end(ticker)
+        while len(_HISTORY_DATA) > HISTORY_DATA_SIZE:
+            _HISTORY_DATA.popitem(last=False)
+    return df, fingerprint
+
+
+def _range_bars(value: str | None) -> int | None:
+    """Trailing bar count for a chart range ('1M', '6M', '1Y', '5Y', ...; 21 bars a month), None for MAX/unset."""
+    if not value or value.upper() == 'MAX':
+        return None
+    m = re.fullmatch(r'(\d+)([MY])', value.upper())
+    if not m:
+        raise HTTPException(status_code=400, detail="Invalid range; use e.g. 1M, 6M, 1Y, 5Y or MAX")
+    months = int(m.group(1)) * (12 if m.group(2) == 'Y' else 1)
+    return months * 21
+
+
+def _column(df: pd.DataFrame, name: str) -> np.ndarray:
+    col = df[name]
+    if isinstance(col, pd.DataFrame):  # yfinance multi-index columns
+        col = col.iloc[:, 0]
+    return col.to_numpy(dtype=float)
+
+
+# Daily simple moving averages sent with every row, so charts do not average merged candles
+HISTORY_SMA_PERIODS = (5, 20)
+
+
+def _history_rows(df: pd.DataFrame, points: int | None, method: str, sma: dict | None = None) -> list:
+    """Chart rows for df; sma maps period -> daily SMA aligned with df's rows."""
+    if df.empty:
+        return []
+    index = dates = [d.isoformat() for d in df.index]
+    o, h, l, c = (_column(df, k) for k in ('Open', 'High', 'Low', 'Close'))
+    v = _column(df, 'Volume') if 'Volume' in df.columns else None
+    sma = sma or {}
+    if points is None:
+        first = last = None
+    elif method == 'lttb':
+        rows, first, last = lttb(c, points)
+        o, h, l, c = o[rows], h[rows], l[rows], c[rows]
+        v = v[rows] if v is not None else None
+        sma = {p: a[rows] for p, a in sma.items()}
+        dates = [dates[i] for i in rows]
+    else:
+        first, last, o, h, l, c, v = ohlc(o, h, l, c, v, points)
+        # A candle closes on its last bar, so it carries the daily SMAs of that bar
+        sma = {p: a[last] for p, a in sma.items()}
+        # A candle is dated by its first bar; bucket_end carries the last
+        dates = [dates[i] for i in first]
+    volumes = [int(x) if not np.isnan(x) else None for x in v.tolist()] if v is not None else [None] * len(c)
+    out = [
+        {'date': d, 'open': oo, 'high': hh, 'low': ll, 'close': cc, 'volume': vv}
+        for d, oo, hh, ll, cc, vv in zip(dates, o.tolist(), h.tolist(), l.tolist(), c.tolist(), volumes)
+    ]
+    for p, a in sma.items():
+        for row, x in zip(out, a.tolist()):
+            row[f'sma{p}'] = None if np.isnan(x) else x
+    if first is not None:
+        for row, a, b in zip(out, first.tolist(), last.tolist()):
+            row['bucket_start'] = index[a]
+            row['bucket_end'] = index[b]
+    return out
 
 
 @app.get('/api/v1/stocks/{ticker}/history')
-def get_history(ticker: str, start: str | None = None, end: str | None = None):
-    df = _load_data(ticker.upper())
+def get_history(ticker: str, start: str | None = None, end: str | None = None,
+                range_: str | None = Query(None, alias='range', description='Trailing window: 1M, 3M, 6M, 1Y, 5Y, ... or MAX'),
+                points: int | None = Query(None, ge=3, le=10000, description='Downsample to at most this many rows'),
+                method: str = Query('ohlc', description="Downsampling: 'ohlc' candles or 'lttb' close-line points")):
+    t = ticker.upper()
+    bars = _range_bars(range_)
+    method = method.lower()
+    if method not in DOWNSAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail="Invalid method; choose 'ohlc' or 'lttb'")
+    df, fingerprint = _history_frame(t)
+    key = (t, start, end, bars, points, method if points else None, fingerprint)
+    with _HISTORY_CACHE_LOCK:
+        cached = _HISTORY_CACHE.get(key)
+        if cached is not None:
+            _HISTORY_CACHE.move_to_end(key)
+    record_cache('history', cached is not None)
+    if cached is not None:
+        return cached
+    # SMAs over the full daily series, so the first bars of a trimmed window have them too
+    close = pd.Series(_column(df, 'Close')) if 'Close' in df.columns else None
+    sma = {p: close.rolling(p).mean().to_numpy() for p in HISTORY_SMA_PERIODS} if close is not None else {}
+    keep = np.ones(len(df), dtype=bool)
     if start:
-        df = df[df.index >= pd.to_datetime(start)]
+        keep &= df.index >= pd.to_datetime(start)
     if end:
-        df = df[df.index <= pd.to_datetime(end)]
-    out = [
-        {
-            'date': idx.isoformat(),
-            'open': float(r.Open),
-            'high': float(r.High),
-            'low': float(r.Low),
-            'close': float(r.Close),
-            'volume': int(r.Volume) if 'Volume' in df.columns and pd.notna(r.Volume) else None
-        }
-        for idx, r in df.iterrows()
-    ]
-    return {'status': 'success', 'data': out}
+        keep &= df.index <= pd.to_datetime(end)
+    rows = np.flatnonzero(keep)
+    if bars is not None:
+        rows = rows[-bars:]
+    df = df.iloc[rows]
+    with span('history_rows'):
+        out = {'status': 'success', 'data': _history_rows(df, points, method, {p: a[rows] for p, a in sma.items()})}
+    if points:
+        out['downsampled'] = {'method': method, 'points': len(out['data']), 'source_points': len(df)}
+    with _HISTORY_CACHE_LOCK:
+        _HISTORY_CACHE[key] = out
+        while len(_HISTORY_CACHE) > HISTORY_CACHE_SIZE:
+            _HISTORY_CACHE.popitem(last=False)
+    return out
 
 
 @app.get('/api/v1/stocks/{ticker}/indicators')
@@ -235,67 +533,151 @@ def list_models():
     return {'models': list(latest.values())}
 
 
-@app.post('/api/v1/tune')
-async def tune(body: TuneBody):
-    t = body.ticker.upper().strip()
-    if not t.isalnum():
-        raise HTTPException(status_code=400, detail='Invalid ticker')
+@app.get('/api/v1/reports')
+def report_history(ticker: str | None = None, kind: str | None = None, model: str | None = None,
+                   start: str | None = None, end: str | None = None, metric: str | None = None, limit: int = 1000):
+    """Stored training/evaluation/backtest reports; with `metric` (e.g. test_metrics.rmse) a time series of that value."""
     try:
-        path = await asyncio.wait_for(
-            asyncio.to_thread(train_stock_lstm_tuned, t, body.n_trials, body.timeout_sec or None),
-            timeout=(body.timeout_sec or 600) + 30
-        )
-        return {'status': 'ok', 'ticker': t, 'bundle': path}
-    except asyncio.TimeoutError:
-        raise HTTPException(status_code=504, detail='Tuning timed out')
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        rows = get_store(REPORTS_DIR).query(
+            ticker=ticker.upper() if ticker else None, kind=kind, model=model, start=start, end=end,
+            metric=metric, limit=min(max(limit, 1), 10000))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {'status': 'success', 'data': rows}
+
+
+@app.post('/api/v1/tune')
+def tune(body: TuneBody, response: Response):
+    # Tuning can take hours: queue it and let the client poll /api/v1/jobs/{job_id}
+    t = _clean_ticker(body.ticker)
+    return _submit('tune', {'ticker': t, 'n_trials': body.n_trials, 'timeout_sec': body.timeout_sec or None}, response)
+
+
+@app.post('/api/v1/jobs/tune')
+def submit_tune(body: TuneBody, response: Response):
+    return tune(body, response)
+
+
+@app.post('/api/v1/jobs/train')
+def submit_train(body: TrainJobBody, response: Response):
+    return _submit('train', {'ticker': _clean_ticker(body.ticker)}, response)
+
+
+@app.post('/api/v1/jobs/backtest')
+def submit_backtest(body: BacktestJobBody, response: Response):
+    return _submit('backtest', {'ticker': _clean_ticker(body.ticker), 'model': (body.model or 'rf').lower(),
+                                'mode': body.mode}, response)
+
+
+@app.get('/api/v1/jobs')
+def list_jobs(kind: str | None = None, status: str | None = None, limit: int = 50):
+    return {'jobs': job_manager().list(kind=kind, status=status, limit=min(max(limit, 1), 500))}
+
+
+@app.get('/api/v1/jobs/{job_id}')
+def job_status(job_id: str):
+    job = _get_job(job_id)
+    job.pop('result', None)
+    return job
+
+
+@app.get('/api/v1/jobs/{job_id}/progress')
+def job_progress(job_id: str):
+    job = _get_job(job_id)
+    return {'id': job['id'], 'status': job['status'], 'progress': job['progress'], 'message': job['message']}
+
+
+@app.get('/api/v1/jobs/{job_id}/result')
+def job_result(job_id: str):
+    job = _get_job(job_id)
+    if job['status'] not in FINISHED:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    if job['status'] == CANCELLED:
+        raise HTTPException(status_code=410, detail='Job was cancelled')
+    if job['status'] != SUCCEEDED:
+        raise HTTPException(status_code=500, detail=job['error'] or 'Job failed')
+    return {'status': 'success', 'data': job['result']}
+
+
+@app.post('/api/v1/jobs/{job_id}/cancel')
+def cancel_job(job_id: str):
+    _get_job(job_id)
+    return job_manager().cancel(job_id)
 
 
 @app.post('/api/v1/predict')
-async def predict(body: PredictBody):
+async def predict(body: PredictBody, request: Request, response: Response):
     ticker = body.ticker.upper().strip()
     if not ticker.isalnum():
         raise HTTPException(status_code=400, detail='Invalid ticker')
     model_choice = (body.model or 'rf').lower()
     if model_choice not in {'rf', 'lstm', 'lstm_tuned', 'xgb', 'arima', 'transformer', 'ensemble'}:
         raise HTTPException(status_code=400, detail='Invalid model; choose rf, lstm, lstm_tuned, xgb, arima, transformer, or ensemble')
-    try:
-        if model_choice == 'lstm':
-            out = await asyncio.wait_for(asyncio.to_thread(predict_stock_lstm, ticker, body.days), timeout=120.0)
-        elif model_choice == 'lstm_tuned':
-            out = await asyncio.wait_for(asyncio.to_thread(predict_stock_lstm_tuned, ticker, body.days), timeout=300.0)
-        elif model_choice == 'xgb':
-            out = await asyncio.wait_for(asyncio.to_thread(predict_stock_xgb, ticker, body.days), timeout=60.0)
-        elif model_choice == 'arima':
-            out = await asyncio.wait_for(asyncio.to_thread(predict_stock_arima, ticker, body.days), timeout=60.0)
-        elif model_choice == 'transformer':
-            out = await asyncio.wait_for(asyncio.to_thread(predict_stock_transformer, ticker, body.days), timeout=120.0)
-        elif model_choice == 'ensemble':
-            out = await asyncio.wait_for(asyncio.to_thread(predict_stock_ensemble, ticker, body.days), timeout=180.0)
-        else:
-            out = await asyncio.wait_for(asyncio.to_thread(predict_stock, ticker, body.days), timeout=30.0)
-    except FileNotFoundError:
-        raise HTTPException(status_code=503, detail='Model not found')
-    except asyncio.TimeoutError:
-        raise HTTPException(status_code=504, detail='Prediction timed out')
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    fn, timeout = _predictor(model_choice)
+    profile_mode = _requested_profile_mode(request)
+    profile_info: dict = {}
+    if profile_mode:
+        fn = profiled(fn, f'predict_{model_choice}_{ticker}', profile_info, mode=profile_mode)
+    PREDICTIONS_IN_FLIGHT.inc(model=model_choice)
+    status = 'error'
+    # The worker thread inherits this scope's token: it stops at its next checkpoint once the
+    # deadline passes, and the finally below cancels it when the request ends early (timeout or disconnect)
+    with cancel_scope(timeout) as token:
+        try:
+            with span(f'model_{model_choice}'):
+                if ADMISSION_ENABLED:
+                    out = await ADMISSION.lane(model_choice).run(fn, ticker, body.days, timeout=timeout)
+                else:
+                    out = await asyncio.wait_for(asyncio.to_thread(fn, ticker, body.days), timeout=timeout)
+            status = 'ok'
+        except Overloaded as e:
+            status = 'rejected'
+            raise HTTPException(status_code=429, detail=str(e), headers={'Retry-After': str(e.retry_after)})
+        except FileNotFoundError:
+            status = 'not_found'
+            raise HTTPException(status_code=503, detail='Model not found')
+        except (asyncio.TimeoutError, Cancelled):
+            status = 'timeout'
+            PREDICTION_TIMEOUTS.inc(model=model_choice)
+            raise HTTPException(status_code=504, detail='Prediction timed out')
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            token.cancel()
+            PREDICTIONS_IN_FLIGHT.dec(model=model_choice)
+            PREDICTIONS.inc(model=model_choice, status=status)
+    if profile_info.get('path'):
+        response.headers['X-Profile-Path'] = profile_info['path']
     return out
 
 
 @app.get('/api/v1/stocks/{ticker}/predict')
-async def predict_get(ticker: str, days: int = 30, model: str = 'rf'):
+async def predict_get(request: Request, response: Response, ticker: str, days: int = 30, model: str = 'rf'):
     body = PredictBody(ticker=ticker, days=days, model=model)
-    return await predict(body)
+    return await predict(body, request, response)
 
 
 @app.get('/api/v1/stocks/{ticker}/backtest')
-def backtest(ticker: str, model: str = 'rf', mode: str = 'static'):
+def backtest(request: Request, response: Response, ticker: str, model: str = 'rf', mode: str = 'static'):
     t = ticker.upper().strip()
     m = (model or 'rf').lower()
     if not t.isalnum():
         raise HTTPException(status_code=400, detail='Invalid ticker')
+    profile_mode = _requested_profile_mode(request)
+    try:
+        with cancel_scope(BACKTEST_TIMEOUT):
+            if profile_mode:
+                # Sync endpoints already run on a worker thread, so profile in place
+                with profile(f'backtest_{m}_{t}', mode=profile_mode) as info:
+                    result = _run_backtest(t, m, mode)
+                response.headers['X-Profile-Path'] = info['path']
+                return result
+            return _run_backtest(t, m, mode)
+    except Cancelled:
+        raise HTTPException(status_code=504, detail='Backtest timed out')
+
+
+def _run_backtest(t: str, m: str, mode: str):
     try:
         if m in {'rf', 'random_forest'}:
             if mode == 'walk':
@@ -319,5 +701,7 @@ def backtest(ticker: str, model: str = 'rf', mode: str = 'static'):
         return {'status': 'success', 'data': out}
     except FileNotFoundError:
         raise HTTPException(status_code=503, detail='Model not found')
+    except Cancelled:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,100 @@
+"""
+Cooperative cancellation and deadlines for model work running on worker threads.
+
+A CancelToken carries an optional deadline and a cancelled flag. The API opens a
+cancel_scope around each call; the token lives in a context variable, so it follows the
+call into executor threads (asyncio.to_thread and the admission lanes copy the context).
+Long-running code calls checkpoint() at natural boundaries (an autoregressive step, a
+walk-forward fold, a training epoch or batch), which raises Cancelled once the request
+timed out or was cancelled, so abandoned work stops instead of running to completion.
+
+Scopes nest: an inner scope's token is cancelled with its parent and its deadline is
+the earlier of the two.
+"""
+from __future__ import annotations
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+
+class Cancelled(Exception):
+    """The work's token was cancelled."""
+
+
+class DeadlineExceeded(Cancelled):
+    """The work ran past its deadline."""
+
+
+class CancelToken:
+    def __init__(self, timeout: Optional[float] = None, parent: Optional['CancelToken'] = None):
+        self.parent = parent
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        if parent is not None and parent.deadline is not None:
+            deadline = parent.deadline if deadline is None else min(deadline, parent.deadline)
+        self.deadline = deadline
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (None without one)."""
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    def check(self) -> None:
+        if self.cancelled:
+            raise Cancelled('Operation cancelled')
+        if self.expired:
+            raise DeadlineExceeded('Operation deadline exceeded')
+
+
+_current: ContextVar[Optional[CancelToken]] = ContextVar('cancel_token', default=None)
+
+
+def current_token() -> Optional[CancelToken]:
+    return _current.get()
+
+
+def checkpoint() -> None:
+    """Raise Cancelled/DeadlineExceeded if the current scope's token says to stop; no-op outside a scope."""
+    token = _current.get()
+    if token is not None:
+        token.check()
+
+
+@contextmanager
+def cancel_scope(timeout: Optional[float] = None, token: Optional[CancelToken] = None) -> Iterator[CancelToken]:
+    """Make `token` (or a new child of the current token with `timeout`) current for the block."""
+    token = token or CancelToken(timeout, parent=_current.get())
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+
+
+def keras_callbacks() -> List:
+    """[callback] that stops Keras fit()/predict() at the next batch once the current token fires; [] outside a scope."""
+    token = _current.get()
+    if token is None:
+        return []
+    from tensorflow.keras.callbacks import Callback
+
+    class _CancelCallback(Callback):
+        def on_train_batch_end(self, batch, logs=None):
+            token.check()
+
+        def on_predict_batch_end(self, batch, logs=None):
+            token.check()
+
+    return [_CancelCallback()]
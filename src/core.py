@@ -1,7 +1,8 @@
 from __future__ import annotations
+import copy
 import os
-import json
-import time
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, Tuple, List, Optional
@@ -14,6 +15,13 @@ from sklearn.metrics import mean_squared_error, mean_absolute_error
 from sklearn.preprocessing import StandardScaler
 import joblib
 
+from .cancellation import checkpoint
+from .metrics import span, record_cache
+from .fast_forest import compile_forest
+from .fingerprint import data_fingerprint as _data_fingerprint
+from .jobs import report_progress
+from .report_store import get_store
+
 try:
     import yfinance as yf
 except Exception:
@@ -26,6 +34,23 @@ REPORTS_DIR = os.path.join(ROOT, 'reports')
 os.makedirs(MODELS_DIR, exist_ok=True)
 os.makedirs(REPORTS_DIR, exist_ok=True)
 
+# Loaded model bundles keyed by path; entries are invalidated when the file changes.
+MODEL_CACHE_SIZE = int(os.getenv('MODEL_CACHE_SIZE', '16'))
+_MODEL_CACHE: 'OrderedDict[str, Tuple[float, Dict]]' = OrderedDict()
+_MODEL_CACHE_LOCK = threading.Lock()
+# Serve RF predictions from a CompiledForest built once per loaded bundle (bit-identical to sklearn).
+FAST_FOREST = os.getenv('FAST_FOREST', '1').lower() in ('1', 'true', 'yes')
+# Evaluation results keyed by (ticker, bundle created_at, data fingerprint, mode); recomputed only when one changes.
+EVAL_CACHE_SIZE = int(os.getenv('EVAL_CACHE_SIZE', '64'))
+_EVAL_CACHE: 'OrderedDict[Tuple, Dict]' = OrderedDict()
+_EVAL_CACHE_LOCK = threading.Lock()
+# RF forecast trajectories keyed by (ticker, bundle created_at, data fingerprint). Each entry holds the longest
+# horizon computed so far and the autoregressive state after it: shorter horizons are served as a prefix and
+# longer ones resume the rollout from where it stopped.
+FORECAST_CACHE_SIZE = int(os.getenv('FORECAST_CACHE_SIZE', '64'))
+_FORECAST_CACHE: 'OrderedDict[Tuple, Dict]' = OrderedDict()
+_FORECAST_CACHE_LOCK = threading.Lock()
+
 
 def _rsi(series: pd.Series, window: int = 14) -> pd.Series:
     delta = series.diff()
@@ -79,6 +104,7 @@ def _obv(close: pd.Series, volume: pd.Series) -> pd.Series:
     return (direction * volume).cumsum().fillna(0)
 
 
+@span('feature_engineer')
 def _feature_engineer(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     close = df['Close']
@@ -136,6 +162,7 @@ def _latest_feature_row(close_series: pd.Series) -> pd.Series:
     return pd.Series(row)
 
 
+@span('load_data')
 def _load_data(ticker: str, csv_path: Optional[str] = None, period: str = '2y', interval: str = '1d') -> pd.DataFrame:
     # Preferred: provided CSV
     if csv_path and os.path.exists(csv_path):
@@ -189,8 +216,13 @@ def train_model(ticker: str, csv_path: Optional[str] = None) -> TrainResult:
     X_val_s = scaler.transform(X_val)
     X_test_s = scaler.transform(X_test)
 
+    checkpoint()
+    report_progress(0.2, 'fitting')
     model = RandomForestRegressor(n_estimators=400, random_state=42, n_jobs=-1)
     model.fit(np.vstack([X_train_s, X_val_s]), pd.concat([y_train, y_val]))
+    # A cancelled or expired request must not leave a new model behind
+    checkpoint()
+    report_progress(0.9, 'evaluating')
 
     preds = model.predict(X_test_s)
     rmse = float(np.sqrt(mean_squared_error(y_test, preds)))
@@ -214,6 +246,7 @@ def train_model(ticker: str, csv_path: Optional[str] = None) -> TrainResult:
     return TrainResult(model_path=model_path, metrics=bundle['metrics'], feature_columns=features, ticker=ticker, timestamp=ts)
 
 
+@span('load_latest_model')
 def _load_latest_model(ticker: str) -> Dict:
     if not os.path.isdir(MODELS_DIR):
         raise FileNotFoundError('Models directory not found')
@@ -221,47 +254,118 @@ def _load_latest_model(ticker: str) -> Dict:
     if not candidates:
         raise FileNotFoundError('No model found for ticker')
     latest = sorted(candidates)[-1]
-    return joblib.load(os.path.join(MODELS_DIR, latest))
-
-
-def predict_stock(ticker: str, prediction_days: int = 30) -> Dict:
-    bundle = _load_latest_model(ticker)
+    path = os.path.join(MODELS_DIR, latest)
+    mtime = os.path.getmtime(path)
+    with _MODEL_CACHE_LOCK:
+        cached = _MODEL_CACHE.get(path)
+        if cached is not None and cached[0] == mtime:
+            _MODEL_CACHE.move_to_end(path)
+            record_cache('model', True)
+            return cached[1]
+    record_cache('model', False)
+    bundle = joblib.load(path)
+    if FAST_FOREST and isinstance(bundle, dict):
+        bundle['compiled'] = compile_forest(bundle.get('model'))
+    with _MODEL_CACHE_LOCK:
+        _MODEL_CACHE[path] = (mtime, bundle)
+        _MODEL_CACHE.move_to_end(path)
+        while len(_MODEL_CACHE) > MODEL_CACHE_SIZE:
+            _MODEL_CACHE.popitem(last=False)
+    return bundle
+
+
+def _bundle_predict(bundle: Dict, X: np.ndarray) -> np.ndarray:
+    compiled = bundle.get('compiled')
+    if compiled is not None:
+        return compiled.predict(X)
+    return bundle['model'].predict(X)
+
+
+def _rollout(bundle: Dict, state: Dict, steps: int) -> Dict:
+    """Advance an autoregressive RF forecast by `steps` days; returns a new state and leaves `state` untouched."""
     features = bundle['features']
     scaler: StandardScaler = bundle['scaler']
-    model: RandomForestRegressor = bundle['model']
-
-    df = _load_data(ticker)
-    fe = _feature_engineer(df)
-    if fe.empty:
-        raise RuntimeError('Insufficient engineered data for prediction')
-    X = fe[features]
-    Xs = scaler.transform(X)
-    # For a tree-based model, produce next-day predictions autoregressively using latest features
-    last_idx = fe.index[-1]
-    preds: List[float] = []
-    intervals: List[List[float]] = []
-    # current close is the last actual close in df
-    last_close = float(df['Close'].iloc[-1])
-    close_series = df['Close'].copy()
-    for _ in range(prediction_days):
+    preds = list(state['preds'])
+    intervals = list(state['intervals'])
+    close_series = state['close_series'].copy()
+    x_last = state['x_last']
+    last_idx = state['last_idx']
+    # derive naive 95% CI from train RMSE (if available)
+    ci = 1.96 * float(bundle['metrics'].get('rmse', 0.0))
+    for _ in range(steps):
+        # Stop between steps once the request's deadline passed or it was cancelled
+        checkpoint()
         # Use last available feature row to predict next close
-        next_price = float(model.predict(Xs[-1:])[0])
+        next_price = float(_bundle_predict(bundle, x_last)[0])
         preds.append(next_price)
-        # derive naive 95% CI from train RMSE (if available)
-        rmse = float(bundle['metrics'].get('rmse', 0.0))
-        ci = 1.96 * rmse
         intervals.append([float(next_price - ci), float(next_price + ci)])
         # Append predicted close and compute latest feature row without requiring Target
         next_idx = last_idx + pd.Timedelta(days=1)
         close_series.loc[next_idx] = next_price
         latest_row = _latest_feature_row(close_series)
-        # Construct next feature matrix by appending transformed latest_row
-        X_new = latest_row[features].to_frame().T
-        X_new_s = scaler.transform(X_new)
-        Xs = np.vstack([Xs, X_new_s])
-        # Advance state
-        last_close = next_price
+        x_last = scaler.transform(latest_row[features].to_frame().T)
         last_idx = next_idx
+    return {**state, 'preds': preds, 'intervals': intervals, 'close_series': close_series,
+            'x_last': x_last, 'last_idx': last_idx}
+
+
+def _forecast_cache_get(key: Tuple) -> Optional[Dict]:
+    with _FORECAST_CACHE_LOCK:
+        state = _FORECAST_CACHE.get(key)
+        if state is not None:
+            _FORECAST_CACHE.move_to_end(key)
+        return state
+
+
+def _forecast_cache_put(key: Tuple, state: Dict) -> None:
+    # States are never mutated once cached, so concurrent readers can share them
+    with _FORECAST_CACHE_LOCK:
+        current = _FORECAST_CACHE.get(key)
+        if current is None or len(current['preds']) < len(state['preds']):
+            _FORECAST_CACHE[key] = state
+        _FORECAST_CACHE.move_to_end(key)
+        while len(_FORECAST_CACHE) > FORECAST_CACHE_SIZE:
+            _FORECAST_CACHE.popitem(last=False)
+
+
+def clear_forecast_cache() -> None:
+    with _FORECAST_CACHE_LOCK:
+        _FORECAST_CACHE.clear()
+
+
+@span('predict_stock')
+def predict_stock(ticker: str, prediction_days: int = 30, df: Optional[pd.DataFrame] = None,
+                  fe: Optional[pd.DataFrame] = None) -> Dict:
+    """`df` (prices) and `fe` (its engineered features) may be passed in when already computed, e.g. by the ensemble."""
+    bundle = _load_latest_model(ticker)
+    if df is None:
+        df = _load_data(ticker)
+    # The fingerprint covers the data's as-of date and any restated bars
+    key = (ticker, bundle['created_at'], _data_fingerprint(df))
+    state = _forecast_cache_get(key)
+    record_cache('forecast', state is not None and len(state['preds']) >= prediction_days)
+    if state is None:
+        if fe is None:
+            fe = _feature_engineer(df)
+        if fe.empty:
+            raise RuntimeError('Insufficient engineered data for prediction')
+        # For a tree-based model, produce next-day predictions autoregressively using latest features
+        state = {
+            'preds': [],
+            'intervals': [],
+            'close_series': df['Close'].copy(),
+            'x_last': bundle['scaler'].transform(fe[bundle['features']].iloc[-1:]),
+            'last_idx': fe.index[-1],
+            'close_mean': float(np.mean(fe['Close'])),
+        }
+    if len(state['preds']) < prediction_days:
+        with span('inference'):
+            state = _rollout(bundle, state, prediction_days - len(state['preds']))
+        _forecast_cache_put(key, state)
+    preds = state['preds'][:prediction_days]
+    intervals = [list(iv) for iv in state['intervals'][:prediction_days]]
+    # Reported as the last forecast close (the actual last close when no steps were requested)
+    last_close = preds[-1] if preds else float(df['Close'].iloc[-1])
 
     # Compute simple indicators on the latest real close
     as_of_dt = df.index[-1]
@@ -276,7 +380,7 @@ def predict_stock(ticker: str, prediction_days: int = 30) -> Dict:
         'ticker': ticker,
         'predictions': preds,
         'intervals': intervals,
-        'confidence': float(np.clip(1.0 - (bundle['metrics']['rmse'] / (np.mean(fe['Close']) or 1)), 0, 1)),
+        'confidence': float(np.clip(1.0 - (bundle['metrics']['rmse'] / (state['close_mean'] or 1)), 0, 1)),
         'model_version': f"v1.0_{bundle['created_at']}",
         'timestamp': datetime.utcnow().isoformat(),
         'as_of': as_of_dt.isoformat(),
@@ -287,13 +391,48 @@ def predict_stock(ticker: str, prediction_days: int = 30) -> Dict:
     }
 
 
+def _eval_cache_get(key: Tuple, report_key: Optional[str] = None) -> Optional[Dict]:
+    with _EVAL_CACHE_LOCK:
+        out = _EVAL_CACHE.get(key)
+        if out is not None:
+            _EVAL_CACHE.move_to_end(key)
+    if out is None and report_key:
+        # Report stored by an earlier process for the same model and data
+        out = get_store(REPORTS_DIR).get(report_key)
+        if out is not None:
+            _eval_cache_put(key, out)
+    record_cache('evaluation', out is not None)
+    return copy.deepcopy(out) if out is not None else None
+
+
+def _eval_cache_put(key: Tuple, out: Dict) -> None:
+    with _EVAL_CACHE_LOCK:
+        _EVAL_CACHE[key] = copy.deepcopy(out)
+        _EVAL_CACHE.move_to_end(key)
+        while len(_EVAL_CACHE) > EVAL_CACHE_SIZE:
+            _EVAL_CACHE.popitem(last=False)
+
+
+def clear_eval_cache() -> None:
+    with _EVAL_CACHE_LOCK:
+        _EVAL_CACHE.clear()
+
+
 def evaluate_model(ticker: str) -> Dict:
     bundle = _load_latest_model(ticker)
     features = bundle['features']
     scaler: StandardScaler = bundle['scaler']
-    model: RandomForestRegressor = bundle['model']
 
     df = _load_data(ticker)
+    fingerprint = _data_fingerprint(df)
+    key = (ticker, bundle['created_at'], fingerprint, 'static')
+    # One stored report per (model, data): repeat evaluations reuse it instead of appending another
+    report_key = f"metrics_{ticker}_{bundle['created_at']}_{fingerprint}"
+    cached = _eval_cache_get(key, report_key)
+    if cached is not None:
+        return cached
+
+    checkpoint()
     fe = _feature_engineer(df)
     X = fe[features]
     y = fe['Target']
@@ -308,15 +447,15 @@ def evaluate_model(ticker: str) -> Dict:
     X_train_s = scaler.transform(X_train)
     X_val_s = scaler.transform(X_val)
     X_test_s = scaler.transform(X_test)
-    preds = model.predict(X_test_s)
+    preds = _bundle_predict(bundle, X_test_s)
 
     rmse = float(np.sqrt(mean_squared_error(y_test, preds)))
     mae = float(mean_absolute_error(y_test, preds))
     da = float(np.mean(np.sign(np.diff(y_test.values)) == np.sign(np.diff(preds)))) if len(y_test) > 1 else 0.0
 
     # Baseline: previous-day close (naive) and SMA-5
-    baseline_naive = y_test.shift(1).fillna(method='bfill').values
-    baseline_sma = fe['Close'].rolling(5).mean().shift(1).iloc[val_end:].fillna(method='bfill').values
+    baseline_naive = y_test.shift(1).bfill().values
+    baseline_sma = fe['Close'].rolling(5).mean().shift(1).iloc[val_end:].bfill().values
     def _m(y_true, y_hat):
         return {
             'rmse': float(np.sqrt(mean_squared_error(y_true, y_hat)) ),
@@ -333,11 +472,12 @@ def evaluate_model(ticker: str) -> Dict:
             'sma5': base_sma_m,
         },
         'trained_on': bundle['created_at'],
+        'data_hash': fingerprint,
         'timestamp': datetime.utcnow().isoformat(),
     }
-    report_path = os.path.join(REPORTS_DIR, f"metrics_{ticker}_{int(time.time())}.json")
-    with open(report_path, 'w') as f:
-        json.dump(out, f, indent=2)
+    get_store(REPORTS_DIR).append('metrics', out, ticker=ticker, model='rf', model_version=bundle['created_at'],
+                                  key=report_key)
+    _eval_cache_put(key, out)
     return out
 
 
@@ -346,6 +486,12 @@ def evaluate_model_walkforward(ticker: str, steps: int = 60) -> Dict:
     Expanding window retraining each day to avoid lookahead bias.
     """
     df = _load_data(ticker)
+    # Retrains from scratch on the data alone, so only the data and step count key the result
+    fingerprint = _data_fingerprint(df)
+    key = (ticker, None, fingerprint, f'walk:{steps}')
+    cached = _eval_cache_get(key)
+    if cached is not None:
+        return cached
     fe = _feature_engineer(df)
     features = ['Return', 'SMA_5', 'SMA_20', 'EMA_12', 'EMA_26', 'MACD', 'MACD_Signal', 'RSI_14', 'Close_t']
     X = fe[features]
@@ -358,6 +504,7 @@ def evaluate_model_walkforward(ticker: str, steps: int = 60) -> Dict:
     preds = []
     truth = []
     for i in range(start, n):
+        checkpoint()
         X_train, y_train = X.iloc[:i], y.iloc[:i]
         X_test_row = X.iloc[i:i+1]
         y_test_row = y.iloc[i]
@@ -369,6 +516,7 @@ def evaluate_model_walkforward(ticker: str, steps: int = 60) -> Dict:
         y_hat = float(model.predict(X_te)[0])
         preds.append(y_hat)
         truth.append(float(y_test_row))
+        report_progress((i - start + 1) / steps, f'step {i - start + 1}/{steps}')
     preds = np.array(preds)
     truth = np.array(truth)
     from sklearn.metrics import mean_squared_error, mean_absolute_error
@@ -391,7 +539,9 @@ def evaluate_model_walkforward(ticker: str, steps: int = 60) -> Dict:
             'naive': _m(truth, y_naive),
             'sma5': _m(truth, sma5),
         },
+        'data_hash': fingerprint,
         'timestamp': datetime.utcnow().isoformat(),
         'mode': 'walk-forward'
     }
+    _eval_cache_put(key, out)
     return out
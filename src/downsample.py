@@ -0,0 +1,82 @@
+"""
+Downsampling of price series for charts.
+
+A chart a few hundred pixels wide cannot show thousands of daily bars, so the history
+endpoint can reduce a series to about `points` rows before encoding it:
+
+- ohlc: split the bars into `points` contiguous buckets and merge each into one candle
+  (first open, highest high, lowest low, last close, summed volume), so every price
+  extreme survives.
+- lttb: Largest-Triangle-Three-Buckets; keep the one real bar per bucket that best
+  preserves the visual shape of the close line (first and last bars are always kept).
+
+Both return, for every output row, the first and last source row of its bucket. Bucket
+edges, aggregates and triangle areas are computed with NumPy; LTTB's only Python loop is
+over buckets, because each pick depends on the bar picked in the bucket before it.
+"""
+from __future__ import annotations
+from typing import Optional, Tuple
+
+import numpy as np
+
+METHODS = ('ohlc', 'lttb')
+
+
+def bucket_edges(n: int, buckets: int) -> np.ndarray:
+    """`buckets + 1` increasing row offsets splitting n rows into near-equal contiguous buckets (n > buckets)."""
+    return np.linspace(0, n, buckets + 1).round().astype(np.int64)
+
+
+def ohlc(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: Optional[np.ndarray],
+         points: int) -> Tuple[np.ndarray, ...]:
+    """
+    Merge bars into `points` candles.
+
+    Returns:
+        (first row, last row, open, high, low, close, volume) per bucket; volume is None when not given
+    """
+    n = len(close)
+    if n <= points:
+        rows = np.arange(n)
+        return rows, rows, open_, high, low, close, volume
+    edges = bucket_edges(n, points)
+    starts, ends = edges[:-1], edges[1:] - 1
+    vol = np.add.reduceat(np.nan_to_num(volume), starts) if volume is not None else None
+    return (starts, ends, open_[starts], np.maximum.reduceat(high, starts), np.minimum.reduceat(low, starts),
+            close[ends], vol)
+
+
+def lttb(y: np.ndarray, points: int, x: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pick `points` rows of y (at positions x, default 0..n-1) with Largest-Triangle-Three-Buckets.
+
+    Returns:
+        (selected rows, first row of each one's bucket, last row of each one's bucket)
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= points or points < 3:
+        rows = np.arange(n)
+        return rows, rows, rows
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+    # Interior rows 1..n-2 go into points-2 buckets; the first and last rows are buckets of their own
+    edges = 1 + bucket_edges(n - 2, points - 2)
+    counts = np.diff(edges)
+    cx = np.concatenate([[0.0], np.cumsum(x)])
+    cy = np.concatenate([[0.0], np.cumsum(y)])
+    avg_x = (cx[edges[1:]] - cx[edges[:-1]]) / counts
+    avg_y = (cy[edges[1:]] - cy[edges[:-1]]) / counts
+    # Third triangle vertex for bucket i: the mean of bucket i+1 (the last row for the final bucket)
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    starts = np.concatenate([[0], edges[:-1], [n - 1]])
+    ends = np.concatenate([[0], edges[1:] - 1, [n - 1]])
+    return selected, starts, ends
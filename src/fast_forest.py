@@ -0,0 +1,75 @@
+"""
+Compiled RandomForest inference.
+
+RandomForestRegressor.predict dispatches one joblib task per tree, which costs far
+more than the traversal itself when predicting a single row, as the autoregressive
+loop in predict_stock does hundreds of times per request. CompiledForest flattens
+every tree into shared node arrays and walks all trees for a batch of rows at once
+with NumPy indexing.
+
+Results are bit-identical to sklearn: inputs are cast to float32 and compared
+against the float64 thresholds exactly as the Cython tree does, and per-tree
+outputs are summed in estimator order (np.cumsum is a sequential reduction)
+before dividing by the number of trees, matching predict with n_jobs=1.
+"""
+from __future__ import annotations
+from typing import Optional
+
+import numpy as np
+
+
+class CompiledForest:
+    """Flattened, vectorized view of a fitted single-output RandomForestRegressor."""
+
+    def __init__(self, model, max_batch: int = 256):
+        trees = [est.tree_ for est in model.estimators_]
+        if not trees:
+            raise ValueError('Forest has no fitted estimators')
+        if any(t.n_outputs != 1 for t in trees):
+            raise ValueError('Only single-output forests can be compiled')
+        sizes = np.array([t.node_count for t in trees])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        left = np.concatenate([t.children_left + o for t, o in zip(trees, offsets)])
+        right = np.concatenate([t.children_right + o for t, o in zip(trees, offsets)])
+        leaf = np.concatenate([t.children_left == -1 for t in trees])
+        # Leaves point at themselves, so every row can take the same number of steps
+        nodes = np.arange(len(leaf))
+        self.left = np.where(leaf, nodes, left).astype(np.intp)
+        self.right = np.where(leaf, nodes, right).astype(np.intp)
+        self.feature = np.where(leaf, 0, np.concatenate([t.feature for t in trees])).astype(np.intp)
+        self.threshold = np.concatenate([t.threshold for t in trees]).astype(np.float64)
+        self.value = np.concatenate([t.value[:, 0, 0] for t in trees]).astype(np.float64)
+        self.roots = offsets.astype(np.intp)
+        self.depth = int(max(t.max_depth for t in trees))
+        self.n_trees = len(trees)
+        self.n_features = int(model.n_features_in_)
+        self.max_batch = max_batch
+        self._model = model
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f'X has {X.shape[1]} features, but the forest expects {self.n_features}')
+        if np.isnan(X).any():
+            # Missing-value routing is learned per node; leave it to sklearn
+            return self._model.predict(X)
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), self.max_batch):
+            xb = X[start:start + self.max_batch]
+            rows = np.arange(len(xb))[:, None]
+            node = np.broadcast_to(self.roots, (len(xb), self.n_trees))
+            for _ in range(self.depth):
+                go_left = xb[rows, self.feature[node]] <= self.threshold[node]
+                node = np.where(go_left, self.left[node], self.right[node])
+            out[start:start + len(xb)] = np.cumsum(self.value[node], axis=1)[:, -1] / self.n_trees
+        return out
+
+
+def compile_forest(model) -> Optional[CompiledForest]:
+    """CompiledForest for `model`, or None when it is not a fitted single-output forest."""
+    try:
+        return CompiledForest(model)
+    except (AttributeError, ValueError):
+        return None
@@ -0,0 +1,19 @@
+"""
+Content fingerprints of price frames.
+
+Evaluation, forecast, ARIMA-state and chart-history caches all key on the same hash of the
+data they were built from, so a restated bar invalidates every one of them. This module has
+no model dependencies, so the API can use it when the model backends are stubbed out.
+"""
+from __future__ import annotations
+import hashlib
+
+import pandas as pd
+
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of a price frame (index, columns and values)."""
+    h = hashlib.sha256('|'.join(map(str, df.columns)).encode())
+    if len(df.columns):
+        h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()[:16]
@@ -0,0 +1,344 @@
+"""
+Background jobs for long-running work (tuning, training, backtests).
+
+Submitting a job stores it in SQLite and queues it on a bounded thread pool for its
+kind, so a slow tune cannot starve backtests and no HTTP request is held open while the
+work runs. Handlers report progress through a JobContext and check it for cancellation.
+Each running handler also executes inside a cancel_scope (src/cancellation.py), so
+cancelling a job stops it at the next checkpoint in the model code too, not only at the
+handler's own progress calls. Model code deeper down (walk-forward steps, ensemble
+members, tuning trials) reports progress with report_progress(), which finds the running
+job through a context variable and is a no-op outside jobs.
+
+Jobs survive restarts: on start-up, pending jobs are queued again. Several API workers can
+share one JOBS_DB: a worker that claims a job records itself as the owner and refreshes a
+heartbeat while it runs, and a running job is only queued again once its heartbeat is
+older than JOBS_LEASE_SEC, i.e. its owner died. Live workers check for such jobs in the
+background as well as at start-up.
+Submitting a job identical (same kind and params) to one that is still pending or
+running returns the existing job instead of queueing a duplicate.
+"""
+from __future__ import annotations
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cancellation import CancelToken, Cancelled, DeadlineExceeded, cancel_scope
+from .metrics import JOBS, JOBS_RUNNING
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+JOBS_DB = os.getenv('JOBS_DB', os.path.join(ROOT, 'reports', 'jobs.sqlite3'))
+# A running job whose owner has not refreshed its heartbeat for this long is reclaimed
+JOBS_LEASE_SEC = float(os.getenv('JOBS_LEASE_SEC', '60'))
+
+PENDING, RUNNING, SUCCEEDED, FAILED, CANCELLED = 'pending', 'running', 'succeeded', 'failed', 'cancelled'
+ACTIVE = (PENDING, RUNNING)
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    dedup_key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner TEXT,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (dedup_key, status);
+"""
+
+Handler = Callable[[Dict[str, Any], 'JobContext'], Any]
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler once cancellation of its job has been requested."""
+
+
+class JobContext:
+    """Handed to a running handler: report progress and poll for cancellation."""
+
+    def __init__(self, manager: 'JobManager', job_id: str):
+        self.manager = manager
+        self.job_id = job_id
+
+    @property
+    def cancelled(self) -> bool:
+        token = self.manager._tokens.get(self.job_id)
+        return (token is not None and token.cancelled) or self.manager._cancel_requested(self.job_id)
+
+    def check(self) -> None:
+        if self.cancelled:
+            raise JobCancelled(self.job_id)
+
+    def progress(self, fraction: float, message: Optional[str] = None) -> None:
+        """Record progress in [0, 1]; also raises JobCancelled if the job was cancelled meanwhile."""
+        self.manager._update(self.job_id, progress=min(max(float(fraction), 0.0), 1.0), message=message)
+        self.check()
+
+
+# Context of the job running in this thread; threads the job starts inherit it with the rest of the context
+_CURRENT_JOB: contextvars.ContextVar[Optional[JobContext]] = contextvars.ContextVar('current_job', default=None)
+
+
+def report_progress(fraction: float, message: Optional[str] = None) -> None:
+    """
+    Record progress in [0, 1] for the job running in this context; does nothing outside a job.
+
+    Unlike JobContext.progress this never raises: if the job was cancelled, possibly from
+    another process, its cancel token is cancelled and the work stops at its next checkpoint.
+    """
+    ctx = _CURRENT_JOB.get()
+    if ctx is None:
+        return
+    fields: Dict[str, Any] = {'progress': min(max(float(fraction), 0.0), 1.0)}
+    if message is not None:
+        fields['message'] = message
+    ctx.manager._update(ctx.job_id, **fields)
+    if ctx.manager._cancel_requested(ctx.job_id):
+        token = ctx.manager._tokens.get(ctx.job_id)
+        if token is not None:
+            token.cancel()
+
+
+def dedup_key(kind: str, params: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps([kind, params], sort_keys=True, default=str).encode()).hexdigest()[:24]
+
+
+class JobManager:
+    """SQLite-backed job queue with one bounded worker pool per job kind."""
+
+    def __init__(self, db_path: str = JOBS_DB):
+        self.db_path = db_path
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        if db_path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(_SCHEMA)
+        columns = {r['name'] for r in self._conn.execute('PRAGMA table_info(jobs)')}
+        for name, decl in (('owner', 'TEXT'), ('heartbeat_at', 'REAL')):
+            if name not in columns:  # databases created before leases existed
+                self._conn.execute(f'ALTER TABLE jobs ADD COLUMN {name} {decl}')
+        # Identifies this process's claims among all workers sharing the database
+        self.owner = uuid.uuid4().hex
+        self._handlers: Dict[str, Tuple[Handler, int]] = {}
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        # Cancel tokens of the jobs running in this process
+        self._tokens: Dict[str, CancelToken] = {}
+        self._started = False
+        self._stop = threading.Event()
+
+    # ---------------------------- registration ----------------------------
+
+    def register(self, kind: str, handler: Handler, workers: int = 1) -> None:
+        """Register the handler for a job kind; at most `workers` jobs of that kind run at once."""
+        self._handlers[kind] = (handler, max(1, int(os.getenv(f'JOBS_{kind.upper()}_WORKERS', workers))))
+
+    def start(self) -> int:
+        """Queue pending jobs and running jobs whose owner died; returns how many were resumed."""
+        with self._lock:
+            if self._started:
+                return 0
+            self._started = True
+            self._reclaim_stale()
+            rows = self._conn.execute(
+                'SELECT id, kind FROM jobs WHERE status=? ORDER BY created_at', (PENDING,)).fetchall()
+        threading.Thread(target=self._heartbeat_loop, name='job-heartbeat', daemon=True).start()
+        return self._resume(rows)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._stop.set()
+        for pool in list(self._pools.values()):
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+        self._pools.clear()
+
+    # ------------------------------- public --------------------------------
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> Tuple[Dict, bool]:
+        """
+        Queue a job, or return the identical pending/running one.
+
+        Returns:
+            (job, created) where created is False when an existing job was reused
+        """
+        if kind not in self._handlers:
+            raise KeyError(f"Unknown job kind '{kind}'")
+        self.start()
+        key = dedup_key(kind, params)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT id FROM jobs WHERE dedup_key=? AND status IN (?, ?) AND cancel_requested=0 '
+                'ORDER BY created_at LIMIT 1', (key, *ACTIVE)).fetchone()
+            if row is not None:
+                return self.get(row['id']), False
+            job_id = uuid.uuid4().hex
+            self._conn.execute(
+                'INSERT INTO jobs (id, kind, params, dedup_key, status, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, kind, json.dumps(params, default=str), key, PENDING, time.time()))
+        JOBS.inc(kind=kind, status='submitted')
+        self._enqueue(kind, job_id)
+        return self.get(job_id), True
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM jobs WHERE id=?', (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def list(self, kind: Optional[str] = None, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        sql, args = 'SELECT * FROM jobs WHERE 1=1', []
+        if kind:
+            sql += ' AND kind=?'
+            args.append(kind)
+        if status:
+            sql += ' AND status=?'
+            args.append(status)
+        sql += ' ORDER BY created_at DESC LIMIT ?'
+        args.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """Cancel a pending job at once; a running job stops at its next progress call or checkpoint."""
+        with self._lock:
+            job = self.get(job_id)
+            if job is None or job['status'] in FINISHED:
+                return job
+            if job['status'] == PENDING:
+                self._update(job_id, status=CANCELLED, cancel_requested=1, finished_at=time.time())
+                JOBS.inc(kind=job['kind'], status=CANCELLED)
+            else:
+                self._update(job_id, cancel_requested=1)
+                token = self._tokens.get(job_id)
+                if token is not None:
+                    token.cancel()
+        return self.get(job_id)
+
+    # ------------------------------ internals ------------------------------
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        job.pop('dedup_key', None)
+        return job
+
+    def _update(self, job_id: str, **fields) -> None:
+        cols = ', '.join(f'{k}=?' for k in fields)
+        with self._lock:
+            self._conn.execute(f'UPDATE jobs SET {cols} WHERE id=?', (*fields.values(), job_id))
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute('SELECT cancel_requested FROM jobs WHERE id=?', (job_id,)).fetchone()
+        return bool(row and row['cancel_requested'])
+
+    def _reclaim_stale(self) -> List[sqlite3.Row]:
+        """Move running jobs with an expired lease back to pending; returns the reclaimed rows."""
+        cutoff = time.time() - JOBS_LEASE_SEC
+        stale = 'status=? AND (heartbeat_at IS NULL OR heartbeat_at<?)'
+        with self._lock:
+            rows = self._conn.execute(f'SELECT id, kind FROM jobs WHERE {stale}', (RUNNING, cutoff)).fetchall()
+            # Conditional per row, so only one of several workers reclaiming at once wins each job
+            return [row for row in rows if self._conn.execute(
+                f'UPDATE jobs SET status=?, started_at=NULL, owner=NULL WHERE id=? AND {stale}',
+                (PENDING, row['id'], RUNNING, cutoff)).rowcount]
+
+    def _resume(self, rows: List[sqlite3.Row]) -> int:
+        resumed = 0
+        for row in rows:
+            if row['kind'] in self._handlers:
+                self._enqueue(row['kind'], row['id'])
+                resumed += 1
+        return resumed
+
+    def _heartbeat_loop(self) -> None:
+        """Keep this process's leases fresh, pass on cancels made elsewhere, and pick up jobs whose owner died."""
+        while not self._stop.wait(JOBS_LEASE_SEC / 4):
+            try:
+                with self._lock:
+                    self._conn.execute('UPDATE jobs SET heartbeat_at=? WHERE owner=? AND status=?',
+                                       (time.time(), self.owner, RUNNING))
+                    # Cancels requested through another worker reach this one's jobs here
+                    cancelled = self._conn.execute(
+                        'SELECT id FROM jobs WHERE owner=? AND status=? AND cancel_requested=1',
+                        (self.owner, RUNNING)).fetchall()
+                    for row in cancelled:
+                        token = self._tokens.get(row['id'])
+                        if token is not None:
+                            token.cancel()
+                    rows = self._reclaim_stale()
+                self._resume(rows)
+            except Exception:
+                # A locked or briefly unavailable database must not end the heartbeat
+                continue
+
+    def _enqueue(self, kind: str, job_id: str) -> None:
+        with self._lock:
+            pool = self._pools.get(kind)
+            if pool is None:
+                pool = self._pools[kind] = ThreadPoolExecutor(self._handlers[kind][1], thread_name_prefix=f'job-{kind}')
+        pool.submit(self._run, kind, job_id)
+
+    def _run(self, kind: str, job_id: str) -> None:
+        with self._lock:
+            # Claim the job; skip it if it was cancelled while queued
+            now = time.time()
+            claimed = self._conn.execute(
+                'UPDATE jobs SET status=?, started_at=?, owner=?, heartbeat_at=? '
+                'WHERE id=? AND status=? AND cancel_requested=0',
+                (RUNNING, now, self.owner, now, job_id, PENDING)).rowcount
+            params = self.get(job_id)['params'] if claimed else None
+            if claimed:
+                # Registered under the lock so a cancel() right after the claim reaches the token
+                token = self._tokens[job_id] = CancelToken()
+        if not claimed:
+            return
+        handler = self._handlers[kind][0]
+        JOBS_RUNNING.inc(kind=kind)
+        ctx = JobContext(self, job_id)
+        job_token = _CURRENT_JOB.set(ctx)
+        try:
+            with cancel_scope(token=token):
+                result = handler(params, ctx)
+            if self._cancel_requested(job_id):
+                raise JobCancelled(job_id)
+            self._update(job_id, status=SUCCEEDED, progress=1.0, finished_at=time.time(),
+                         result=json.dumps(result, default=str))
+            status = SUCCEEDED
+        except (JobCancelled, Cancelled) as e:
+            if isinstance(e, DeadlineExceeded):
+                self._update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+                status = FAILED
+            else:
+                self._update(job_id, status=CANCELLED, finished_at=time.time())
+                status = CANCELLED
+        except Exception as e:
+            self._update(job_id, status=FAILED, error=getattr(e, 'detail', None) or str(e) or type(e).__name__,
+                         finished_at=time.time())
+            status = FAILED
+        finally:
+            _CURRENT_JOB.reset(job_token)
+            self._tokens.pop(job_id, None)
+            JOBS_RUNNING.dec(kind=kind)
+        JOBS.inc(kind=kind, status=status)
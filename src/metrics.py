@@ -0,0 +1,201 @@
+"""
+Lightweight in-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms are kept in a module-level registry and rendered by
+the API's /metrics endpoint. `span(stage)` times a pipeline stage into the
+`stage_duration_seconds` histogram and, when called while serving a request, into the
+per-request timings used for the `Server-Timing` response header.
+"""
+from __future__ import annotations
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    body = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in pairs)
+    return '{' + body + '}'
+
+
+def _format_value(v: float) -> str:
+    if v == float('inf'):
+        return '+Inf'
+    return repr(float(v))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional['Registry'] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+        # Metrics join the process-wide registry served at /metrics unless given another one
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, '')) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return float(self._values.get(self._key(labels), 0.0))
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return float(self._values.get(self._key(labels), 0.0))
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 registry: Optional['Registry'] = None):
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['buckets'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return int(state['count']) if state else 0
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted((k, {'buckets': list(v['buckets']), 'sum': v['sum'], 'count': v['count']}) for k, v in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, state['buckets']):
+                cumulative += n
+                le = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(state["sum"])}')
+            lines.append(f'{self.name}_count{labels} {state["count"]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'HTTP request latency by route and status.', ('method', 'route', 'status'))
+REQUESTS_IN_FLIGHT = Gauge('http_requests_in_flight', 'HTTP requests currently being served.')
+STAGE_LATENCY = Histogram('stage_duration_seconds', 'Latency of internal pipeline stages.', ('stage',))
+PREDICTIONS = Counter('predictions_total', 'Prediction requests by model and status.', ('model', 'status'))
+PREDICTION_TIMEOUTS = Counter('prediction_timeouts_total', 'Prediction requests that hit their timeout.', ('model',))
+PREDICTIONS_IN_FLIGHT = Gauge('predictions_in_flight', 'Predictions currently running by model.', ('model',))
+CACHE_REQUESTS = Counter('cache_requests_total', 'Cache lookups by cache and result.', ('cache', 'result'))
+CACHE_HIT_RATIO = Gauge('cache_hit_ratio', 'Fraction of cache lookups that were hits.', ('cache',))
+JOBS = Counter('jobs_total', 'Background jobs by kind and lifecycle event (submitted or final status).', ('kind', 'status'))
+ADMISSION_QUEUE_WAIT = Histogram('admission_queue_wait_seconds', 'Time predictions waited for a slot in their model lane.', ('model',))
+ADMISSION_QUEUED = Gauge('admission_queue_depth', 'Predictions waiting for a slot by model.', ('model',))
+ADMISSION_REJECTED = Counter('admission_rejected_total', 'Predictions rejected with 429 because the model lane was full.', ('model',))
+ADMISSION_DROPPED = Counter('admission_dropped_total', 'Predictions abandoned (timeout or disconnect) before leaving the queue.', ('model',))
+JOBS_RUNNING = Gauge('jobs_running', 'Background jobs currently running by kind.', ('kind',))
+WARMUP_READY = Gauge('warmup_ready', '1 once start-up warm-up has finished, else 0.')
+WARMUP_SECONDS = Gauge('warmup_step_seconds', 'Duration of each start-up warm-up step.', ('step', 'ticker'))
+
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('request_timings', default=None)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a pipeline stage. Usable as a context manager or as a decorator."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.observe(elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+def start_request_timings():
+    """Begin collecting stage timings for the current request; returns (timings, token)."""
+    timings: Dict[str, float] = {}
+    return timings, _request_timings.set(timings)
+
+
+def end_request_timings(token) -> None:
+    _request_timings.reset(token)
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    return ', '.join(f'{stage};dur={seconds * 1000.0:.2f}' for stage, seconds in timings.items())
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+    hits = CACHE_REQUESTS.value(cache=cache, result='hit')
+    total = hits + CACHE_REQUESTS.value(cache=cache, result='miss')
+    CACHE_HIT_RATIO.set(hits / total if total else 0.0, cache=cache)
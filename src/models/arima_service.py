@@ -0,0 +1,238 @@
+"""
+ARIMA backend with a persisted, incrementally updated state-space model per ticker.
+
+The fitted SARIMAX results object is kept per ticker (models/arima_<TICKER>.pkl and an
+in-process cache). When newer bars arrive, the filter is extended over just those bars
+with the already-estimated parameters (results.extend), so a daily update costs a few
+Kalman steps instead of a maximum-likelihood fit. Parameters are re-estimated only when:
+
+- no state exists yet, or the order changed (ARIMA_ORDER, default 1,1,1)
+- the last estimation is ARIMA_REFIT_DAYS old (default 7)
+- history up to the last seen bar changed (a restated close anywhere, or a bar added or
+  removed); detected by a fingerprint of that history stored with the state
+- a refit is forced (nightly job with --refit)
+
+Forecasting is then a get_forecast call on the cached state.
+
+    python -m src.models.arima_service refresh --tickers AAPL,MSFT [--refit]
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_squared_error, mean_absolute_error
+
+from .. import core
+from ..cancellation import checkpoint
+from ..metrics import record_cache, span
+
+try:
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+except Exception:
+    SARIMAX = None
+
+ARIMA_ORDER = tuple(int(p) for p in os.getenv('ARIMA_ORDER', '1,1,1').split(','))
+ARIMA_REFIT_DAYS = float(os.getenv('ARIMA_REFIT_DAYS', '7'))
+
+# ticker -> (file mtime, state); state keys: ticker, order, estimated_at, last_date, last_close, history, n_obs, results
+_STATES: Dict[str, Tuple[float, Dict]] = {}
+_STATES_LOCK = threading.Lock()
+# One update at a time per ticker so concurrent requests do not fit the same model twice
+_TICKER_LOCKS: Dict[str, threading.Lock] = {}
+
+
+def _state_path(ticker: str) -> str:
+    return os.path.join(core.MODELS_DIR, f'arima_{ticker}.pkl')
+
+
+def _ticker_lock(ticker: str) -> threading.Lock:
+    with _STATES_LOCK:
+        return _TICKER_LOCKS.setdefault(ticker, threading.Lock())
+
+
+def _load_state(ticker: str) -> Optional[Dict]:
+    path = _state_path(ticker)
+    if not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    with _STATES_LOCK:
+        cached = _STATES.get(ticker)
+    if cached is not None and cached[0] == mtime:
+        record_cache('arima_state', True)
+        return cached[1]
+    record_cache('arima_state', False)
+    state = joblib.load(path)
+    with _STATES_LOCK:
+        _STATES[ticker] = (mtime, state)
+    return state
+
+
+def _save_state(state: Dict) -> None:
+    path = _state_path(state['ticker'])
+    tmp = path + '.tmp'
+    joblib.dump(state, tmp)
+    os.replace(tmp, path)
+    with _STATES_LOCK:
+        _STATES[state['ticker']] = (os.path.getmtime(path), state)
+
+
+def clear_state_cache() -> None:
+    with _STATES_LOCK:
+        _STATES.clear()
+
+
+def _closes(df: pd.DataFrame) -> pd.Series:
+    closes = df['Close']
+    if isinstance(closes, pd.DataFrame):  # yfinance multi-index columns
+        closes = closes.iloc[:, 0]
+    return closes.dropna().astype(float)
+
+
+def _fit(values: np.ndarray, order: Tuple[int, ...]):
+    if SARIMAX is None:
+        raise RuntimeError('statsmodels is not installed')
+    checkpoint()
+    with span('arima_fit'):
+        # The optimizer calls back every iteration, so a cancelled request stops the estimation too
+        return SARIMAX(values, order=order).fit(disp=False, callback=lambda *_: checkpoint())
+
+
+def _history_fingerprint(closes: pd.Series) -> str:
+    return core._data_fingerprint(closes.rename('Close').to_frame())
+
+
+def _new_bars(state: Dict, closes: pd.Series) -> Optional[pd.Series]:
+    """Bars after the state's last one, or None if the history it was built on no longer matches."""
+    last = pd.Timestamp(state['last_date'])
+    # States saved before the fingerprint existed have no 'history' and are refitted once
+    if state.get('history') != _history_fingerprint(closes[closes.index <= last]):
+        return None
+    return closes[closes.index > last]
+
+
+def update_state(ticker: str, df: Optional[pd.DataFrame] = None, refit: bool = False) -> Dict:
+    """
+    Bring the ticker's ARIMA state up to date with its latest data.
+
+    Args:
+        df: price frame (loaded with core._load_data when omitted)
+        refit: re-estimate parameters even if the schedule does not call for it
+    Returns:
+        The state dict; its 'update' entry says what happened ('fit', 'extend' or 'cached')
+    """
+    ticker = ticker.upper()
+    closes = _closes(df if df is not None else core._load_data(ticker))
+    if len(closes) < 30:
+        raise RuntimeError('Insufficient data for ARIMA')
+    with _ticker_lock(ticker):
+        state = _load_state(ticker)
+        new = None
+        if state is not None and not refit and tuple(state['order']) == ARIMA_ORDER and \
+                datetime.utcnow() - state['estimated_at'] < timedelta(days=ARIMA_REFIT_DAYS):
+            new = _new_bars(state, closes)
+        if new is None:
+            results = _fit(closes.values, ARIMA_ORDER)
+            state = {'ticker': ticker, 'order': ARIMA_ORDER, 'estimated_at': datetime.utcnow(),
+                     'n_obs': len(closes), 'results': results}
+            update = 'fit'
+        elif len(new):
+            checkpoint()
+            with span('arima_extend'):
+                # Filter the new bars from the stored final state with the stored parameters; no estimation
+                results = state['results'].extend(new.values)
+            state = {**state, 'n_obs': state['n_obs'] + len(new), 'results': results}
+            update = 'extend'
+        else:
+            return {**state, 'update': 'cached'}
+        state['last_date'] = closes.index[-1].isoformat()
+        state['last_close'] = float(closes.iloc[-1])
+        state['history'] = _history_fingerprint(closes)
+        _save_state(state)
+        return {**state, 'update': update}
+
+
+@span('predict_stock_arima')
+def predict_stock_arima(ticker: str, prediction_days: int = 30, df: Optional[pd.DataFrame] = None) -> Dict:
+    if df is None:
+        df = core._load_data(ticker)
+    state = update_state(ticker, df)
+    with span('inference'):
+        forecast = state['results'].get_forecast(steps=prediction_days)
+        preds = np.asarray(forecast.predicted_mean, dtype=float)
+        intervals = np.asarray(forecast.conf_int(alpha=0.05), dtype=float)
+    closes = _closes(df)
+    rsi = core._rsi(closes, 14)
+    return {
+        'ticker': ticker,
+        'predictions': preds.tolist(),
+        'intervals': intervals.tolist(),
+        # Relative width of the first 95% interval, mapped to [0, 1] like the RF confidence
+        'confidence': float(np.clip(1.0 - (intervals[0, 1] - intervals[0, 0]) / 2 / (closes.mean() or 1), 0, 1)),
+        'model_version': f"arima{''.join(map(str, state['order']))}_{state['estimated_at'].strftime('%Y%m%d%H%M%S')}",
+        'update': state['update'],
+        'timestamp': datetime.utcnow().isoformat(),
+        'as_of': closes.index[-1].isoformat(),
+        'last_close': float(closes.iloc[-1]),
+        'sma5': float(closes.rolling(5).mean().iloc[-1]),
+        'sma20': float(closes.rolling(20).mean().iloc[-1]),
+        'rsi14': float(rsi.iloc[-1]) if len(rsi) else 50.0,
+    }
+
+
+def evaluate_stock_arima(ticker: str) -> Dict:
+    """One-step-ahead forecasts over the last 15% of the data, from parameters estimated on the rest."""
+    closes = _closes(core._load_data(ticker))
+    test_start = int(len(closes) * 0.85)
+    train, test = closes.iloc[:test_start], closes.iloc[test_start:]
+    results = _fit(train.values, ARIMA_ORDER)
+    # Append the test bars without refitting; in-sample predictions over them are one step ahead
+    preds = np.asarray(results.append(test.values, refit=False).predict(start=test_start, end=len(closes) - 1))
+    y = test.values
+    naive = closes.shift(1).iloc[test_start:].values
+
+    def _m(y_hat):
+        return {'rmse': float(np.sqrt(mean_squared_error(y, y_hat))), 'mae': float(mean_absolute_error(y, y_hat))}
+
+    acc = float(np.mean(np.sign(np.diff(y)) == np.sign(np.diff(preds)))) if len(y) > 1 else 0.0
+    return {
+        'ticker': ticker,
+        'test_metrics': {**_m(preds), 'accuracy': acc},
+        'baseline': {'naive': _m(naive)},
+        'order': list(ARIMA_ORDER),
+        'timestamp': datetime.utcnow().isoformat(),
+    }
+
+
+def refresh(tickers: List[str], refit: bool = False) -> Dict[str, str]:
+    """Nightly update: extend (or refit when due) every ticker's state; returns ticker -> update or error."""
+    out = {}
+    for t in tickers:
+        try:
+            out[t] = update_state(t, refit=refit)['update']
+        except Exception as e:
+            out[t] = f'error: {e}'
+    return out
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description='Maintain per-ticker ARIMA state')
+    sub = p.add_subparsers(dest='cmd', required=True)
+    p_r = sub.add_parser('refresh', help='Append new bars to each ticker state (full refit when due)')
+    p_r.add_argument('--tickers', required=True, help='Comma-separated tickers')
+    p_r.add_argument('--refit', action='store_true', help='Re-estimate parameters for every ticker')
+    args = p.parse_args(argv)
+    out = refresh([t.strip().upper() for t in args.tickers.split(',') if t.strip()], refit=args.refit)
+    print(json.dumps(out, indent=2))
+    return 0 if not any(v.startswith('error') for v in out.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
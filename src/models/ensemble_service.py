@@ -0,0 +1,230 @@
+"""
+Ensemble backend: member models run concurrently on shared inputs.
+
+Price data is loaded and features are engineered once per request. Members whose
+predict function takes `df` / `fe` keyword arguments (rf, arima) reuse them; the rest
+load their own. Each request runs its members on its own small thread pool, so members
+never wait behind another request's work; the API's `ensemble` admission lane bounds
+how many requests do this at once. Every member has its own cancel token
+(src/cancellation.py) and a timeout counted from when it starts running. A member that
+times out, fails or is not installed is dropped, the remaining weights are renormalised,
+and the request still succeeds. The response reports every member's status and latency.
+
+    ENSEMBLE_MEMBERS=rf,xgb,arima,lstm,transformer
+    ENSEMBLE_WEIGHTS=rf=2,arima=1          (default 1 each)
+    ENSEMBLE_TIMEOUTS=lstm=90              (seconds; defaults below)
+    ENSEMBLE_WORKERS=5                     (threads per request)
+"""
+from __future__ import annotations
+import contextvars
+import importlib
+import inspect
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .. import core
+from ..cancellation import CancelToken, DeadlineExceeded, cancel_scope, checkpoint, current_token
+from ..jobs import report_progress
+from ..metrics import span
+
+DEFAULT_MEMBERS = ('rf', 'xgb', 'arima', 'lstm', 'transformer')
+DEFAULT_TIMEOUTS = {'rf': 20.0, 'xgb': 30.0, 'arima': 30.0, 'lstm': 60.0, 'transformer': 60.0}
+FALLBACK_TIMEOUT = 30.0
+
+# member -> (module under src.models or None for src.core, predict function, evaluate function)
+_MEMBER_FUNCS = {
+    'rf': (None, 'predict_stock', 'evaluate_model'),
+    'xgb': ('xgb_service', 'predict_stock_xgb', 'evaluate_stock_xgb'),
+    'arima': ('arima_service', 'predict_stock_arima', 'evaluate_stock_arima'),
+    'lstm': ('lstm_service', 'predict_stock_lstm', 'evaluate_stock_lstm'),
+    'transformer': ('transformer_service', 'predict_stock_transformer', 'evaluate_stock_transformer'),
+}
+
+
+def _parse(value: str) -> Dict[str, float]:
+    out = {}
+    for part in filter(None, (p.strip() for p in value.split(','))):
+        name, _, num = part.partition('=')
+        out[name.strip().lower()] = float(num)
+    return out
+
+
+def _config() -> Tuple[List[str], Dict[str, float], Dict[str, float]]:
+    """(members, weights, timeouts) from the environment."""
+    members = [m.strip().lower() for m in os.getenv('ENSEMBLE_MEMBERS', ','.join(DEFAULT_MEMBERS)).split(',') if m.strip()]
+    weights = _parse(os.getenv('ENSEMBLE_WEIGHTS', ''))
+    timeouts = {**DEFAULT_TIMEOUTS, **_parse(os.getenv('ENSEMBLE_TIMEOUTS', ''))}
+    return members, {m: weights.get(m, 1.0) for m in members}, {m: timeouts.get(m, FALLBACK_TIMEOUT) for m in members}
+
+
+def _member_fn(member: str, which: int) -> Optional[Callable]:
+    """Predict (which=1) or evaluate (which=2) function for a member; None if its backend is not installed."""
+    spec = _MEMBER_FUNCS.get(member)
+    if spec is None:
+        return None
+    try:
+        module = core if spec[0] is None else importlib.import_module(f'.{spec[0]}', __package__)
+    except Exception:
+        return None
+    return getattr(module, spec[which], None)
+
+
+def _accepts(fn: Callable, name: str) -> bool:
+    try:
+        return name in inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _run_members(calls: Dict[str, Callable[[], Dict]], timeouts: Dict[str, float]) -> Dict[str, Dict]:
+    """
+    Run calls concurrently, each under its own timeout counted from when it starts.
+
+    Returns:
+        member -> {'status': 'ok'|'timeout'|'error', 'latency_ms', 'result' or 'error'}
+    """
+    if not calls:
+        return {}
+    parent = current_token()
+    # Set by each worker as it starts: member -> start time; the token is stored first
+    started: Dict[str, float] = {}
+    tokens = {member: CancelToken(parent=parent) for member in calls}
+
+    def _call(member, call):
+        token = CancelToken(timeouts[member], parent=tokens[member])
+        started[member] = time.perf_counter()
+        with cancel_scope(token=token), span(f'ensemble_{member}'):
+            return call()
+
+    workers = max(1, min(int(os.getenv('ENSEMBLE_WORKERS', '5')), len(calls)))
+    pool = ThreadPoolExecutor(workers, thread_name_prefix='ensemble')
+    pending = {member: pool.submit(contextvars.copy_context().run, _call, member, call)
+               for member, call in calls.items()}
+    out = {}
+    try:
+        while pending:
+            if parent is not None and (parent.cancelled or parent.expired):
+                break
+            now = time.perf_counter()
+            for member, fut in list(pending.items()):
+                if fut.done():
+                    del pending[member]
+                    try:
+                        out[member] = {'status': 'ok', 'result': fut.result()}
+                    except Exception as e:
+                        status = 'timeout' if isinstance(e, DeadlineExceeded) else 'error'
+                        out[member] = {'status': status, 'error': str(e) or type(e).__name__, 'exc': e}
+                elif member in started and now - started[member] >= timeouts[member]:
+                    # Stop the member at its next checkpoint; the request goes on without it
+                    del pending[member]
+                    fut.cancel()
+                    tokens[member].cancel()
+                    out[member] = {'status': 'timeout', 'error': f'no result within {timeouts[member]:g}s'}
+                else:
+                    continue
+                out[member]['latency_ms'] = round((time.perf_counter() - started.get(member, now)) * 1000.0, 2)
+                # Inside a job (ensemble backtest) each finished member advances its progress
+                report_progress(len(out) / len(calls), f"{member} {out[member]['status']}")
+            if pending:
+                # Sleep until a member finishes or the earliest running deadline; poll while some have not started
+                left = [started[m] + timeouts[m] - now for m in pending if m in started]
+                wait_s = min(left) if len(left) == len(pending) else min(left + [0.05])
+                if parent is not None and parent.remaining() is not None:
+                    wait_s = min(wait_s, parent.remaining())
+                wait(list(pending.values()), timeout=max(0.0, wait_s), return_when=FIRST_COMPLETED)
+    finally:
+        for member in pending:
+            tokens[member].cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+    # Members failing because the whole request was cancelled is not a partial result
+    checkpoint()
+    return out
+
+
+def _member_report(runs: Dict[str, Dict], members: List[str]) -> Dict[str, Dict]:
+    report = {}
+    for m in members:
+        r = runs.get(m, {'status': 'unavailable', 'latency_ms': 0.0, 'error': 'backend not installed'})
+        report[m] = {k: v for k, v in r.items() if k not in ('result', 'exc')}
+    return report
+
+
+def _no_member_succeeded(runs: Dict[str, Dict]):
+    # Only missing models everywhere -> FileNotFoundError (503 in the API); otherwise a plain failure
+    errors = [r.get('exc') for r in runs.values()]
+    if errors and all(isinstance(e, FileNotFoundError) for e in errors):
+        return FileNotFoundError('No ensemble member has a model for this ticker')
+    return RuntimeError('No ensemble member produced a result: ' +
+                        '; '.join(f"{m}: {r.get('error')}" for m, r in runs.items()))
+
+
+def predict_stock_ensemble(ticker: str, prediction_days: int = 30) -> Dict:
+    members, weights, timeouts = _config()
+    with span('ensemble_inputs'):
+        df = core._load_data(ticker)
+        fe = core._feature_engineer(df)
+    shared = {'df': df, 'fe': fe}
+    calls = {}
+    for m in members:
+        fn = _member_fn(m, 1)
+        if fn is None:
+            continue
+        kwargs = {k: v for k, v in shared.items() if _accepts(fn, k)}
+        calls[m] = lambda fn=fn, kwargs=kwargs: fn(ticker, prediction_days, **kwargs)
+    runs = _run_members(calls, timeouts)
+
+    ok = {m: r['result'] for m, r in runs.items() if r['status'] == 'ok' and r['result'].get('predictions')}
+    for m, r in runs.items():
+        if r['status'] == 'ok' and m not in ok:
+            r.update(status='error', error='empty prediction')
+    if not ok:
+        raise _no_member_succeeded(runs)
+    total = sum(weights[m] for m in ok)
+    used = {m: weights[m] / total for m in ok}
+    horizon = min(len(r['predictions']) for r in ok.values())
+    preds = sum(used[m] * np.asarray(r['predictions'][:horizon], dtype=float) for m, r in ok.items())
+    intervals = sum(
+        used[m] * (np.asarray(r['intervals'][:horizon], dtype=float) if r.get('intervals')
+                   else np.repeat(np.asarray(r['predictions'][:horizon], dtype=float)[:, None], 2, axis=1))
+        for m, r in ok.items())
+    report = _member_report(runs, members)
+    for m in members:
+        report[m]['weight'] = round(used.get(m, 0.0), 6)
+    closes = df['Close']
+    return {
+        'ticker': ticker,
+        'predictions': preds.tolist(),
+        'intervals': intervals.tolist(),
+        'confidence': float(sum(used[m] * float(r.get('confidence', 0.0)) for m, r in ok.items())),
+        'model_version': 'ensemble_' + '+'.join(f"{m}:{ok[m].get('model_version', '')}" for m in ok),
+        'members': report,
+        'timestamp': datetime.utcnow().isoformat(),
+        'as_of': df.index[-1].isoformat(),
+        'last_close': float(closes.iloc[-1]),
+    }
+
+
+def evaluate_stock_ensemble(ticker: str) -> Dict:
+    """Each member's own backtest, run concurrently under the same per-member timeouts."""
+    members, weights, timeouts = _config()
+    calls = {}
+    for m in members:
+        fn = _member_fn(m, 2)
+        if fn is not None:
+            calls[m] = (lambda fn=fn: fn(ticker, tuned=False)) if m == 'lstm' else (lambda fn=fn: fn(ticker))
+    runs = _run_members(calls, timeouts)
+    ok = [m for m, r in runs.items() if r['status'] == 'ok']
+    if not ok:
+        raise _no_member_succeeded(runs)
+    total = sum(weights[m] for m in ok)
+    report = _member_report(runs, members)
+    for m in members:
+        report[m]['weight'] = round(weights[m] / total, 6) if m in ok else 0.0
+        if m in ok:
+            report[m]['test_metrics'] = runs[m]['result'].get('test_metrics')
+    return {'ticker': ticker, 'members': report, 'timestamp': datetime.utcnow().isoformat()}
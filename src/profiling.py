@@ -0,0 +1,116 @@
+"""
+Opt-in profiling for API requests and CLI commands.
+
+Two modes are supported:
+- 'sample' (default): a background thread samples the profiled thread's stack every
+  few milliseconds and writes folded stacks (`.folded`), the input format of
+  flamegraph.pl, speedscope and inferno.
+- 'cprofile': deterministic cProfile run written as a pstats file (`.prof`), usable
+  with snakeviz, flameprof or `python -m pstats`.
+
+Nothing here is imported or run unless profiling is requested, so the disabled path
+costs nothing.
+"""
+from __future__ import annotations
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+PROFILES_DIR = os.path.join(ROOT, 'reports', 'profiles')
+PROFILE_MODES = ('sample', 'cprofile')
+
+
+class StackSampler:
+    """Periodically samples one thread's stack and aggregates identical stacks."""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def write_folded(self, path: str) -> None:
+        with open(path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _profile_path(name: str, mode: str, out_dir: Optional[str]) -> str:
+    out_dir = out_dir or PROFILES_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    safe = ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
+    ts = datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+    ext = 'folded' if mode == 'sample' else 'prof'
+    return os.path.join(out_dir, f"{safe}_{ts}.{ext}")
+
+
+@contextmanager
+def profile(name: str, mode: str = 'sample', interval: float = 0.005, out_dir: Optional[str] = None):
+    """
+    Profile the enclosed block on the current thread and write the result to
+    reports/profiles/. Yields a dict whose 'path' is set once the block exits.
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{mode}'; choose one of {PROFILE_MODES}")
+    info: Dict[str, str] = {}
+    if mode == 'sample':
+        sampler = StackSampler(threading.get_ident(), interval=interval)
+        sampler.start()
+        try:
+            yield info
+        finally:
+            sampler.stop()
+            info['path'] = _profile_path(name, mode, out_dir)
+            sampler.write_folded(info['path'])
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield info
+        finally:
+            profiler.disable()
+            info['path'] = _profile_path(name, mode, out_dir)
+            profiler.dump_stats(info['path'])
+
+
+def profiled(fn: Callable, name: str, info: Dict[str, str], mode: str = 'sample') -> Callable:
+    """
+    Wrap `fn` so it is profiled on whichever thread calls it (e.g. inside
+    asyncio.to_thread). The output path is stored in `info['path']`.
+    """
+    @wraps(fn)
+    def _wrapped(*args, **kwargs):
+        p: Dict[str, str] = {}
+        try:
+            with profile(name, mode=mode) as p:
+                return fn(*args, **kwargs)
+        finally:
+            info.update(p)
+    return _wrapped
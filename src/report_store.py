@@ -0,0 +1,242 @@
+"""
+Append-only store for training, evaluation and backtest reports.
+
+Every report is one row in a SQLite table (payload kept as JSON), indexed by ticker,
+kind, model and write time, so metric history is a single indexed query rather than a
+scan of reports/*.json. Rows are never updated or deleted. A report appended with a
+`key` is written at most once, so callers can dedupe by content (e.g. model version +
+data hash) and importing the same legacy files twice is a no-op.
+
+    python -m src.report_store import                 # load existing reports/*.json
+    python -m src.report_store import --delete        # ...and remove the imported files
+    python -m src.report_store query --ticker AAPL --kind metrics --metric test_metrics.rmse
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Union
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+DEFAULT_REPORTS_DIR = os.path.join(ROOT, 'reports')
+DB_NAME = 'reports.sqlite3'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT UNIQUE,
+    kind TEXT NOT NULL,
+    ticker TEXT,
+    model TEXT,
+    model_version TEXT,
+    created_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_ticker ON reports (ticker, kind, created_at);
+CREATE INDEX IF NOT EXISTS reports_model ON reports (model, created_at);
+"""
+
+# Legacy file name prefixes -> (kind, model); longest prefix first
+_LEGACY_KINDS = (
+    ('training_pooled_', 'training', 'lstm_pooled'),
+    ('training_', 'training', 'lstm'),
+    ('eval_', 'eval', 'lstm'),
+    ('backtest_', 'backtest', 'lstm'),
+    ('metrics_', 'metrics', 'rf'),
+)
+
+Timestamp = Union[None, float, int, str, datetime]
+
+
+def _epoch(value: Timestamp) -> Optional[float]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    dt = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    # Reports stamp naive UTC times (datetime.utcnow())
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()
+
+
+class ReportStore:
+    """One SQLite file; safe to share between threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(_SCHEMA)
+
+    def append(self, kind: str, payload: Dict[str, Any], ticker: Optional[str] = None, model: Optional[str] = None,
+               model_version: Optional[str] = None, key: Optional[str] = None,
+               created_at: Timestamp = None) -> bool:
+        """
+        Append a report.
+
+        Args:
+            kind: report type, e.g. 'training', 'eval', 'backtest', 'metrics'
+            payload: JSON-serialisable report body, stored unchanged
+            key: optional unique key; a report whose key already exists is not written again
+            created_at: write time (epoch seconds, ISO string or datetime); defaults to now
+        Returns:
+            True if a row was written, False if `key` was already present
+        """
+        ts = _epoch(created_at)
+        with self._lock:
+            cur = self._conn.execute(
+                'INSERT OR IGNORE INTO reports (key, kind, ticker, model, model_version, created_at, payload) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, kind, ticker, model, model_version, ts if ts is not None else time.time(),
+                 json.dumps(payload, default=str)))
+        return cur.rowcount == 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Payload of the report stored under `key`, or None."""
+        with self._lock:
+            row = self._conn.execute('SELECT payload FROM reports WHERE key=?', (key,)).fetchone()
+        return json.loads(row['payload']) if row is not None else None
+
+    def query(self, ticker: Optional[str] = None, kind: Optional[str] = None, model: Optional[str] = None,
+              start: Timestamp = None, end: Timestamp = None, metric: Optional[str] = None,
+              limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Report history, oldest first.
+
+        Args:
+            ticker, kind, model: exact-match filters
+            start, end: inclusive bounds on the write time
+            metric: dotted path into the payload (e.g. 'test_metrics.rmse'); when given, rows carry
+                `value` instead of the full payload and reports without that metric are skipped
+            limit: maximum rows (the most recent ones)
+        """
+        where, args = [], []
+        for col, val in (('ticker', ticker), ('kind', kind), ('model', model)):
+            if val is not None:
+                where.append(f'{col}=?')
+                args.append(val)
+        if start is not None:
+            where.append('created_at>=?')
+            args.append(_epoch(start))
+        if end is not None:
+            where.append('created_at<=?')
+            args.append(_epoch(end))
+        select = 'payload'
+        if metric:
+            if not re.fullmatch(r'[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*', metric):
+                raise ValueError(f"Invalid metric path '{metric}'")
+            select = "json_extract(payload, '$.' || ?) AS value"
+            args.insert(0, metric)
+            where.append('value IS NOT NULL')
+        sql = f'SELECT id, kind, ticker, model, model_version, created_at, {select} FROM reports'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql = f'SELECT * FROM ({sql} ORDER BY created_at DESC, id DESC LIMIT ?) ORDER BY created_at, id'
+        args.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        out = []
+        for r in rows:
+            item = {k: r[k] for k in ('id', 'kind', 'ticker', 'model', 'model_version', 'created_at')}
+            item['timestamp'] = datetime.utcfromtimestamp(r['created_at']).isoformat()
+            if metric:
+                item['value'] = r['value']
+            else:
+                item['payload'] = json.loads(r['payload'])
+            out.append(item)
+        return out
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM reports').fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_STORES: Dict[str, ReportStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(reports_dir: Optional[str] = None) -> ReportStore:
+    """Shared store for `reports_dir` (default reports/); REPORTS_DB overrides the file location."""
+    path = os.getenv('REPORTS_DB') or os.path.join(reports_dir or DEFAULT_REPORTS_DIR, DB_NAME)
+    with _STORES_LOCK:
+        store = _STORES.get(path)
+        if store is None:
+            store = _STORES[path] = ReportStore(path)
+        return store
+
+
+def import_reports(reports_dir: str = DEFAULT_REPORTS_DIR, store: Optional[ReportStore] = None,
+                   delete: bool = False) -> Dict[str, int]:
+    """
+    Load legacy reports/*.json files into the store. Each file's name is its key, so rerunning is safe.
+
+    Returns:
+        Counts of imported, already-present and skipped (unrecognised or unreadable) files
+    """
+    store = store or get_store(reports_dir)
+    counts = {'imported': 0, 'existing': 0, 'skipped': 0}
+    for name in sorted(os.listdir(reports_dir)):
+        path = os.path.join(reports_dir, name)
+        match = next((k for k in _LEGACY_KINDS if name.startswith(k[0])), None)
+        if match is None or not name.endswith('.json') or not os.path.isfile(path):
+            continue
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            counts['skipped'] += 1
+            continue
+        if not isinstance(payload, dict):
+            counts['skipped'] += 1
+            continue
+        _, kind, model = match
+        bundle = payload.get('bundle') if isinstance(payload.get('bundle'), dict) else {}
+        try:
+            created_at = _epoch(payload.get('timestamp'))
+        except ValueError:
+            created_at = None
+        written = store.append(
+            kind, payload, ticker=payload.get('ticker') or bundle.get('ticker'), model=model,
+            model_version=payload.get('model_version') or payload.get('trained_on') or bundle.get('hash'),
+            key=name[:-len('.json')], created_at=created_at if created_at is not None else os.path.getmtime(path))
+        counts['imported' if written else 'existing'] += 1
+        if delete:
+            os.remove(path)
+    return counts
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description='Report store: import legacy JSON reports and query metric history')
+    p.add_argument('--reports-dir', default=DEFAULT_REPORTS_DIR)
+    sub = p.add_subparsers(dest='cmd', required=True)
+    p_imp = sub.add_parser('import', help='Import reports/*.json into the store')
+    p_imp.add_argument('--delete', action='store_true', help='Remove each file once imported')
+    p_q = sub.add_parser('query', help='Print report history as JSON')
+    for arg in ('--ticker', '--kind', '--model', '--start', '--end', '--metric'):
+        p_q.add_argument(arg, default=None)
+    p_q.add_argument('--limit', type=int, default=1000)
+    args = p.parse_args(argv)
+
+    store = get_store(args.reports_dir)
+    if args.cmd == 'import':
+        out: Any = import_reports(args.reports_dir, store, delete=args.delete)
+    else:
+        out = store.query(ticker=args.ticker, kind=args.kind, model=args.model, start=args.start, end=args.end,
+                          metric=args.metric, limit=args.limit)
+    print(json.dumps(out, indent=2, default=str))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
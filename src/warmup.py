@@ -0,0 +1,120 @@
+"""
+Start-up warm-up and readiness for API workers.
+
+A fresh worker pays for data download, bundle unpickling, backend imports and first-call
+graph/JIT setup on its first requests. Warm-up does that work in a background thread at
+start-up, for a configured list of tickers and models:
+
+    WARMUP_TICKERS=AAPL,MSFT   WARMUP_MODELS=rf,lstm   (default models: rf)
+
+For each ticker it loads the price data and the latest RF bundle (filling the model cache
+and compiling the forest), then runs one small prediction per model. The worker reports
+ready once every step has run; a step that fails (e.g. no model trained for a ticker) is
+recorded but does not keep the worker out of rotation. WARMUP_DEADLINE bounds the whole
+phase (default 600s); steps still pending when it passes fail with DeadlineExceeded.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .cancellation import cancel_scope, checkpoint
+from .metrics import WARMUP_READY, WARMUP_SECONDS
+
+PENDING, RUNNING, READY = 'pending', 'running', 'ready'
+
+
+def _env_list(name: str, default: str = '') -> List[str]:
+    return [p.strip() for p in os.getenv(name, default).split(',') if p.strip()]
+
+
+class Warmup:
+    """
+    One warm-up run.
+
+    Args:
+        tickers, models: what to warm (defaults: WARMUP_TICKERS, WARMUP_MODELS)
+        load_data: ticker -> DataFrame
+        load_model: ticker -> bundle
+        predictor: model -> (predict function(ticker, days), timeout seconds)
+    """
+
+    def __init__(self, load_data: Callable, load_model: Callable, predictor: Callable[[str], Tuple[Callable, float]],
+                 tickers: Optional[Sequence[str]] = None, models: Optional[Sequence[str]] = None,
+                 deadline: Optional[float] = None):
+        self.tickers = [t.upper() for t in (tickers if tickers is not None else _env_list('WARMUP_TICKERS'))]
+        self.models = [m.lower() for m in (models if models is not None else _env_list('WARMUP_MODELS', 'rf'))]
+        self.deadline = deadline if deadline is not None else float(os.getenv('WARMUP_DEADLINE', '600'))
+        self._load_data = load_data
+        self._load_model = load_model
+        self._predictor = predictor
+        self._lock = threading.Lock()
+        self.status = PENDING
+        self.steps: List[Dict] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == READY
+
+    def plan(self) -> List[Tuple[str, str, Callable, Optional[float]]]:
+        """(step, ticker, call, timeout) in run order: all data, then RF bundles, then one prediction per model."""
+        out = [('data', t, lambda t=t: self._load_data(t), None) for t in self.tickers]
+        out += [('model', t, lambda t=t: self._load_model(t), None) for t in self.tickers]
+        for m in self.models:
+            fn, timeout = self._predictor(m)
+            out += [(f'predict_{m}', t, lambda fn=fn, t=t: fn(t, 1), timeout) for t in self.tickers]
+        return out
+
+    def start(self) -> None:
+        """Run in a daemon thread; no-op if already started."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.run, name='warmup', daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    def run(self) -> None:
+        with self._lock:
+            self.status = RUNNING
+            self.started_at = time.time()
+        WARMUP_READY.set(0)
+        with cancel_scope(self.deadline):
+            for step, ticker, call, timeout in self.plan():
+                started = time.perf_counter()
+                error = None
+                try:
+                    with cancel_scope(timeout):
+                        checkpoint()
+                        call()
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                elapsed = time.perf_counter() - started
+                WARMUP_SECONDS.set(elapsed, step=step, ticker=ticker)
+                with self._lock:
+                    self.steps.append({'step': step, 'ticker': ticker, 'seconds': round(elapsed, 4),
+                                       'ok': error is None, 'error': error})
+        with self._lock:
+            self.status = READY
+            self.finished_at = time.time()
+        WARMUP_READY.set(1)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'status': self.status,
+                'tickers': list(self.tickers),
+                'models': list(self.models),
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'failed': sum(1 for s in self.steps if not s['ok']),
+                'steps': [dict(s) for s in self.steps],
+            }
@@ -5,8 +5,6 @@ Backtesting engine for trading strategies with costs and risk metrics.
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import calendar
 import os
 
@@ -211,6 +209,9 @@ def plot_backtest_results(backtest_results: dict, predictions: pd.DataFrame, rec
         predictions: DataFrame with ['date', 'predicted_prob', 'actual_return']
         recession_periods: list of (start, end) tuples for vertical lines (optional)
     """
+    # Plotting libraries are heavy; only pay for them when a plot is requested.
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     sns.set(style='whitegrid')
     df_eq = backtest_results['equity_curve']
     metrics = backtest_results['metrics']
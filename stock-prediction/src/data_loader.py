@@ -2,30 +2,109 @@
 data_loader.py
 Fetches and cleans market data for modeling.
 
+Downloads are cached per ticker in ``data/raw/{ticker}.parquet`` with a sidecar
+``{ticker}.meta.json`` recording the date range the cache covers. Requests outside
+that range only download the missing head or tail segment and merge it in. Coverage
+never extends past today, so bars published after a download are fetched later. A past
+segment with no bars (before the listing date) counts as covered; an empty tail reaching
+today does not, so it is downloaded again on the next call.
+
 Example usage:
-    from src.data_loader import load_stock_data
+    from src.data_loader import load_stock_data, load_universe
     df = load_stock_data('AAPL', '2015-01-01', '2023-12-31')
+    frames = load_universe(['AAPL', 'MSFT', 'GOOG'], '2015-01-01', '2023-12-31')
 """
 
 import os
+import json
 import logging
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Tuple
 import pandas as pd
-import yfinance as yf
 
 RAW_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'raw')
 os.makedirs(RAW_DATA_DIR, exist_ok=True)
 
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
 logger = logging.getLogger(__name__)
 
-def load_stock_data(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+# A downloader takes (ticker, start_date, end_date) and returns raw OHLCV data for
+# start_date <= date < end_date, like yfinance.download.
+Downloader = Callable[[str, str, str], pd.DataFrame]
+
+
+def yfinance_downloader(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+    import yfinance as yf
+    return yf.download(ticker, start=start_date, end=end_date, progress=False)
+
+
+def _clean(df: pd.DataFrame) -> pd.DataFrame:
+    if df is None or df.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.get_level_values(0)
+    df = df[OHLCV_COLUMNS]
+    df.index = pd.to_datetime(df.index)
+    df.index.name = 'Date'
+    return df
+
+
+def _cache_paths(ticker: str) -> Tuple[str, str]:
+    base = os.path.join(RAW_DATA_DIR, ticker)
+    return f"{base}.parquet", f"{base}.meta.json"
+
+
+def _today() -> pd.Timestamp:
+    return pd.Timestamp(datetime.utcnow().date())
+
+
+def _read_cache(ticker: str) -> Tuple[Optional[pd.DataFrame], Optional[Tuple[pd.Timestamp, pd.Timestamp]]]:
+    cache_path, meta_path = _cache_paths(ticker)
+    if not os.path.exists(cache_path):
+        return None, None
+    df = pd.read_parquet(cache_path)
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        coverage = (pd.Timestamp(meta['start']), pd.Timestamp(meta['end']))
+    elif len(df):
+        # Cache written before coverage metadata existed: trust only the rows it holds.
+        coverage = (df.index.min(), df.index.max() + pd.Timedelta(days=1))
+    else:
+        return None, None
+    return df, coverage
+
+
+def _write_cache(ticker: str, df: pd.DataFrame, coverage: Tuple[pd.Timestamp, pd.Timestamp]) -> None:
+    cache_path, meta_path = _cache_paths(ticker)
+    meta = {
+        'ticker': ticker,
+        'start': coverage[0].strftime('%Y-%m-%d'),
+        'end': coverage[1].strftime('%Y-%m-%d'),
+        'rows': int(len(df)),
+        'updated_at': datetime.utcnow().isoformat(),
+    }
+    # Write to temp files and swap in so concurrent readers never see a partial cache.
+    df.to_parquet(cache_path + '.tmp')
+    os.replace(cache_path + '.tmp', cache_path)
+    with open(meta_path + '.tmp', 'w') as f:
+        json.dump(meta, f)
+    os.replace(meta_path + '.tmp', meta_path)
+
+
+def load_stock_data(ticker: str, start_date: str, end_date: str, downloader: Optional[Downloader] = None) -> pd.DataFrame:
     """
     Download daily OHLCV data for a given ticker using yfinance, with data quality checks and caching.
+    The cache is range-aware: only segments outside the cached coverage are downloaded.
     Args:
         ticker: Stock ticker symbol (e.g., 'AAPL').
         start_date: Start date (YYYY-MM-DD).
-        end_date: End date (YYYY-MM-DD).
+        end_date: End date (YYYY-MM-DD), exclusive as in yfinance.
+        downloader: Optional callable (ticker, start_date, end_date) -> DataFrame; defaults to yfinance.
     Returns:
         DataFrame with DatetimeIndex and columns: ['Open', 'High', 'Low', 'Close', 'Volume']
     Raises:
@@ -33,30 +112,88 @@ def load_stock_data(ticker: str, start_date: str, end_date: str) -> pd.DataFrame
     Example:
         df = load_stock_data('AAPL', '2015-01-01', '2023-12-31')
     """
-    cache_path = os.path.join(RAW_DATA_DIR, f"{ticker}.parquet")
+    downloader = downloader or yfinance_downloader
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    # Today's bar may be incomplete and later days have none yet: only dates before today count as covered
+    covered_end = min(end, _today())
     try:
-        if os.path.exists(cache_path):
-            logger.info(f"Loading cached data for {ticker} from {cache_path}")
-            df = pd.read_parquet(cache_path)
+        cached, coverage = _read_cache(ticker)
+        if cached is None:
+            logger.info(f"Downloading data for {ticker} from {start_date} to {end_date}")
+            df = _clean(downloader(ticker, start_date, end_date))
+            coverage = (start, max(start, covered_end))
+            # yfinance reports rate limits, outages and bad symbols with an empty frame: cache nothing
+            changed = not df.empty
         else:
-            logger.info(f"Downloading data for {ticker} from yfinance")
-            df = yf.download(ticker, start=start_date, end=end_date, progress=False)
-            df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
-            df.index = pd.to_datetime(df.index)
-            df.index.name = 'Date'
+            segments = [cached]
+            cov_start, cov_end = coverage
+            new_start, new_end = cov_start, cov_end
+            # A segment entirely before today that downloads empty has no bars (before the listing date, holidays):
+            # it is covered all the same. Only an empty open-ended tail is retried, as its bars may not be out yet.
+            if start < cov_start:
+                logger.info(f"Downloading head segment for {ticker}: {start.date()} to {cov_start.date()}")
+                head = _clean(downloader(ticker, start.strftime('%Y-%m-%d'), cov_start.strftime('%Y-%m-%d')))
+                if not head.empty:
+                    segments.insert(0, head)
+                new_start = start
+            if end > cov_end:
+                logger.info(f"Downloading tail segment for {ticker}: {cov_end.date()} to {end.date()}")
+                tail = _clean(downloader(ticker, cov_end.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')))
+                if not tail.empty:
+                    segments.append(tail)
+                if not tail.empty or end <= _today():
+                    new_end = max(covered_end, cov_end)
+            changed = len(segments) > 1 or (new_start, new_end) != (cov_start, cov_end)
+            if changed:
+                df = pd.concat([s for s in segments if not s.empty]) if len(segments) > 1 else cached
+                df = df[~df.index.duplicated(keep='last')].sort_index()
+                coverage = (new_start, new_end)
+            else:
+                logger.info(f"Loading cached data for {ticker}")
+                df = cached
+        if changed:
             # Forward fill missing data (limit 5 days)
             df = df.ffill(limit=5)
-            # Data quality checks
-            if len(df) < 252:
-                logger.error(f"Insufficient data: {len(df)} rows (min 252 required)")
-                raise ValueError(f"Insufficient data: {len(df)} rows (min 252 required)")
-            if (df['Volume'] == 0).all():
-                logger.error("All volume values are zero")
-                raise ValueError("All volume values are zero")
-            # Cache to parquet
-            df.to_parquet(cache_path)
-            logger.info(f"Cached data to {cache_path}")
+        merged = df
+        df = df[(df.index >= start) & (df.index < end)]
+        # Data quality checks
+        if len(df) < 252:
+            logger.error(f"Insufficient data: {len(df)} rows (min 252 required)")
+            raise ValueError(f"Insufficient data: {len(df)} rows (min 252 required)")
+        if (df['Volume'] == 0).all():
+            logger.error("All volume values are zero")
+            raise ValueError("All volume values are zero")
+        # Cache only after the checks pass so a bad download is never served from cache
+        if changed:
+            _write_cache(ticker, merged, coverage)
+            logger.info(f"Cached data for {ticker} covering {coverage[0].date()} to {coverage[1].date()}")
         return df
     except Exception as e:
         logger.error(f"Failed to load data for {ticker}: {e}")
         raise
+
+
+def load_universe(tickers: Iterable[str], start_date: str, end_date: str, max_workers: int = 8, downloader: Optional[Downloader] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Load many tickers concurrently through a bounded thread pool.
+    Args:
+        tickers: Ticker symbols; duplicates are loaded once.
+        start_date: Start date (YYYY-MM-DD).
+        end_date: End date (YYYY-MM-DD), exclusive.
+        max_workers: Maximum number of concurrent downloads.
+        downloader: Optional downloader passed through to load_stock_data.
+    Returns:
+        Dict mapping ticker to its DataFrame. Tickers that fail to load are logged and omitted.
+    """
+    unique = list(dict.fromkeys(tickers))
+    if not unique:
+        return {}
+    out = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique)))) as pool:
+        futures = {t: pool.submit(load_stock_data, t, start_date, end_date, downloader) for t in unique}
+        for ticker, fut in futures.items():
+            try:
+                out[ticker] = fut.result()
+            except Exception as e:
+                logger.warning(f"Skipping {ticker}: {e}")
+    return out
@@ -0,0 +1,252 @@
+"""
+inference.py
+CPU inference helpers for LSTMPredictor: int8 dynamic quantization, thread control,
+batched scoring under torch.inference_mode, and an accuracy/latency report.
+
+Dynamic quantization stores LSTM and Linear weights as int8 and quantizes activations
+on the fly, which typically speeds up CPU inference and shrinks the model about 4x.
+The report checks what that costs in AUC before a quantized model is deployed.
+
+Usage:
+    python src/inference.py --weights best_lstm.pt --n-features 20 --out reports/quantization.json
+    python src/inference.py            # synthetic task, quick-trained model
+"""
+
+import argparse
+import copy
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+if __package__:
+    from .torch_models import LSTMPredictor
+else:
+    from torch_models import LSTMPredictor
+
+# Intra-op threads for scoring; defaults to all cores. Inter-op parallelism is not useful for a single forward pass.
+INFER_THREADS = int(os.getenv('INFER_THREADS', '0')) or os.cpu_count() or 1
+BATCH_SIZES = (1, 64, 1024)
+# The inter-op pool can be sized once per process, before any parallel work; later attempts raise
+_interop_fixed = False
+
+
+def set_threads(intra_op: Optional[int] = None, inter_op: Optional[int] = 1) -> int:
+    """
+    Pin torch's CPU thread pools.
+
+    Args:
+        intra_op: threads used inside one op (matmul, LSTM cell); defaults to INFER_THREADS
+        inter_op: threads running independent ops concurrently; can only be set before torch starts work
+    Returns:
+        The intra-op thread count in effect
+    """
+    global _interop_fixed
+    torch.set_num_threads(intra_op or INFER_THREADS)
+    if inter_op and not _interop_fixed:
+        _interop_fixed = True
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError:
+            pass  # parallel work already started in this process
+    return torch.get_num_threads()
+
+
+@contextmanager
+def intra_op_threads(n: Optional[int] = None) -> Iterator[int]:
+    """
+    Run a block with `n` intra-op threads (default INFER_THREADS), restoring the previous count after.
+
+    The inter-op pool is process-wide and cannot be changed back, so it is left alone.
+    """
+    previous = torch.get_num_threads()
+    torch.set_num_threads(n or INFER_THREADS)
+    try:
+        yield torch.get_num_threads()
+    finally:
+        torch.set_num_threads(previous)
+
+
+def quantize(model: nn.Module) -> nn.Module:
+    """
+    Return an int8 dynamically quantized copy of `model` (LSTM and Linear layers).
+
+    The original model is left untouched so both can be scored side by side.
+    """
+    qmodel = copy.deepcopy(model).cpu().eval()
+    return torch.ao.quantization.quantize_dynamic(qmodel, {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+
+
+def save_quantized(model: LSTMPredictor, path: str) -> str:
+    """Quantize `model` and save its state with the constructor config needed to rebuild it."""
+    torch.save({'config': model.config, 'state_dict': quantize(model).state_dict()}, path)
+    return path
+
+
+def load_quantized(path: str) -> nn.Module:
+    """Rebuild a model written by save_quantized."""
+    ckpt = torch.load(path, weights_only=False)
+    qmodel = quantize(LSTMPredictor(**ckpt['config']))
+    qmodel.load_state_dict(ckpt['state_dict'])
+    return qmodel.eval()
+
+
+def predict_proba(model: nn.Module, X, batch_size: int = 1024) -> np.ndarray:
+    """
+    Score sequences in batches without autograd bookkeeping.
+
+    Args:
+        model: LSTMPredictor (float or quantized)
+        X: array or tensor of shape (n_samples, sequence_length, n_features)
+        batch_size: rows per forward pass
+    Returns:
+        np.ndarray of shape (n_samples,) with model outputs
+    """
+    model.eval()
+    X = torch.as_tensor(X, dtype=torch.float32)
+    out = []
+    with torch.inference_mode():
+        for start in range(0, len(X), batch_size):
+            out.append(model(X[start:start + batch_size]).reshape(-1))
+    return torch.cat(out).numpy() if out else np.empty(0, dtype=np.float32)
+
+
+def accuracy_delta(model: nn.Module, qmodel: nn.Module, X, y) -> Dict:
+    """AUC of the float and quantized models on (X, y) and how far their probabilities drift apart."""
+    from sklearn.metrics import roc_auc_score
+    p32 = predict_proba(model, X)
+    p8 = predict_proba(qmodel, X)
+    auc32 = float(roc_auc_score(y, p32))
+    auc8 = float(roc_auc_score(y, p8))
+    return {
+        'auc_fp32': auc32,
+        'auc_int8': auc8,
+        'auc_delta': auc8 - auc32,
+        'max_abs_prob_diff': float(np.max(np.abs(p32 - p8))),
+        'mean_abs_prob_diff': float(np.mean(np.abs(p32 - p8))),
+        'n_samples': int(len(y)),
+    }
+
+
+def benchmark_latency(model: nn.Module, sequence_length: int, n_features: int,
+                      batch_sizes: Sequence[int] = BATCH_SIZES, repeat: int = 20, warmup: int = 3) -> Dict:
+    """Median forward-pass latency and throughput per batch size on random input."""
+    model.eval()
+    results = {}
+    with torch.inference_mode():
+        for bs in batch_sizes:
+            x = torch.randn(bs, sequence_length, n_features)
+            for _ in range(warmup):
+                model(x)
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                model(x)
+                samples.append(time.perf_counter() - start)
+            median = float(np.median(samples))
+            results[str(bs)] = {'median_ms': median * 1000, 'samples_per_sec': bs / median}
+    return results
+
+
+def _state_dict_bytes(model: nn.Module) -> int:
+    import io
+    buf = io.BytesIO()
+    torch.save(model.state_dict(), buf)
+    return buf.getbuffer().nbytes
+
+
+def quantization_report(model: LSTMPredictor, X, y, batch_sizes: Sequence[int] = BATCH_SIZES,
+                        repeat: int = 20, threads: Optional[int] = None) -> Dict:
+    """
+    Compare a float model with its int8 quantized copy.
+
+    The thread count applies to the report only; the process's setting is restored afterwards.
+
+    Returns:
+        Dict with thread count, model sizes, AUC before/after and latency per batch size for both
+    """
+    qmodel = quantize(model)
+    _, seq_len, n_features = np.shape(X)
+    with intra_op_threads(threads) as n_threads:
+        return {
+            'threads': n_threads,
+            'size_bytes': {'fp32': _state_dict_bytes(model), 'int8': _state_dict_bytes(qmodel)},
+            'accuracy': accuracy_delta(model, qmodel, X, y),
+            'latency': {
+                'fp32': benchmark_latency(model, seq_len, n_features, batch_sizes, repeat),
+                'int8': benchmark_latency(qmodel, seq_len, n_features, batch_sizes, repeat),
+            },
+        }
+
+
+def _synthetic_task(n: int = 4096, seq_len: int = 30, n_features: int = 20, seed: int = 0):
+    """Sequences whose label depends on the recent trend of the first feature."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, seq_len, n_features)).astype(np.float32)
+    signal = X[:, -5:, 0].mean(axis=1) + 0.5 * X[:, -1, 1]
+    y = (signal + rng.normal(0, 0.3, n) > 0).astype(np.float32)
+    return X, y
+
+
+def _quick_fit(model: LSTMPredictor, X, y, epochs: int = 3, batch_size: int = 128) -> LSTMPredictor:
+    opt = torch.optim.Adam(model.parameters(), lr=1e-3)
+    loss_fn = nn.BCELoss()
+    X_t, y_t = torch.as_tensor(X), torch.as_tensor(y)
+    model.train()
+    for _ in range(epochs):
+        perm = torch.randperm(len(X_t))
+        for start in range(0, len(X_t), batch_size):
+            idx = perm[start:start + batch_size]
+            opt.zero_grad()
+            loss = loss_fn(model(X_t[idx]).reshape(-1), y_t[idx])
+            loss.backward()
+            opt.step()
+    return model.eval()
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description='int8 dynamic quantization report for LSTMPredictor')
+    p.add_argument('--weights', default=None, help='state_dict saved by train_lstm (default: quick-train on synthetic data)')
+    p.add_argument('--data', default=None, help='.npz with X (n, seq_len, n_features) and y for the AUC comparison')
+    p.add_argument('--n-features', type=int, default=20)
+    p.add_argument('--hidden-size', type=int, default=128)
+    p.add_argument('--seq-len', type=int, default=30)
+    p.add_argument('--threads', type=int, default=None)
+    p.add_argument('--repeat', type=int, default=20)
+    p.add_argument('--export', default=None, help='Also write the quantized model here')
+    p.add_argument('--out', default=None, help='Write the JSON report here')
+    args = p.parse_args(argv)
+
+    if args.data:
+        with np.load(args.data) as d:
+            X, y = d['X'].astype(np.float32), d['y'].astype(np.float32)
+    else:
+        X, y = _synthetic_task(seq_len=args.seq_len, n_features=args.n_features)
+    model = LSTMPredictor(n_features=X.shape[2], hidden_size=args.hidden_size)
+    if args.weights:
+        model.load_state_dict(torch.load(args.weights, map_location='cpu'))
+        model.eval()
+    else:
+        split = len(X) // 2
+        _quick_fit(model, X[:split], y[:split])
+        X, y = X[split:], y[split:]
+
+    report = quantization_report(model, X, y, repeat=args.repeat, threads=args.threads)
+    if args.export:
+        report['export'] = save_quantized(model, args.export)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w') as f:
+            f.write(text)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -6,30 +6,34 @@ WalkForwardSplitter implements expanding-window time-series CV. We never shuffle
 """
 
 from typing import Iterator, Tuple
+import importlib
+import time
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.svm import SVC
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
-import xgboost as xgb
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
-from torch.utils.data import Dataset
-from torch.optim import Adam
-from torch.optim.lr_scheduler import ReduceLROnPlateau
-from torch.utils.tensorboard import SummaryWriter
-from sklearn.metrics import roc_auc_score, accuracy_score
 import os
 
+# torch, tensorboard, xgboost, matplotlib and scikit-learn are imported on first use so that importing
+# this module (and the pipeline/backtester built on it) stays cheap.
+_TORCH_EXPORTS = ('LSTMModel', 'LSTMPredictor', 'SequenceDataset', 'WindowDataset', 'ShardedWindowDataset', 'window_loader')
+
+
+def __getattr__(name):
+    if name in _TORCH_EXPORTS:
+        if __package__:
+            torch_models = importlib.import_module('.torch_models', __package__)
+        else:
+            torch_models = importlib.import_module('torch_models')
+        return getattr(torch_models, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 class BaselineModels:
     """
     Baseline classifiers for next-day return direction.
     """
     def __init__(self):
+        import xgboost as xgb
+        from sklearn.linear_model import LogisticRegression
         self.lr = LogisticRegression()
         self.xgb = xgb.XGBClassifier(use_label_encoder=False, eval_metric='logloss')
 
@@ -40,112 +44,6 @@ class BaselineModels:
     def predict(self, X: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
         return self.lr.predict(X), self.xgb.predict(X)
 
-class LSTMModel(nn.Module):
-    """
-    PyTorch LSTM for sequence modeling of financial features.
-    """
-    def __init__(self, input_dim: int):
-        super().__init__()
-        self.lstm = nn.LSTM(input_dim, 32, batch_first=True)
-        self.fc = nn.Linear(32, 1)
-    def forward(self, x):
-        out, _ = self.lstm(x)
-        out = self.fc(out[:, -1, :])
-        return torch.sigmoid(out)
-
-class LSTMPredictor(nn.Module):
-    """
-    LSTM-based predictor for time-series classification or regression.
-    Args:
-        n_features: number of input features
-        hidden_size: hidden units for first LSTM layer
-        num_layers: number of LSTM layers (fixed at 2)
-        dropout: dropout rate
-        task: 'classification' or 'regression'
-    """
-    def __init__(self, n_features: int, hidden_size: int = 128, num_layers: int = 2, dropout: float = 0.2, task: str = 'classification'):
-        super().__init__()
-        self.task = task
-        self.lstm1 = nn.LSTM(input_size=n_features, hidden_size=hidden_size, batch_first=True)
-        self.dropout1 = nn.Dropout(dropout)
-        self.lstm2 = nn.LSTM(input_size=hidden_size, hidden_size=64, batch_first=True)
-        self.dropout2 = nn.Dropout(dropout)
-        self.fc1 = nn.Linear(64, 32)
-        self.fc2 = nn.Linear(32, 1)
-        self.relu = nn.ReLU()
-        self._init_weights()
-    def _init_weights(self):
-        for name, param in self.lstm1.named_parameters():
-            if 'weight_ih' in name:
-                nn.init.orthogonal_(param)
-            elif 'weight_hh' in name:
-                nn.init.orthogonal_(param)
-            elif 'bias' in name:
-                nn.init.zeros_(param)
-        for name, param in self.lstm2.named_parameters():
-            if 'weight_ih' in name:
-                nn.init.orthogonal_(param)
-            elif 'weight_hh' in name:
-                nn.init.orthogonal_(param)
-            elif 'bias' in name:
-                nn.init.zeros_(param)
-        nn.init.xavier_uniform_(self.fc1.weight)
-        nn.init.zeros_(self.fc1.bias)
-        nn.init.xavier_uniform_(self.fc2.weight)
-        nn.init.zeros_(self.fc2.bias)
-    def forward(self, x):
-        out, _ = self.lstm1(x)
-        out = self.dropout1(out)
-        out, _ = self.lstm2(out)
-        out = self.dropout2(out)
-        out = out[:, -1, :]  # last time step
-        out = self.relu(self.fc1(out))
-        out = self.fc2(out)
-        if self.task == 'classification':
-            return torch.sigmoid(out)
-        else:
-            return out
-    def predict_proba(self, x):
-        self.eval()
-        with torch.no_grad():
-            out = self.forward(x)
-            if self.task == 'classification':
-                return out
-            else:
-                return None
-
-class SequenceDataset(Dataset):
-    """
-    Prepares sliding windows for LSTM models.
-    Args:
-        features: np.ndarray of shape (n_samples, n_features)
-        targets: np.ndarray of shape (n_samples,)
-        sequence_length: number of days in each input sequence
-        scaler: fitted StandardScaler (use training set only)
-        augment: if True, inject random noise (±1% std)
-    """
-    def __init__(self, features: np.ndarray, targets: np.ndarray, sequence_length: int, scaler: StandardScaler, augment: bool = False):
-        self.features = scaler.transform(features)
-        self.targets = targets
-        self.sequence_length = sequence_length
-        self.augment = augment
-        self.n_samples = len(features)
-    def __len__(self):
-        return self.n_samples - self.sequence_length
-    def __getitem__(self, idx):
-        X_seq = self.features[idx:idx+self.sequence_length]
-        y_target = self.targets[idx+self.sequence_length]
-        # Padding if sequence is shorter than sequence_length
-        if X_seq.shape[0] < self.sequence_length:
-            pad = np.zeros((self.sequence_length - X_seq.shape[0], X_seq.shape[1]))
-            X_seq = np.vstack([pad, X_seq])
-        if self.augment:
-            noise = np.random.normal(0, 0.01, X_seq.shape)
-            X_seq = X_seq + noise
-        X_seq = torch.tensor(X_seq, dtype=torch.float32)
-        y_target = torch.tensor(y_target, dtype=torch.float32)
-        return X_seq, y_target
-
 class WalkForwardSplitter:
     """
     Time-series cross-validation with expanding window.
@@ -184,6 +82,7 @@ class WalkForwardSplitter:
             start += self.step_size
 
     def plot_splits(self, n_splits: int = 5):
+        import matplotlib.pyplot as plt
         total = self.train_size + self.val_size + self.test_size + n_splits * self.step_size
         mask = np.zeros((n_splits, total))
         for i in range(n_splits):
@@ -208,6 +107,13 @@ def compare_baselines(X: pd.DataFrame, y: pd.Series) -> pd.DataFrame:
     Train and compare baseline classifiers using walk-forward CV.
     Returns DataFrame with mean ± std metrics for each model.
     """
+    import xgboost as xgb
+    import matplotlib.pyplot as plt
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.svm import SVC
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
     splitter = WalkForwardSplitter()
     models = {
         'LogisticRegression': LogisticRegression(penalty='l2', solver='lbfgs', max_iter=1000),
@@ -274,53 +180,103 @@ def train_lstm(model, train_loader, val_loader, config: dict) -> dict:
     Train LSTM model with early stopping, LR scheduler, gradient clipping, and tensorboard logging.
     Args:
         model: LSTMPredictor instance
-        train_loader: DataLoader for training
+        train_loader: DataLoader for training (window_loader over a WindowDataset is fastest)
         val_loader: DataLoader for validation
-        config: dict with training parameters
+        config: dict with training parameters. Throughput options:
+            fast: defer metric syncs to epoch end and skip plotting/tensorboard unless asked (default False)
+            bf16: run forward passes under CPU bfloat16 autocast (default False)
+            compile: wrap the model with torch.compile (default False)
+            plot / tensorboard: show training curves / log to tensorboard (default: not fast)
+            should_stop: optional no-arg callable polled every batch; once it returns True training
+                stops (e.g. a cancelled request or an expired deadline) and the best checkpoint so far stands
     Returns:
-        Dict with best epoch, val_auc, histories, and model path
+        Dict with best epoch, val_auc, histories, samples/sec per epoch, model path, and whether training was stopped
     """
+    import torch
+    from torch.optim import Adam
+    from torch.optim.lr_scheduler import ReduceLROnPlateau
+    from sklearn.metrics import roc_auc_score, accuracy_score
     device = config.get('device', 'cpu')
+    fast = config.get('fast', False)
+    bf16 = config.get('bf16', False)
     model = model.to(device)
+    # Compiled wrapper for forward passes; checkpoints are taken from the original module
+    forward = torch.compile(model) if config.get('compile', False) else model
     optimizer = Adam(model.parameters(), lr=config.get('lr', 0.001))
     if model.task == 'classification':
         criterion = torch.nn.BCELoss()
     else:
         criterion = torch.nn.MSELoss()
-    scheduler = ReduceLROnPlateau(optimizer, factor=0.5, patience=5, verbose=True)
+    try:
+        scheduler = ReduceLROnPlateau(optimizer, factor=0.5, patience=5, verbose=True)
+    except TypeError:
+        # `verbose` was removed from newer torch releases
+        scheduler = ReduceLROnPlateau(optimizer, factor=0.5, patience=5)
     patience = config.get('patience', 10)
     max_epochs = config.get('max_epochs', 100)
     model_path = config.get('model_path', 'best_lstm.pt')
-    writer = SummaryWriter(log_dir=config.get('tensorboard_dir', './runs'))
+    writer = None
+    if config.get('tensorboard', not fast):
+        from torch.utils.tensorboard import SummaryWriter
+        writer = SummaryWriter(log_dir=config.get('tensorboard_dir', './runs'))
     best_val_auc = -np.inf
     best_epoch = 0
-    train_history, val_history = [], []
+    train_history, val_history, throughput = [], [], []
     epochs_no_improve = 0
+    should_stop = config.get('should_stop') or (lambda: False)
+    stopped = False
+
+    def _loss(X, y):
+        with torch.autocast('cpu', dtype=torch.bfloat16, enabled=bf16):
+            out = forward(X)
+        # Loss in float32: BCE is not autocast-safe and bf16 would hurt its precision
+        out = out.float()
+        return out, criterion(out.squeeze(), y)
+
     for epoch in range(max_epochs):
         model.train()
         train_losses = []
+        n_seen = 0
+        start = time.perf_counter()
         for X, y in train_loader:
+            if should_stop():
+                stopped = True
+                break
             X, y = X.to(device), y.to(device)
             optimizer.zero_grad()
-            out = model(X)
-            loss = criterion(out.squeeze(), y)
+            out, loss = _loss(X, y)
             loss.backward()
             torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
             optimizer.step()
-            train_losses.append(loss.item())
-        train_loss = np.mean(train_losses)
+            # .item() forces a sync every batch; in fast mode keep the tensor and reduce at epoch end
+            train_losses.append(loss.detach() if fast else loss.item())
+            n_seen += len(y)
+        if stopped:
+            print(f"Training stopped at epoch {epoch+1}")
+            break
+        train_loss = float(torch.stack(train_losses).mean()) if fast and train_losses else np.mean(train_losses)
+        throughput.append(n_seen / max(time.perf_counter() - start, 1e-9))
         # Validation
         model.eval()
         val_losses, val_targets, val_preds = [], [], []
         with torch.no_grad():
             for X, y in val_loader:
                 X, y = X.to(device), y.to(device)
-                out = model(X)
-                loss = criterion(out.squeeze(), y)
-                val_losses.append(loss.item())
-                val_targets.extend(y.cpu().numpy())
-                val_preds.extend(out.squeeze().cpu().numpy())
-        val_loss = np.mean(val_losses)
+                out, loss = _loss(X, y)
+                if fast:
+                    val_losses.append(loss)
+                    val_targets.append(y.reshape(-1))
+                    val_preds.append(out.reshape(-1))
+                else:
+                    val_losses.append(loss.item())
+                    val_targets.extend(y.cpu().numpy())
+                    val_preds.extend(out.squeeze().cpu().numpy())
+        if fast:
+            val_loss = float(torch.stack(val_losses).mean())
+            val_targets = torch.cat(val_targets).cpu().numpy()
+            val_preds = torch.cat(val_preds).cpu().numpy()
+        else:
+            val_loss = np.mean(val_losses)
         if model.task == 'classification':
             val_preds_bin = (np.array(val_preds) > 0.5).astype(int)
             val_accuracy = accuracy_score(val_targets, val_preds_bin)
@@ -330,11 +286,13 @@ def train_lstm(model, train_loader, val_loader, config: dict) -> dict:
             val_auc = -val_loss
         train_history.append(train_loss)
         val_history.append(val_loss)
-        writer.add_scalar('Loss/train', train_loss, epoch)
-        writer.add_scalar('Loss/val', val_loss, epoch)
-        if val_accuracy is not None:
-            writer.add_scalar('Accuracy/val', val_accuracy, epoch)
-        writer.add_scalar('AUC/val', val_auc, epoch)
+        if writer is not None:
+            writer.add_scalar('Loss/train', train_loss, epoch)
+            writer.add_scalar('Loss/val', val_loss, epoch)
+            if val_accuracy is not None:
+                writer.add_scalar('Accuracy/val', val_accuracy, epoch)
+            writer.add_scalar('AUC/val', val_auc, epoch)
+            writer.add_scalar('Throughput/train_samples_per_sec', throughput[-1], epoch)
         scheduler.step(val_loss)
         # Early stopping
         if val_auc > best_val_auc:
@@ -347,21 +305,27 @@ def train_lstm(model, train_loader, val_loader, config: dict) -> dict:
         if epochs_no_improve >= patience:
             print(f"Early stopping at epoch {epoch+1}")
             break
-        print(f"Epoch {epoch+1}: train_loss={train_loss:.4f}, val_loss={val_loss:.4f}, val_auc={val_auc:.4f}")
-    writer.close()
-    # Plot training curves
-    plt.figure(figsize=(10,4))
-    plt.plot(train_history, label='Train Loss')
-    plt.plot(val_history, label='Val Loss')
-    plt.xlabel('Epoch')
-    plt.ylabel('Loss')
-    plt.legend()
-    plt.title('Training Curves')
-    plt.show()
+        print(f"Epoch {epoch+1}: train_loss={train_loss:.4f}, val_loss={val_loss:.4f}, val_auc={val_auc:.4f}, "
+              f"{throughput[-1]:.0f} samples/s")
+    if writer is not None:
+        writer.close()
+    if config.get('plot', not fast):
+        # Plot training curves
+        import matplotlib.pyplot as plt
+        plt.figure(figsize=(10,4))
+        plt.plot(train_history, label='Train Loss')
+        plt.plot(val_history, label='Val Loss')
+        plt.xlabel('Epoch')
+        plt.ylabel('Loss')
+        plt.legend()
+        plt.title('Training Curves')
+        plt.show()
     return {
         'best_epoch': best_epoch,
         'best_val_auc': best_val_auc,
         'train_history': train_history,
         'val_history': val_history,
-        'model_path': model_path
+        'samples_per_sec': throughput,
+        'model_path': model_path,
+        'stopped': stopped,
     }
@@ -1,49 +1,142 @@
 """
 sentiment.py
 Fetches and scores news sentiment for a given ticker and date range using FinBERT.
+
+Scored sentiment is cached per ticker and per day under
+``data/processed/sentiment_cache/{TICKER}/{YYYY-MM-DD}.parquet``. A query for any
+date range is assembled from the cached days and only the missing days are fetched
+and scored, so shifting a window by one day costs one day of work. A failed fetch
+(API error, missing key, network failure) is not cached; its days are retried on the
+next call.
 """
 
 import os
 import pandas as pd
 import requests
-from transformers import pipeline
 from datetime import datetime, timedelta
+import threading
 import time
 import hashlib
 
 CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'processed', 'sentiment_cache')
 os.makedirs(CACHE_DIR, exist_ok=True)
 
-finbert = pipeline("sentiment-analysis", model="yiyanghkust/finbert-tone")
+FINBERT_MODEL = "yiyanghkust/finbert-tone"
+_finbert = None
+_finbert_lock = threading.Lock()
 
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")  # Set your NewsAPI or FMP key here
 
+SENTIMENT_COLUMNS = ['date', 'sentiment_score', 'sentiment_std', 'news_count']
 
-def get_news_sentiment(ticker: str, date_range: tuple) -> pd.DataFrame:
+
+class NewsFetchError(RuntimeError):
+    """The news API did not return a usable answer; nothing about the requested days is known."""
+
+
+def get_finbert():
     """
-    Fetch news headlines, score sentiment with FinBERT, aggregate daily, and merge with price data.
-    Args:
-        ticker: Stock ticker symbol (e.g., 'AAPL')
-        date_range: (start_date, end_date) as strings 'YYYY-MM-DD'
-    Returns:
-        DataFrame with ['date', 'sentiment_score', 'sentiment_std', 'news_count']
+    Return the shared FinBERT pipeline, downloading and building it on first use.
+    transformers is only imported here so importing this module has no side effects.
     """
-    start_date, end_date = date_range
+    global _finbert
+    if _finbert is None:
+        with _finbert_lock:
+            if _finbert is None:
+                from transformers import pipeline
+                _finbert = pipeline("sentiment-analysis", model=FINBERT_MODEL)
+    return _finbert
+
+
+def _empty_daily() -> pd.DataFrame:
+    return pd.DataFrame({
+        'date': pd.Series([], dtype='datetime64[ns]'),
+        'sentiment_score': pd.Series([], dtype=float),
+        'sentiment_std': pd.Series([], dtype=float),
+        'news_count': pd.Series([], dtype='int64'),
+    })
+
+
+def _partition_path(ticker: str, day: pd.Timestamp) -> str:
+    return os.path.join(CACHE_DIR, ticker.upper(), f"{day.strftime('%Y-%m-%d')}.parquet")
+
+
+def _legacy_cache_path(ticker: str, start_date: str, end_date: str) -> str:
     cache_key = hashlib.md5(f"{ticker}_{start_date}_{end_date}".encode()).hexdigest()
-    cache_path = os.path.join(CACHE_DIR, f"{cache_key}.parquet")
-    if os.path.exists(cache_path):
-        return pd.read_parquet(cache_path)
+    return os.path.join(CACHE_DIR, f"{cache_key}.parquet")
+
+
+def _write_partitions(ticker: str, daily: pd.DataFrame, days: pd.DatetimeIndex) -> None:
+    """
+    Write one partition per day in `days`, which must come from a successful fetch.
+    Days without any headlines get an empty partition so they are recognised as
+    cached and never refetched. The current (still incomplete) day is never persisted.
+    """
+    today = pd.Timestamp(datetime.utcnow().date())
+    os.makedirs(os.path.join(CACHE_DIR, ticker.upper()), exist_ok=True)
+    for day in days:
+        if day >= today:
+            continue
+        part = daily[daily['date'] == day]
+        if part.empty:
+            part = _empty_daily()
+        part.reset_index(drop=True).to_parquet(_partition_path(ticker, day), index=False)
+
+
+def _migrate_legacy_cache(ticker: str, start_date: str, end_date: str) -> None:
+    """
+    Split a legacy whole-range cache file (keyed by md5(ticker_start_end)) into
+    per-day partitions and remove it. The legacy file covered every day of its
+    range, so each of those days is marked as cached.
+    """
+    legacy_path = _legacy_cache_path(ticker, start_date, end_date)
+    if not os.path.exists(legacy_path):
+        return
+    daily = pd.read_parquet(legacy_path)
+    if daily.empty:
+        daily = _empty_daily()
+    daily['date'] = pd.to_datetime(daily['date'])
+    _write_partitions(ticker, daily, pd.date_range(start_date, end_date, freq='D'))
+    os.remove(legacy_path)
+
+
+def _missing_ranges(days: list) -> list:
+    """Group sorted missing days into contiguous (start, end) ranges."""
+    ranges = []
+    for day in days:
+        if ranges and day - ranges[-1][1] == timedelta(days=1):
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return [(start, end) for start, end in ranges]
+
+
+def _fetch_headlines(ticker: str, start_date: str, end_date: str) -> list:
+    """
+    All headlines for the range. Raises NewsFetchError unless every page was answered
+    with status 'ok', so an empty list really means there was no news.
+    """
+    if not NEWS_API_KEY:
+        raise NewsFetchError("NEWS_API_KEY is not set")
     headlines = []
     # Example: NewsAPI (replace with FMP if needed)
     url = f"https://newsapi.org/v2/everything?q={ticker}&from={start_date}&to={end_date}&sortBy=publishedAt&apiKey={NEWS_API_KEY}"
     page = 1
     while True:
-        resp = requests.get(url + f"&page={page}")
+        try:
+            resp = requests.get(url + f"&page={page}")
+        except requests.RequestException as e:
+            raise NewsFetchError(f"News request failed: {e}") from e
         if resp.status_code == 429:
             print("Rate limit hit, sleeping...")
             time.sleep(60)
             continue
-        data = resp.json()
+        try:
+            data = resp.json()
+        except ValueError:
+            data = {}
+        if resp.status_code != 200 or data.get('status') != 'ok':
+            raise NewsFetchError(f"News API returned {resp.status_code}: {data.get('message', resp.reason)}")
         if 'articles' not in data or not data['articles']:
             break
         for article in data['articles']:
@@ -54,8 +147,14 @@ def get_news_sentiment(ticker: str, date_range: tuple) -> pd.DataFrame:
         if len(data['articles']) < 100:
             break
         page += 1
+    return headlines
+
+
+def _score_daily(headlines: list) -> pd.DataFrame:
+    """Score headlines with FinBERT and aggregate them per day."""
     if not headlines:
-        return pd.DataFrame(columns=['date', 'sentiment_score', 'sentiment_std', 'news_count'])
+        return _empty_daily()
+    finbert = get_finbert()
     df_news = pd.DataFrame(headlines)
     df_news['sentiment'] = df_news['headline'].apply(lambda x: finbert(x)[0]['score'] if x else 0)
     daily = df_news.groupby('date').agg(
@@ -64,5 +163,44 @@ def get_news_sentiment(ticker: str, date_range: tuple) -> pd.DataFrame:
         news_count=('headline', 'count')
     ).reset_index()
     daily['date'] = pd.to_datetime(daily['date'])
-    daily.to_parquet(cache_path)
     return daily
+
+
+def get_news_sentiment(ticker: str, date_range: tuple) -> pd.DataFrame:
+    """
+    Fetch news headlines, score sentiment with FinBERT, aggregate daily, and merge with price data.
+    Cached days are read from the per-day partitions; only missing days are fetched.
+    Days whose fetch fails are left out of the result and are not cached.
+    Args:
+        ticker: Stock ticker symbol (e.g., 'AAPL')
+        date_range: (start_date, end_date) as strings 'YYYY-MM-DD'
+    Returns:
+        DataFrame with ['date', 'sentiment_score', 'sentiment_std', 'news_count']
+    """
+    start_date, end_date = date_range
+    _migrate_legacy_cache(ticker, start_date, end_date)
+    days = pd.date_range(start_date, end_date, freq='D')
+    frames = []
+    missing = []
+    for day in days:
+        path = _partition_path(ticker, day)
+        if os.path.exists(path):
+            frames.append(pd.read_parquet(path))
+        else:
+            missing.append(day)
+    for start, end in _missing_ranges(missing):
+        try:
+            headlines = _fetch_headlines(ticker, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+        except NewsFetchError as e:
+            print(f"Sentiment for {ticker} {start.date()}..{end.date()} unavailable: {e}")
+            continue
+        fetched = _score_daily(headlines)
+        fetched = fetched[(fetched['date'] >= start) & (fetched['date'] <= end)]
+        _write_partitions(ticker, fetched, pd.date_range(start, end, freq='D'))
+        frames.append(fetched)
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=SENTIMENT_COLUMNS)
+    daily = pd.concat(frames, ignore_index=True)
+    daily['date'] = pd.to_datetime(daily['date'])
+    return daily.sort_values('date').reset_index(drop=True)[SENTIMENT_COLUMNS]
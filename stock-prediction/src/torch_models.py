@@ -0,0 +1,192 @@
+"""
+torch_models.py
+PyTorch network and dataset definitions for sequence models.
+
+Kept separate from models.py so that importing the research pipeline does not pull in
+torch; models.py re-exports these names lazily on first access.
+"""
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.utils.data import BatchSampler, DataLoader, Dataset, RandomSampler, SequentialSampler
+from sklearn.preprocessing import StandardScaler
+
+class LSTMModel(nn.Module):
+    """
+    PyTorch LSTM for sequence modeling of financial features.
+    """
+    def __init__(self, input_dim: int):
+        super().__init__()
+        self.lstm = nn.LSTM(input_dim, 32, batch_first=True)
+        self.fc = nn.Linear(32, 1)
+    def forward(self, x):
+        out, _ = self.lstm(x)
+        out = self.fc(out[:, -1, :])
+        return torch.sigmoid(out)
+
+class LSTMPredictor(nn.Module):
+    """
+    LSTM-based predictor for time-series classification or regression.
+    Args:
+        n_features: number of input features
+        hidden_size: hidden units for first LSTM layer
+        num_layers: number of LSTM layers (fixed at 2)
+        dropout: dropout rate
+        task: 'classification' or 'regression'
+    """
+    def __init__(self, n_features: int, hidden_size: int = 128, num_layers: int = 2, dropout: float = 0.2, task: str = 'classification'):
+        super().__init__()
+        self.task = task
+        # Constructor arguments, kept so exported (e.g. quantized) weights can be reloaded
+        self.config = dict(n_features=n_features, hidden_size=hidden_size, num_layers=num_layers, dropout=dropout, task=task)
+        self.lstm1 = nn.LSTM(input_size=n_features, hidden_size=hidden_size, batch_first=True)
+        self.dropout1 = nn.Dropout(dropout)
+        self.lstm2 = nn.LSTM(input_size=hidden_size, hidden_size=64, batch_first=True)
+        self.dropout2 = nn.Dropout(dropout)
+        self.fc1 = nn.Linear(64, 32)
+        self.fc2 = nn.Linear(32, 1)
+        self.relu = nn.ReLU()
+        self._init_weights()
+    def _init_weights(self):
+        for name, param in self.lstm1.named_parameters():
+            if 'weight_ih' in name:
+                nn.init.orthogonal_(param)
+            elif 'weight_hh' in name:
+                nn.init.orthogonal_(param)
+            elif 'bias' in name:
+                nn.init.zeros_(param)
+        for name, param in self.lstm2.named_parameters():
+            if 'weight_ih' in name:
+                nn.init.orthogonal_(param)
+            elif 'weight_hh' in name:
+                nn.init.orthogonal_(param)
+            elif 'bias' in name:
+                nn.init.zeros_(param)
+        nn.init.xavier_uniform_(self.fc1.weight)
+        nn.init.zeros_(self.fc1.bias)
+        nn.init.xavier_uniform_(self.fc2.weight)
+        nn.init.zeros_(self.fc2.bias)
+    def forward(self, x):
+        out, _ = self.lstm1(x)
+        out = self.dropout1(out)
+        out, _ = self.lstm2(out)
+        out = self.dropout2(out)
+        out = out[:, -1, :]  # last time step
+        out = self.relu(self.fc1(out))
+        out = self.fc2(out)
+        if self.task == 'classification':
+            return torch.sigmoid(out)
+        else:
+            return out
+    def predict_proba(self, x):
+        self.eval()
+        with torch.inference_mode():
+            out = self.forward(x)
+            if self.task == 'classification':
+                return out
+            else:
+                return None
+    def quantize(self) -> nn.Module:
+        """Int8 dynamically quantized copy for CPU inference (see inference.quantize)."""
+        if __package__:
+            from .inference import quantize
+        else:
+            from inference import quantize
+        return quantize(self)
+
+class SequenceDataset(Dataset):
+    """
+    Prepares sliding windows for LSTM models.
+    Args:
+        features: np.ndarray of shape (n_samples, n_features)
+        targets: np.ndarray of shape (n_samples,)
+        sequence_length: number of days in each input sequence
+        scaler: fitted StandardScaler (use training set only)
+        augment: if True, inject random noise (±1% std)
+    """
+    def __init__(self, features: np.ndarray, targets: np.ndarray, sequence_length: int, scaler: StandardScaler, augment: bool = False):
+        self.features = scaler.transform(features)
+        self.targets = targets
+        self.sequence_length = sequence_length
+        self.augment = augment
+        self.n_samples = len(features)
+    def __len__(self):
+        return self.n_samples - self.sequence_length
+    def __getitem__(self, idx):
+        X_seq = self.features[idx:idx+self.sequence_length]
+        y_target = self.targets[idx+self.sequence_length]
+        # Padding if sequence is shorter than sequence_length
+        if X_seq.shape[0] < self.sequence_length:
+            pad = np.zeros((self.sequence_length - X_seq.shape[0], X_seq.shape[1]))
+            X_seq = np.vstack([pad, X_seq])
+        if self.augment:
+            noise = np.random.normal(0, 0.01, X_seq.shape)
+            X_seq = X_seq + noise
+        X_seq = torch.tensor(X_seq, dtype=torch.float32)
+        y_target = torch.tensor(y_target, dtype=torch.float32)
+        return X_seq, y_target
+
+class WindowDataset(Dataset):
+    """
+    SequenceDataset with every window materialized up front in one contiguous tensor.
+    Indexing with a list/tensor of indices returns a whole batch in a single gather, so
+    use it with window_loader rather than a per-sample DataLoader.
+    Windows and targets match SequenceDataset item for item (no augmentation).
+    Args:
+        features: np.ndarray of shape (n_samples, n_features)
+        targets: np.ndarray of shape (n_samples,)
+        sequence_length: number of days in each input sequence
+        scaler: fitted StandardScaler (use training set only)
+    """
+    def __init__(self, features: np.ndarray, targets: np.ndarray, sequence_length: int, scaler: StandardScaler):
+        scaled = np.asarray(scaler.transform(features), dtype=np.float64)
+        n = max(len(scaled) - sequence_length, 0)
+        windows = np.lib.stride_tricks.sliding_window_view(scaled, sequence_length, axis=0)[:n]
+        # sliding_window_view puts the window axis last: (n, n_features, seq) -> (n, seq, n_features)
+        self.X = torch.tensor(np.ascontiguousarray(windows.transpose(0, 2, 1)), dtype=torch.float32)
+        self.y = torch.tensor(np.asarray(targets)[sequence_length:sequence_length + n], dtype=torch.float32)
+    def __len__(self):
+        return len(self.y)
+    def __getitem__(self, idx):
+        return self.X[idx], self.y[idx]
+
+def window_loader(dataset: Dataset, batch_size: int = 64, shuffle: bool = False, num_workers: int = 0,
+                  generator: 'torch.Generator' = None) -> DataLoader:
+    """
+    Batch-at-a-time DataLoader over a WindowDataset or ShardedWindowDataset.
+    Draws the same index order as DataLoader(dataset, batch_size, shuffle, generator=...) but
+    fetches each batch with one indexing op. Workers stay alive across epochs when num_workers > 0.
+    """
+    base = RandomSampler(dataset, generator=generator) if shuffle else SequentialSampler(dataset)
+    return DataLoader(
+        dataset,
+        sampler=BatchSampler(base, batch_size=batch_size, drop_last=False),
+        batch_size=None,
+        num_workers=num_workers,
+        persistent_workers=num_workers > 0,
+        generator=generator,
+    )
+
+class ShardedWindowDataset(Dataset):
+    """
+    Windows read from memory-mapped shards written by window_store.build_window_store.
+    Memory use is independent of the universe size; shuffle via window_loader (index level).
+    Indexing with a list/tensor of indices gathers a whole batch.
+    Args:
+        store_path: directory of a window store
+    """
+    def __init__(self, store_path: str):
+        if __package__:
+            from .window_store import WindowStore
+        else:
+            from window_store import WindowStore
+        self.store = WindowStore(store_path)
+    def __len__(self):
+        return len(self.store)
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, np.integer)):
+            X, y = self.store.window(int(idx))
+            return torch.tensor(X, dtype=torch.float32), torch.tensor(y, dtype=torch.float32)
+        X, y = self.store.batch(np.asarray(idx))
+        return torch.from_numpy(X), torch.from_numpy(y)
@@ -0,0 +1,221 @@
+"""
+window_store.py
+Out-of-core storage for LSTM training windows across a large ticker universe.
+
+build_window_store writes each ticker's scaled feature matrix and targets to its own
+`.npy` shard plus a global index of valid window start offsets, one ticker at a time,
+so peak memory is bounded by the largest single ticker. WindowStore memory-maps the
+shards: a window is a view into the page cache, and only the rows a batch touches are
+ever read from disk. Shuffling happens on the index, never on the data.
+
+Layout of a store directory:
+    manifest.json       sequence_length, n_features, tickers with row/window counts
+    {TICKER}.X.npy      scaled features, float32, shape (rows, n_features)
+    {TICKER}.y.npy      targets, float32, shape (rows,)
+    index.npy           int64, shape (n_windows, 2): (shard number, window start row)
+"""
+
+import json
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+Source = Tuple[str, np.ndarray, np.ndarray]
+Sources = Union[Iterable[Source], Callable[[], Iterable[Source]]]
+
+MANIFEST = 'manifest.json'
+INDEX = 'index.npy'
+
+
+def _iter_sources(sources: Sources) -> Iterable[Source]:
+    return sources() if callable(sources) else sources
+
+
+def fit_streaming_scaler(sources: Sources):
+    """
+    Fit a StandardScaler with partial_fit, one ticker at a time.
+
+    Args:
+        sources: iterable (or callable returning one) of (ticker, features, targets);
+            rows with NaN features are ignored
+    Returns:
+        Fitted sklearn StandardScaler
+    """
+    from sklearn.preprocessing import StandardScaler
+    scaler = StandardScaler()
+    for _, features, _ in _iter_sources(sources):
+        features = np.asarray(features, dtype=np.float64)
+        finite = np.isfinite(features).all(axis=1)
+        if finite.any():
+            scaler.partial_fit(features[finite])
+    return scaler
+
+
+def valid_window_starts(features: np.ndarray, targets: np.ndarray, sequence_length: int) -> np.ndarray:
+    """
+    Start rows s whose window features[s:s+L] is finite and whose target targets[s+L] is finite.
+
+    This is the SequenceDataset convention: window idx covers rows idx..idx+L-1 and predicts idx+L.
+    """
+    n = len(features) - sequence_length
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+    bad = (~np.isfinite(features).all(axis=1)).astype(np.int64)
+    # bad rows inside [s, s+L) via prefix sums
+    csum = np.concatenate([[0], np.cumsum(bad)])
+    window_bad = csum[sequence_length:sequence_length + n] - csum[:n]
+    ok = (window_bad == 0) & np.isfinite(targets[sequence_length:sequence_length + n])
+    return np.flatnonzero(ok).astype(np.int64)
+
+
+def build_window_store(out_dir: str, sources: Sources, sequence_length: int, scaler=None,
+                       dtype=np.float32) -> Dict:
+    """
+    Write per-ticker scaled shards and the window index.
+
+    Args:
+        out_dir: store directory (created if missing)
+        sources: iterable (or callable returning one) of (ticker, features, targets); a callable
+            is required when scaler is None because the data is read twice
+        sequence_length: window length in rows
+        scaler: fitted scaler with transform(); fitted with fit_streaming_scaler when None
+        dtype: on-disk feature dtype
+    Returns:
+        The manifest dict (also written to out_dir/manifest.json)
+    """
+    if scaler is None:
+        if not callable(sources):
+            raise ValueError('Pass a callable source (or a fitted scaler) so the data can be read twice')
+        scaler = fit_streaming_scaler(sources)
+    os.makedirs(out_dir, exist_ok=True)
+    tickers: List[Dict] = []
+    starts: List[np.ndarray] = []
+    n_features = None
+    for ticker, features, targets in _iter_sources(sources):
+        features = np.asarray(features, dtype=np.float64)
+        targets = np.asarray(targets, dtype=np.float64)
+        if n_features is None:
+            n_features = features.shape[1]
+        elif features.shape[1] != n_features:
+            raise ValueError(f'{ticker}: expected {n_features} features, got {features.shape[1]}')
+        scaled = np.full(features.shape, np.nan, dtype=dtype)
+        finite = np.isfinite(features).all(axis=1)
+        if finite.any():
+            scaled[finite] = scaler.transform(features[finite])
+        shard = len(tickers)
+        np.save(os.path.join(out_dir, f'{ticker}.X.npy'), scaled)
+        np.save(os.path.join(out_dir, f'{ticker}.y.npy'), targets.astype(np.float32))
+        ticker_starts = valid_window_starts(scaled, targets, sequence_length)
+        # Spill each ticker's index block to disk so the universe never has to fit in memory
+        block = os.path.join(out_dir, f'{ticker}.index.npy')
+        np.save(block, np.stack([np.full(len(ticker_starts), shard, dtype=np.int64), ticker_starts], axis=1))
+        starts.append(block)
+        tickers.append({'ticker': ticker, 'rows': int(len(scaled)), 'windows': int(len(ticker_starts))})
+
+    total = sum(t['windows'] for t in tickers)
+    index = np.lib.format.open_memmap(os.path.join(out_dir, INDEX), mode='w+', dtype=np.int64, shape=(total, 2))
+    pos = 0
+    for block in starts:
+        part = np.load(block)
+        index[pos:pos + len(part)] = part
+        pos += len(part)
+        os.remove(block)
+    index.flush()
+    del index
+
+    manifest = {
+        'sequence_length': int(sequence_length),
+        'n_features': int(n_features or 0),
+        'dtype': np.dtype(dtype).name,
+        'windows': int(total),
+        'tickers': tickers,
+    }
+    with open(os.path.join(out_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class WindowStore:
+    """
+    Read-only view over a store written by build_window_store.
+
+    Shards are memory-mapped lazily and reopened after pickling, so the store can be
+    handed to DataLoader worker processes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        self.sequence_length = self.manifest['sequence_length']
+        self.tickers = [t['ticker'] for t in self.manifest['tickers']]
+        self._open()
+
+    def _open(self):
+        self.index = np.load(os.path.join(self.path, INDEX), mmap_mode='r')
+        self._X: Dict[int, np.ndarray] = {}
+        self._y: Dict[int, np.ndarray] = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for key in ('index', '_X', '_y'):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _shard(self, shard: int) -> Tuple[np.ndarray, np.ndarray]:
+        if shard not in self._X:
+            ticker = self.tickers[shard]
+            self._X[shard] = np.load(os.path.join(self.path, f'{ticker}.X.npy'), mmap_mode='r')
+            self._y[shard] = np.load(os.path.join(self.path, f'{ticker}.y.npy'), mmap_mode='r')
+        return self._X[shard], self._y[shard]
+
+    def window(self, i: int) -> Tuple[np.ndarray, float]:
+        """Window i as a (sequence_length, n_features) memmap view and its target."""
+        shard, start = self.index[i]
+        X, y = self._shard(int(shard))
+        return X[start:start + self.sequence_length], float(y[start + self.sequence_length])
+
+    def batch(self, indices) -> Tuple[np.ndarray, np.ndarray]:
+        """Gather windows into one (len(indices), sequence_length, n_features) array."""
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        L = self.sequence_length
+        X = np.empty((len(indices), L, self.manifest['n_features']), dtype=self.manifest['dtype'])
+        y = np.empty(len(indices), dtype=np.float32)
+        for j, (shard, start) in enumerate(self.index[indices]):
+            Xs, ys = self._shard(int(shard))
+            X[j] = Xs[start:start + L]
+            y[j] = ys[start + L]
+        return X, y
+
+    def shuffled_batches(self, batch_size: int, rng: Optional[np.random.Generator] = None,
+                         block_size: Optional[int] = None) -> Iterator[np.ndarray]:
+        """
+        Yield shuffled index batches.
+
+        With block_size, the order of contiguous index blocks is permuted and each block is
+        shuffled when reached, so memory stays O(n / block_size + block_size) instead of O(n).
+        """
+        rng = rng or np.random.default_rng()
+        n = len(self)
+        if not block_size:
+            order = rng.permutation(n)
+            for start in range(0, n, batch_size):
+                yield order[start:start + batch_size]
+            return
+        pending = np.empty(0, dtype=np.int64)
+        for b in rng.permutation((n + block_size - 1) // block_size):
+            block = rng.permutation(np.arange(b * block_size, min((b + 1) * block_size, n)))
+            pending = np.concatenate([pending, block])
+            while len(pending) >= batch_size:
+                yield pending[:batch_size]
+                pending = pending[batch_size:]
+        if len(pending):
+            yield pending
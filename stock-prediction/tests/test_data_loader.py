@@ -0,0 +1,161 @@
+"""
+test_data_loader.py
+Offline tests for the range-aware cache and bulk loader using a fake downloader.
+"""
+import sys, os
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import data_loader
+from data_loader import load_stock_data, load_universe
+
+
+class FakeDownloader:
+    """Returns deterministic business-day OHLCV bars and records every request."""
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, ticker, start_date, end_date):
+        with self.lock:
+            self.calls.append((ticker, start_date, end_date))
+        idx = pd.bdate_range(start_date, pd.Timestamp(end_date) - pd.Timedelta(days=1))
+        close = 100 + np.arange(len(idx)) * 0.1 + (idx - pd.Timestamp('2000-01-01')).days.values * 0.01
+        return pd.DataFrame({
+            'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': 1000,
+        }, index=idx)
+
+
+@pytest.fixture
+def fake(monkeypatch, tmp_path):
+    monkeypatch.setattr(data_loader, 'RAW_DATA_DIR', str(tmp_path))
+    return FakeDownloader()
+
+
+def test_cache_hit_for_contained_range(fake):
+    full = load_stock_data('AAPL', '2020-01-01', '2022-01-01', downloader=fake)
+    inner = load_stock_data('AAPL', '2020-03-01', '2021-06-01', downloader=fake)
+    assert len(fake.calls) == 1
+    assert inner.index.min() >= pd.Timestamp('2020-03-01')
+    assert inner.index.max() < pd.Timestamp('2021-06-01')
+    pd.testing.assert_frame_equal(inner, full.loc['2020-03-01':'2021-05-31'], check_freq=False)
+
+
+def test_only_missing_head_and_tail_are_fetched(fake):
+    load_stock_data('AAPL', '2020-01-01', '2021-06-01', downloader=fake)
+    df = load_stock_data('AAPL', '2019-06-01', '2021-09-01', downloader=fake)
+    assert fake.calls == [
+        ('AAPL', '2020-01-01', '2021-06-01'),
+        ('AAPL', '2019-06-01', '2020-01-01'),
+        ('AAPL', '2021-06-01', '2021-09-01'),
+    ]
+    expected = FakeDownloader()('AAPL', '2019-06-01', '2021-09-01')
+    assert df.index.equals(expected.index.rename('Date'))
+    assert df.index.is_monotonic_increasing and not df.index.has_duplicates
+    # coverage metadata now spans the union
+    _, coverage = data_loader._read_cache('AAPL')
+    assert coverage == (pd.Timestamp('2019-06-01'), pd.Timestamp('2021-09-01'))
+
+
+def test_short_range_fails_quality_check(fake):
+    with pytest.raises(ValueError):
+        load_stock_data('AAPL', '2020-01-01', '2020-03-01', downloader=fake)
+
+
+def test_empty_download_is_not_cached(fake):
+    def outage(ticker, start_date, end_date):
+        fake.calls.append((ticker, start_date, end_date))
+        return pd.DataFrame()
+    with pytest.raises(ValueError):
+        load_stock_data('AAPL', '2020-01-01', '2021-06-01', downloader=outage)
+    assert data_loader._read_cache('AAPL') == (None, None)
+    df = load_stock_data('AAPL', '2020-01-01', '2021-06-01', downloader=fake)
+    assert len(fake.calls) == 2
+    assert len(df) >= 252
+
+
+def test_empty_open_ended_tail_does_not_extend_coverage(fake, monkeypatch):
+    monkeypatch.setattr(data_loader, '_today', lambda: pd.Timestamp('2021-07-01'))
+    load_stock_data('AAPL', '2020-01-01', '2021-06-01', downloader=fake)
+
+    def outage(ticker, start_date, end_date):
+        fake.calls.append((ticker, start_date, end_date))
+        return pd.DataFrame()
+    df = load_stock_data('AAPL', '2020-01-01', '2021-09-01', downloader=outage)
+    assert df.index.max() < pd.Timestamp('2021-06-01')
+    assert data_loader._read_cache('AAPL')[1] == (pd.Timestamp('2020-01-01'), pd.Timestamp('2021-06-01'))
+    load_stock_data('AAPL', '2020-01-01', '2021-09-01', downloader=fake)
+    assert fake.calls[-1] == ('AAPL', '2021-06-01', '2021-09-01')
+    assert data_loader._read_cache('AAPL')[1][1] == pd.Timestamp('2021-07-01')
+
+
+def test_empty_past_segments_are_covered(fake):
+    calls = []
+
+    def listed(ticker, start_date, end_date):
+        calls.append((start_date, end_date))
+        # No bars before the listing date
+        return fake(ticker, max(pd.Timestamp(start_date), pd.Timestamp('2020-01-01')).strftime('%Y-%m-%d'), end_date)
+    load_stock_data('AAPL', '2020-06-01', '2021-09-01', downloader=listed)
+    load_stock_data('AAPL', '2019-06-01', '2021-09-01', downloader=listed)
+    # Head before the listing date returns rows only from 2020-01-01, a pre-listing head returns none
+    load_stock_data('AAPL', '2018-01-01', '2021-09-01', downloader=listed)
+    assert calls[-1] == ('2018-01-01', '2019-06-01')
+    assert data_loader._read_cache('AAPL')[1][0] == pd.Timestamp('2018-01-01')
+    df = load_stock_data('AAPL', '2018-01-01', '2021-09-01', downloader=listed)
+    assert len(calls) == 3
+    assert df.index.min() == pd.Timestamp('2020-01-01')
+
+
+def test_load_universe_downloads_concurrently(fake):
+    tickers = ['T%d' % i for i in range(12)] + ['T0']
+    # Every download waits until four are in flight, so a serial loader breaks the barrier
+    barrier = threading.Barrier(4, timeout=10)
+    state = {'in_flight': 0, 'max': 0}
+
+    def gated(ticker, start_date, end_date):
+        with fake.lock:
+            state['in_flight'] += 1
+            state['max'] = max(state['max'], state['in_flight'])
+        try:
+            barrier.wait()
+            return fake(ticker, start_date, end_date)
+        finally:
+            with fake.lock:
+                state['in_flight'] -= 1
+
+    frames = load_universe(tickers, '2020-01-01', '2021-06-01', max_workers=4, downloader=gated)
+    assert sorted(frames) == sorted(set(tickers))
+    assert len(fake.calls) == 12
+    assert state['max'] == 4
+    assert all(len(df) >= 252 for df in frames.values())
+
+
+def test_load_universe_skips_failures(fake):
+    def flaky(ticker, start_date, end_date):
+        if ticker == 'BAD':
+            raise RuntimeError('no data')
+        return fake(ticker, start_date, end_date)
+    frames = load_universe(['GOOD', 'BAD'], '2020-01-01', '2021-06-01', downloader=flaky)
+    assert list(frames) == ['GOOD']
+
+
+def test_coverage_stops_at_today_so_later_bars_are_fetched(fake, monkeypatch):
+    today = {'date': pd.Timestamp('2021-06-01')}
+    monkeypatch.setattr(data_loader, '_today', lambda: today['date'])
+
+    def published(ticker, start_date, end_date):
+        # Only bars before "today" exist yet
+        return fake(ticker, start_date, min(pd.Timestamp(end_date), today['date']).strftime('%Y-%m-%d'))
+
+    first = load_stock_data('AAPL', '2020-01-01', '2022-01-01', downloader=published)
+    assert first.index.max() < pd.Timestamp('2021-06-01')
+    assert data_loader._read_cache('AAPL')[1] == (pd.Timestamp('2020-01-01'), pd.Timestamp('2021-06-01'))
+    today['date'] = pd.Timestamp('2021-07-01')
+    later = load_stock_data('AAPL', '2020-01-01', '2022-01-01', downloader=published)
+    assert fake.calls[-1] == ('AAPL', '2021-06-01', '2021-07-01')
+    assert later.index.max() == pd.Timestamp('2021-06-30')
+    assert data_loader._read_cache('AAPL')[1][1] == pd.Timestamp('2021-07-01')
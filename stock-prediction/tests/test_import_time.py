@@ -0,0 +1,46 @@
+"""
+test_import_time.py
+Import-time regression tests: the core research modules must import without pulling in
+heavy optional dependencies, and within a `python -X importtime` budget.
+"""
+import os
+import subprocess
+import sys
+import pytest
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HEAVY_MODULES = ['torch', 'tensorboard', 'xgboost', 'matplotlib', 'seaborn', 'transformers', 'yfinance']
+# Cumulative import time budget per module in microseconds (pandas/numpy dominate).
+BUDGET_US = int(os.getenv('IMPORT_TIME_BUDGET_US', '1500000'))
+
+
+def _import_profile(module: str):
+    code = f"import sys, {module}; print(','.join(sorted(sys.modules)))"
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True,
+    )
+    cumulative = None
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative = int(parts[1].strip())
+    return cumulative, set(proc.stdout.strip().split(','))
+
+
+@pytest.mark.parametrize("module", [
+    'src.features', 'src.data_loader', 'src.backtester', 'src.models', 'src.sentiment', 'src.pipeline', 'src.window_store'
+])
+def test_import_is_light(module):
+    cumulative, loaded = _import_profile(module)
+    heavy = [m for m in HEAVY_MODULES if m in loaded]
+    assert heavy == [], f"{module} imports heavy dependencies at import time: {heavy}"
+    assert cumulative is not None
+    assert cumulative < BUDGET_US, f"{module} took {cumulative} us to import (budget {BUDGET_US} us)"
+
+
+def test_sentiment_builds_finbert_on_first_use():
+    sys.path.insert(0, os.path.join(PROJECT_DIR, 'src'))
+    import sentiment
+    assert sentiment._finbert is None
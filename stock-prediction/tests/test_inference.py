@@ -0,0 +1,52 @@
+"""
+test_inference.py
+int8 quantization and inference helpers for LSTMPredictor (skipped without torch).
+"""
+import os
+import sys
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from torch_models import LSTMPredictor
+from inference import (
+    _quick_fit, _synthetic_task, load_quantized, predict_proba, quantization_report, save_quantized,
+)
+
+
+@pytest.fixture(scope='module')
+def trained():
+    X, y = _synthetic_task(n=1024, seq_len=10, n_features=4)
+    model = LSTMPredictor(n_features=4, hidden_size=16)
+    _quick_fit(model, X[:512], y[:512], epochs=2)
+    return model, X[512:], y[512:]
+
+
+def test_quantized_model_tracks_float_model(trained):
+    model, X, y = trained
+    qmodel = model.quantize()
+    assert isinstance(qmodel.lstm1, torch.ao.nn.quantized.dynamic.LSTM)
+    assert isinstance(model.lstm1, torch.nn.LSTM)
+    p32, p8 = predict_proba(model, X, batch_size=100), predict_proba(qmodel, X)
+    assert p32.shape == p8.shape == (len(X),)
+    assert np.max(np.abs(p32 - p8)) < 0.05
+
+
+def test_report_covers_accuracy_and_batch_latency(trained):
+    model, X, y = trained
+    before = torch.get_num_threads()
+    report = quantization_report(model, X, y, batch_sizes=(1, 64), repeat=2, threads=1)
+    assert report['threads'] == 1
+    # The benchmark's thread count does not leak into the rest of the process
+    assert torch.get_num_threads() == before
+    assert abs(report['accuracy']['auc_delta']) < 0.05
+    assert set(report['latency']['int8']) == {'1', '64'}
+    assert report['size_bytes']['int8'] < report['size_bytes']['fp32']
+
+
+def test_export_roundtrip(trained, tmp_path):
+    model, X, _ = trained
+    path = save_quantized(model, str(tmp_path / 'q.pt'))
+    np.testing.assert_allclose(predict_proba(load_quantized(path), X), predict_proba(model.quantize(), X), atol=1e-6)
@@ -0,0 +1,89 @@
+"""
+test_sentiment.py
+Unit tests for the per-day partitioned sentiment cache.
+"""
+import sys, os
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import sentiment
+
+_real_fetch = sentiment._fetch_headlines
+
+
+def _setup(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_fetch(ticker, start_date, end_date):
+        calls.append((start_date, end_date))
+        days = pd.date_range(start_date, end_date, freq='D')
+        return [{'date': d.strftime('%Y-%m-%d'), 'headline': f'{ticker} news'} for d in days]
+
+    monkeypatch.setattr(sentiment, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(sentiment, '_fetch_headlines', fake_fetch)
+    monkeypatch.setattr(sentiment, 'get_finbert', lambda: (lambda text: [{'score': 0.5}]))
+    return calls
+
+
+def test_shifted_window_fetches_only_missing_days(monkeypatch, tmp_path):
+    calls = _setup(monkeypatch, tmp_path)
+    first = sentiment.get_news_sentiment('AAPL', ('2024-01-01', '2024-01-10'))
+    assert len(first) == 10
+    shifted = sentiment.get_news_sentiment('AAPL', ('2024-01-02', '2024-01-11'))
+    assert calls == [('2024-01-01', '2024-01-10'), ('2024-01-11', '2024-01-11')]
+    assert list(shifted['date']) == list(pd.date_range('2024-01-02', '2024-01-11'))
+    assert list(shifted.columns) == sentiment.SENTIMENT_COLUMNS
+
+
+def test_days_without_news_are_cached(monkeypatch, tmp_path):
+    calls = _setup(monkeypatch, tmp_path)
+    monkeypatch.setattr(sentiment, '_fetch_headlines', lambda *a: calls.append(a[1:]) or [])
+    assert sentiment.get_news_sentiment('AAPL', ('2024-02-01', '2024-02-03')).empty
+    assert sentiment.get_news_sentiment('AAPL', ('2024-02-01', '2024-02-03')).empty
+    assert calls == [('2024-02-01', '2024-02-03')]
+
+
+def test_legacy_cache_is_migrated(monkeypatch, tmp_path):
+    calls = _setup(monkeypatch, tmp_path)
+    legacy = pd.DataFrame({
+        'date': pd.to_datetime(['2023-05-02']),
+        'sentiment_score': [0.9], 'sentiment_std': [0.1], 'news_count': [3],
+    })
+    legacy_path = sentiment._legacy_cache_path('MSFT', '2023-05-01', '2023-05-03')
+    legacy.to_parquet(legacy_path)
+    out = sentiment.get_news_sentiment('MSFT', ('2023-05-01', '2023-05-03'))
+    assert calls == []
+    assert not os.path.exists(legacy_path)
+    assert out['sentiment_score'].tolist() == [0.9]
+    assert os.path.exists(sentiment._partition_path('MSFT', pd.Timestamp('2023-05-01')))
+
+
+class _Resp:
+    def __init__(self, status_code, payload):
+        self.status_code, self._payload, self.reason = status_code, payload, 'error'
+
+    def json(self):
+        return self._payload
+
+
+def test_failed_fetch_is_not_cached(monkeypatch, tmp_path):
+    _setup(monkeypatch, tmp_path)
+    monkeypatch.setattr(sentiment, '_fetch_headlines', _real_fetch)
+    monkeypatch.setattr(sentiment, 'NEWS_API_KEY', 'key')
+    responses = [_Resp(500, {'status': 'error', 'message': 'upstream down'}),
+                 _Resp(200, {'status': 'error', 'code': 'apiKeyInvalid', 'message': 'bad key'}),
+                 _Resp(200, {'status': 'ok', 'articles': [{'publishedAt': '2024-03-02T10:00:00Z', 'title': 'AAPL up'}]})]
+    monkeypatch.setattr(sentiment.requests, 'get', lambda url: responses.pop(0))
+    for _ in range(2):
+        assert sentiment.get_news_sentiment('AAPL', ('2024-03-01', '2024-03-03')).empty
+        assert not os.path.exists(sentiment._partition_path('AAPL', pd.Timestamp('2024-03-01')))
+    out = sentiment.get_news_sentiment('AAPL', ('2024-03-01', '2024-03-03'))
+    assert out['news_count'].tolist() == [1]
+    assert all(os.path.exists(sentiment._partition_path('AAPL', d)) for d in pd.date_range('2024-03-01', '2024-03-03'))
+
+
+def test_missing_api_key_raises(monkeypatch):
+    monkeypatch.setattr(sentiment, 'NEWS_API_KEY', None)
+    with pytest.raises(sentiment.NewsFetchError):
+        _real_fetch('AAPL', '2024-03-01', '2024-03-03')
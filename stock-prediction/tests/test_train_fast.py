@@ -0,0 +1,70 @@
+"""
+test_train_fast.py
+The high-throughput train_lstm mode must reproduce the standard loop (skipped without torch).
+"""
+import os
+import sys
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from sklearn.preprocessing import StandardScaler
+from torch.utils.data import DataLoader
+from models import train_lstm
+from torch_models import LSTMPredictor, SequenceDataset, WindowDataset, window_loader
+
+
+def _data(n=300, n_features=3, seed=0):
+    rng = np.random.default_rng(seed)
+    features = rng.normal(size=(n, n_features))
+    targets = (features[:, 0] + rng.normal(0, 0.5, n) > 0).astype(np.float32)
+    return features, targets, StandardScaler().fit(features)
+
+
+def test_window_dataset_matches_sequence_dataset():
+    features, targets, scaler = _data()
+    seq, win = SequenceDataset(features, targets, 10, scaler), WindowDataset(features, targets, 10, scaler)
+    assert len(seq) == len(win)
+    for i in (0, 7, len(seq) - 1):
+        assert torch.equal(seq[i][0], win[i][0]) and torch.equal(seq[i][1], win[i][1])
+    Xb, yb = win[[3, 1, 4]]
+    assert Xb.shape == (3, 10, 3) and torch.equal(yb, win.y[[3, 1, 4]])
+
+
+def _train(tmp_path, fast):
+    features, targets, scaler = _data()
+    split = 200
+    torch.manual_seed(0)
+    model = LSTMPredictor(n_features=3, hidden_size=8, dropout=0.0)
+    g = torch.Generator().manual_seed(1)
+    if fast:
+        train = window_loader(WindowDataset(features[:split], targets[:split], 10, scaler), 16, shuffle=True, generator=g)
+        val = window_loader(WindowDataset(features[split:], targets[split:], 10, scaler), 16)
+    else:
+        train = DataLoader(SequenceDataset(features[:split], targets[:split], 10, scaler), 16, shuffle=True, generator=g)
+        val = DataLoader(SequenceDataset(features[split:], targets[split:], 10, scaler), 16)
+    config = {'max_epochs': 3, 'fast': fast, 'plot': False, 'tensorboard': False,
+              'model_path': str(tmp_path / f'lstm_{fast}.pt')}
+    return train_lstm(model, train, val, config)
+
+
+def test_fast_mode_converges_like_standard_loop(tmp_path):
+    slow, fast = _train(tmp_path, False), _train(tmp_path, True)
+    np.testing.assert_allclose(fast['train_history'], slow['train_history'], rtol=1e-5)
+    np.testing.assert_allclose(fast['val_history'], slow['val_history'], rtol=1e-5)
+    assert fast['best_epoch'] == slow['best_epoch']
+    assert len(fast['samples_per_sec']) == 3 and min(fast['samples_per_sec']) > 0
+
+
+def test_should_stop_ends_training_early(tmp_path):
+    features, targets, scaler = _data()
+    model = LSTMPredictor(n_features=3, hidden_size=8, dropout=0.0)
+    train = window_loader(WindowDataset(features[:200], targets[:200], 10, scaler), 16)
+    val = window_loader(WindowDataset(features[200:], targets[200:], 10, scaler), 16)
+    polls = []
+    config = {'max_epochs': 50, 'fast': True, 'plot': False, 'tensorboard': False,
+              'model_path': str(tmp_path / 'lstm.pt'), 'should_stop': lambda: polls.append(1) or len(polls) > 30}
+    out = train_lstm(model, train, val, config)
+    assert out['stopped'] and len(out['train_history']) < 50
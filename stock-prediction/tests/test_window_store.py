@@ -0,0 +1,74 @@
+"""
+test_window_store.py
+Memory-mapped window shards and index for out-of-core LSTM training.
+"""
+import os
+import pickle
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from window_store import WindowStore, build_window_store, fit_streaming_scaler, valid_window_starts
+
+L = 5
+
+
+def _sources():
+    rng = np.random.default_rng(0)
+    out = []
+    for ticker, n in (('AAA', 40), ('BBB', 30), ('CCC', 4)):
+        X = rng.normal(size=(n, 3))
+        y = rng.integers(0, 2, n).astype(float)
+        out.append((ticker, X, y))
+    out[0][1][10, 1] = np.nan   # breaks windows starting at 6..10
+    out[1][2][-1] = np.nan      # last target missing
+    return out
+
+
+def test_valid_window_starts_skip_nans():
+    _, X, y = _sources()[0]
+    starts = valid_window_starts(X, y, L)
+    assert list(starts) == [s for s in range(len(X) - L) if not (6 <= s <= 10)]
+
+
+def test_store_windows_match_in_memory_scaling(tmp_path):
+    sources = _sources()
+    manifest = build_window_store(str(tmp_path), lambda: iter(sources), L)
+    store = WindowStore(str(tmp_path))
+    assert manifest['windows'] == len(store) == (35 - 5) + (25 - 1) + 0
+    scaler = fit_streaming_scaler(sources)
+    for i in (0, 5, 29, 30, len(store) - 1):
+        shard, start = store.index[i]
+        ticker, X, y = sources[shard]
+        window, target = store.window(i)
+        assert isinstance(window, np.memmap) or isinstance(window.base, np.memmap)
+        np.testing.assert_allclose(window, scaler.transform(X[start:start + L]), rtol=1e-6)
+        assert target == y[start + L]
+    Xb, yb = store.batch([3, 40, 3])
+    assert Xb.shape == (3, L, 3) and np.array_equal(Xb[0], Xb[2]) and yb[1] == store.window(40)[1]
+
+
+def test_block_shuffle_visits_every_window_once(tmp_path):
+    build_window_store(str(tmp_path), _sources, L)
+    store = pickle.loads(pickle.dumps(WindowStore(str(tmp_path))))
+    batches = list(store.shuffled_batches(8, np.random.default_rng(1), block_size=16))
+    seen = np.concatenate(batches)
+    assert sorted(seen) == list(range(len(store)))
+    assert all(len(b) == 8 for b in batches[:-1])
+    assert not np.array_equal(seen, np.arange(len(store)))
+
+
+def test_needs_callable_source_without_scaler(tmp_path):
+    with pytest.raises(ValueError):
+        build_window_store(str(tmp_path), _sources(), L)
+
+
+def test_torch_dataset_batches(tmp_path):
+    torch = pytest.importorskip('torch')
+    from torch_models import ShardedWindowDataset, window_loader
+    build_window_store(str(tmp_path), _sources, L)
+    ds = ShardedWindowDataset(str(tmp_path))
+    X, y = next(iter(window_loader(ds, batch_size=4, shuffle=True, generator=torch.Generator().manual_seed(0))))
+    assert X.shape == (4, L, 3) and X.dtype == torch.float32 and y.shape == (4,)
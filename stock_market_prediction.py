@@ -9,19 +9,21 @@ import argparse
 import hashlib
 import json
 import os
-import time
+import sys
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.model_selection import TimeSeriesSplit
 from sklearn.metrics import mean_squared_error, mean_absolute_error
-from tensorflow.keras.models import Sequential, load_model
-from tensorflow.keras.layers import LSTM, Dropout, Dense
-from tensorflow.keras.optimizers import Adam
+
+from numpy_lstm import export_model, load_lstm, npz_path_for
+from model_registry import find_bundle
+from src.cancellation import checkpoint, keras_callbacks
+from src.report_store import get_store
 
 try:
     import yfinance as yf
@@ -68,6 +70,10 @@ def create_sequences(arr: np.ndarray, lookback: int = LOOKBACK) -> Tuple[np.ndar
 
 
 def build_lstm(input_steps: int = LOOKBACK) -> Sequential:
+    # TensorFlow is only needed to train; eval/predict/backtest run on the NumPy export
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import LSTM, Dropout, Dense
+    from tensorflow.keras.optimizers import Adam
     model = Sequential([
         LSTM(50, return_sequences=True, input_shape=(input_steps, 1)),
         Dropout(0.2),
@@ -96,9 +102,12 @@ def save_artifacts(ticker: str, scaler: MinMaxScaler, model: Sequential) -> Dict
     # Hash model file
     with open(model_path, 'rb') as f:
         h = hashlib.sha256(f.read()).hexdigest()[:12]
+    # NumPy export so serving does not need TensorFlow
+    npz_path = export_model(model, npz_path_for(model_path))
     bundle = {
         "ticker": ticker,
         "model_path": model_path,
+        "npz_path": npz_path,
         "scaler_min_": scaler.min_.tolist(),
         "scaler_scale_": scaler.scale_.tolist(),
         "created_at": ts,
@@ -113,13 +122,56 @@ def save_artifacts(ticker: str, scaler: MinMaxScaler, model: Sequential) -> Dict
     return bundle
 
 
+def save_pooled_artifacts(name: str, scalers: Dict[str, MinMaxScaler], model: Sequential) -> Dict:
+    """Persist one shared model plus per-ticker scaler stats; the registry resolves any covered ticker to it."""
+    ts = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    model_path = os.path.join(MODELS_DIR, f"lstm_pooled_{name}_{ts}.keras")
+    model.save(model_path)
+    with open(model_path, 'rb') as f:
+        h = hashlib.sha256(f.read()).hexdigest()[:12]
+    npz_path = export_model(model, npz_path_for(model_path))
+    bundle = {
+        "pooled": True,
+        "name": name,
+        "model_path": model_path,
+        "npz_path": npz_path,
+        "tickers": {
+            t: {"scaler_min_": s.min_.tolist(), "scaler_scale_": s.scale_.tolist()} for t, s in scalers.items()
+        },
+        "lookback": LOOKBACK,
+        "created_at": ts,
+        "hash": h,
+    }
+    bundle_path = os.path.join(MODELS_DIR, f"pooled_{name}_{ts}_{h}.pkl")
+    with open(bundle_path, "w") as f:
+        json.dump(bundle, f)
+    bundle["bundle_path"] = bundle_path
+    return bundle
+
+
 def load_latest_bundle(ticker: str) -> Dict:
-    candidates = [f for f in os.listdir(MODELS_DIR) if f.startswith(f"model_{ticker}_") and f.endswith(".pkl")]
-    if not candidates:
+    """Newest per-ticker or pooled bundle covering `ticker` (see model_registry)."""
+    bundle = find_bundle(ticker, MODELS_DIR)
+    if bundle is None:
         raise FileNotFoundError(f"No model bundle found for {ticker}")
-    latest = sorted(candidates)[-1]
-    with open(os.path.join(MODELS_DIR, latest)) as f:
-        return json.load(f)
+    return bundle
+
+
+def read_universe(tickers: Sequence[str], data: Optional[str] = None,
+                  start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """Per-ticker frames from a long-format file (Date, Ticker, Close; e.g. generate_sample_data.py --out) or read_dataset."""
+    if not data:
+        return {t: read_dataset(t, start, end) for t in tickers}
+    if data.endswith('.parquet'):
+        df = pd.read_parquet(data, columns=['Date', 'Ticker', 'Close'], filters=[('Ticker', 'in', list(tickers))])
+    else:
+        df = pd.read_csv(data, usecols=['Date', 'Ticker', 'Close'], parse_dates=['Date'])
+    df['Ticker'] = df['Ticker'].astype(str)
+    frames = {t: g.set_index('Date').sort_index() for t, g in df.groupby('Ticker', sort=False) if t in set(tickers)}
+    missing = [t for t in tickers if t not in frames]
+    if missing:
+        raise KeyError(f"Tickers not found in {data}: {', '.join(missing)}")
+    return frames
 
 
 def metrics_dict(y_true: np.ndarray, y_pred: np.ndarray) -> Dict[str, float]:
@@ -168,7 +220,8 @@ def run_train(ticker: Optional[str], start: Optional[str], end: Optional[str], e
     y_train, y_val = y[:split], y[split:]
 
     model = build_lstm(LOOKBACK)
-    history = model.fit(X_train, y_train, epochs=epochs, batch_size=BATCH_SIZE, validation_data=(X_val, y_val), verbose=1)
+    history = model.fit(X_train, y_train, epochs=epochs, batch_size=BATCH_SIZE, validation_data=(X_val, y_val), verbose=1,
+                        callbacks=keras_callbacks())
 
     # Evaluate
     y_val_pred = model.predict(X_val, verbose=0)
@@ -195,11 +248,98 @@ def run_train(ticker: Optional[str], start: Optional[str], end: Optional[str], e
         "bundle": bundle,
         "timestamp": datetime.utcnow().isoformat(),
     }
-    with open(os.path.join(REPORTS_DIR, f"training_{bundle['created_at']}.json"), "w") as f:
-        json.dump(report, f, indent=2)
+    get_store(REPORTS_DIR).append("training", report, ticker=ticker, model="lstm", model_version=bundle["hash"])
+    return report
+
+
+def run_train_pooled(tickers: Sequence[str], frames: Optional[Dict[str, pd.DataFrame]] = None,
+                     epochs: int = DEFAULT_EPOCHS, name: str = "universe") -> Dict:
+    """Train one LSTM over every ticker's windows.
+
+    Each ticker keeps its own MinMaxScaler, so all series share the [0, 1] scale the network
+    sees and the architecture (and its NumPy export) is unchanged. The last 20% of each
+    ticker's windows are held out for validation.
+    """
+    frames = frames if frames is not None else read_universe(tickers)
+    scalers: Dict[str, MinMaxScaler] = {}
+    train_X, train_y, val_X, val_y, val_counts = [], [], [], [], []
+    for t in tickers:
+        data = frames[t]['Close'].astype(float).values.reshape(-1, 1)
+        scalers[t] = MinMaxScaler(feature_range=(0, 1))
+        X, y = create_sequences(scalers[t].fit_transform(data), LOOKBACK)
+        split = int(len(X) * 0.8)
+        train_X.append(X[:split]); train_y.append(y[:split])
+        val_X.append(X[split:]); val_y.append(y[split:])
+        val_counts.append(len(X) - split)
+    X_train, y_train = np.concatenate(train_X), np.concatenate(train_y)
+    X_val, y_val = np.concatenate(val_X), np.concatenate(val_y)
+
+    model = build_lstm(LOOKBACK)
+    model.fit(X_train, y_train, epochs=epochs, batch_size=BATCH_SIZE, validation_data=(X_val, y_val), verbose=1,
+              callbacks=keras_callbacks())
+
+    # One forward pass over every ticker's validation windows, split back per ticker
+    y_val_pred = model.predict(X_val, verbose=0)
+    per_ticker, true_all, pred_all = {}, [], []
+    bounds = np.cumsum([0] + val_counts)
+    for t, lo, hi in zip(tickers, bounds[:-1], bounds[1:]):
+        if hi == lo:
+            continue
+        y_true_inv = scalers[t].inverse_transform(y_val[lo:hi].reshape(-1, 1))
+        y_pred_inv = scalers[t].inverse_transform(y_val_pred[lo:hi])
+        per_ticker[t] = metrics_dict(y_true_inv, y_pred_inv)
+        true_all.append(y_true_inv); pred_all.append(y_pred_inv)
+    m = metrics_dict(np.concatenate(true_all), np.concatenate(pred_all)) if true_all else {}
+
+    bundle = save_pooled_artifacts(name, scalers, model)
+    report = {
+        "name": name,
+        "tickers": list(tickers),
+        "train_windows": int(len(X_train)),
+        "metrics_val": m,
+        "metrics_val_per_ticker": per_ticker,
+        "epochs": epochs,
+        "lookback": LOOKBACK,
+        "bundle": {k: v for k, v in bundle.items() if k != "tickers"},
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+    get_store(REPORTS_DIR).append("training", report, model="lstm_pooled", model_version=bundle["hash"])
     return report
 
 
+def predict_many(tickers: Sequence[str], frames: Optional[Dict[str, pd.DataFrame]] = None) -> List[Dict]:
+    """Next-close predictions for many tickers, one batched forward pass per distinct model.
+
+    Tickers covered by the same pooled bundle share a model, so a whole universe is scored
+    in a single predict call.
+    """
+    frames = frames if frames is not None else read_universe(tickers)
+    groups: Dict[str, List[Tuple[str, Dict, np.ndarray, pd.DataFrame]]] = {}
+    for t in tickers:
+        bundle = load_latest_bundle(t)
+        df = frames[t]
+        data = df['Close'].astype(float).values
+        if len(data) < LOOKBACK:
+            raise RuntimeError(f"Need at least {LOOKBACK} closes for {t}; got {len(data)}")
+        scaled = data[-LOOKBACK:] * bundle["scaler_scale_"][0] + bundle["scaler_min_"][0]
+        groups.setdefault(bundle["model_path"], []).append((t, bundle, scaled.reshape(LOOKBACK, 1), df))
+
+    out: Dict[str, Dict] = {}
+    for model_path, items in groups.items():
+        model = load_lstm(model_path, items[0][1].get("npz_path"))
+        preds = np.asarray(model.predict(np.stack([w for _, _, w, _ in items]), verbose=0)).reshape(-1)
+        for (t, bundle, _, df), p in zip(items, preds):
+            out[t] = {
+                "ticker": t,
+                "last_close": float(df['Close'].iloc[-1]),
+                "prediction_next": float((p - bundle["scaler_min_"][0]) / bundle["scaler_scale_"][0]),
+                "model_version": bundle["hash"],
+                "pooled": bool(bundle.get("pooled")),
+                "as_of": df.index[-1].strftime('%Y-%m-%d'),
+            }
+    return [out[t] for t in tickers]
+
+
 def run_eval(ticker: str) -> Dict:
     bundle = load_latest_bundle(ticker)
     df = read_dataset(ticker, None, None)
@@ -214,7 +354,7 @@ def run_eval(ticker: str) -> Dict:
     split = int(len(X) * 0.8)
     X_test, y_test = X[split:], y[split:]
 
-    model = load_model(bundle["model_path"])
+    model = load_lstm(bundle["model_path"], bundle.get("npz_path"))
     y_pred = model.predict(X_test, verbose=0)
     y_pred_inv = scaler.inverse_transform(y_pred)
     y_true_inv = scaler.inverse_transform(y_test.reshape(-1, 1))
@@ -230,8 +370,7 @@ def run_eval(ticker: str) -> Dict:
         X_te, y_te = create_sequences(scaled[test_idx], LOOKBACK)
         if len(X_tr) == 0 or len(X_te) == 0:
             continue
-        m_cv = load_model(bundle["model_path"])  # reuse architecture/weights for speed
-        yp = m_cv.predict(X_te, verbose=0)
+        yp = model.predict(X_te, verbose=0)  # reuse architecture/weights for speed
         yp_inv = scaler.inverse_transform(yp)
         yt_inv = scaler.inverse_transform(y_te.reshape(-1, 1))
         cv_metrics.append(metrics_dict(yt_inv, yp_inv))
@@ -245,8 +384,7 @@ def run_eval(ticker: str) -> Dict:
         "cv_avg": cv_avg,
         "timestamp": datetime.utcnow().isoformat(),
     }
-    with open(os.path.join(REPORTS_DIR, f"eval_{ticker}_{int(time.time())}.json"), "w") as f:
-        json.dump(report, f, indent=2)
+    get_store(REPORTS_DIR).append("eval", report, ticker=ticker, model="lstm", model_version=bundle.get("hash"))
     return report
 
 
@@ -262,7 +400,7 @@ def run_predict(ticker: str) -> Dict:
     scaled = scaler.transform(data)
 
     last_seq = scaled[-LOOKBACK:].reshape(1, LOOKBACK, 1)
-    model = load_model(bundle["model_path"])
+    model = load_lstm(bundle["model_path"], bundle.get("npz_path"))
     next_scaled = model.predict(last_seq, verbose=0)
     next_price = float(scaler.inverse_transform(next_scaled)[0][0])
     last_close = float(data[-1][0])
@@ -294,7 +432,7 @@ def run_backtest(ticker: str, periods_per_year: int = 252) -> Dict:
     data = closes.values.reshape(-1, 1)
     scaled = scaler.transform(data)
 
-    model = load_model(bundle["model_path"])
+    model = load_lstm(bundle["model_path"], bundle.get("npz_path"))
 
     preds = []
     actuals = []
@@ -302,6 +440,7 @@ def run_backtest(ticker: str, periods_per_year: int = 252) -> Dict:
 
     # Predict t using window [t-LOOKBACK, t)
     for t in range(LOOKBACK, len(scaled)):
+        checkpoint()
         window = scaled[t-LOOKBACK:t].reshape(1, LOOKBACK, 1)
         next_scaled = model.predict(window, verbose=0)
         next_price = float(scaler.inverse_transform(next_scaled)[0][0])
@@ -348,9 +487,7 @@ def run_backtest(ticker: str, periods_per_year: int = 252) -> Dict:
         "model_version": bundle.get("hash"),
     }
 
-    # Persist
-    with open(os.path.join(REPORTS_DIR, f"backtest_{ticker}_{int(time.time())}.json"), "w") as f:
-        json.dump(out, f, indent=2)
+    get_store(REPORTS_DIR).append("backtest", out, ticker=ticker, model="lstm", model_version=bundle.get("hash"))
     return out
 
 
@@ -358,6 +495,9 @@ def run_backtest(ticker: str, periods_per_year: int = 252) -> Dict:
 
 def main():
     p = argparse.ArgumentParser(description="Stock prediction service")
+    p.add_argument('--profile', action='store_true', help='Profile the command and write the profile to reports/profiles')
+    p.add_argument('--profile-mode', choices=['sample', 'cprofile'], default='sample',
+                   help='sample: folded stacks for flame graphs; cprofile: pstats file')
     sub = p.add_subparsers(dest='cmd', required=True)
 
     p_train = sub.add_parser('train', help='Train model')
@@ -370,8 +510,30 @@ def main():
 
     p_eval = sub.add_parser('evaluate', help='Evaluate model')
     p_eval.add_argument('--ticker', type=str, required=True)
+
+    p_pool = sub.add_parser('train-pooled', help='Train one LSTM shared by many tickers')
+    p_pool.add_argument('--tickers', type=str, required=True, help='Comma-separated tickers')
+    p_pool.add_argument('--data', type=str, default=None, help='Long-format CSV/Parquet with Date, Ticker, Close')
+    p_pool.add_argument('--name', type=str, default='universe')
+    p_pool.add_argument('--epochs', type=int, default=DEFAULT_EPOCHS)
+
+    p_many = sub.add_parser('predict-many', help='Next-close LSTM predictions for many tickers in one batch')
+    p_many.add_argument('--tickers', type=str, required=True, help='Comma-separated tickers')
+    p_many.add_argument('--data', type=str, default=None, help='Long-format CSV/Parquet with Date, Ticker, Close')
     args = p.parse_args()
 
+    if args.profile:
+        from src.profiling import profile
+        with profile(f"cli_{args.cmd}", mode=args.profile_mode) as info:
+            out = run_command(args)
+        print(f"Profile written to {info['path']}", file=sys.stderr)
+    else:
+        out = run_command(args)
+
+    print(json.dumps(out, indent=2, default=str))
+
+
+def run_command(args: argparse.Namespace) -> Dict:
     # New CLI using src.core
     if args.cmd == 'train':
         from src.core import train_model
@@ -388,6 +550,13 @@ def main():
     elif args.cmd == 'evaluate':
         from src.core import evaluate_model
         out = evaluate_model(args.ticker)
+    elif args.cmd in ('train-pooled', 'predict-many'):
+        tickers = [t.strip().upper() for t in args.tickers.split(',') if t.strip()]
+        frames = read_universe(tickers, args.data)
+        if args.cmd == 'train-pooled':
+            out = run_train_pooled(tickers, frames, epochs=args.epochs, name=args.name)
+        else:
+            out = predict_many(tickers, frames)
     else:
         # Legacy paths for LSTM retained: eval/predict/backtest
         if args.cmd == 'legacy-eval':
@@ -396,8 +565,7 @@ def main():
             out = run_predict(args.ticker)
         else:
             out = run_backtest(args.ticker, periods_per_year=getattr(args, 'periods_per_year', 252))
-
-    print(json.dumps(out, indent=2, default=str))
+    return out
 
 
 if __name__ == '__main__':
@@ -0,0 +1,91 @@
+from __future__ import annotations
+import asyncio
+import threading
+import time
+import httpx
+import pytest
+import src.api.main as api
+from src.admission import Admission, ModelLane, Overloaded
+from src.metrics import ADMISSION_DROPPED, ADMISSION_QUEUE_WAIT, ADMISSION_QUEUED, ADMISSION_REJECTED
+
+
+def test_lane_queues_up_to_its_bound_then_rejects():
+    release = threading.Event()
+    lane = ModelLane('slowlane', concurrency=1, queue=1)
+
+    async def scenario():
+        running = asyncio.ensure_future(lane.run(release.wait, timeout=5))
+        queued = asyncio.ensure_future(lane.run(lambda: 'queued', timeout=5))
+        await asyncio.sleep(0.05)
+        assert lane.stats()['running'] == 1 and lane.stats()['waiting'] == 1
+        with pytest.raises(Overloaded) as exc:
+            await lane.run(lambda: None, timeout=5)
+        assert exc.value.retry_after >= 1
+        release.set()
+        return await running, await queued
+
+    assert asyncio.run(scenario()) == (True, 'queued')
+    assert lane.stats()['rejected'] == 1
+    assert ADMISSION_REJECTED.value(model='slowlane') == 1
+    assert 'admission_queue_wait_seconds_count{model="slowlane"} 2' in '\n'.join(ADMISSION_QUEUE_WAIT.render())
+
+
+def test_env_overrides_limits(monkeypatch):
+    monkeypatch.setenv('ADMISSION_CONCURRENCY', 'ensemble=3,custom=5')
+    monkeypatch.setenv('ADMISSION_QUEUE', 'ensemble=0')
+    limits = Admission().limits
+    assert limits['ensemble'] == (3, 0) and limits['custom'][0] == 5 and limits['rf'] == (8, 64)
+
+
+def test_heavy_model_burst_is_shed_while_rf_stays_fast(monkeypatch):
+    release = threading.Event()
+
+    def slow(ticker, days):
+        release.wait(5)
+        return {'model': 'lstm_tuned'}
+
+    monkeypatch.setattr(api, 'ADMISSION_ENABLED', True)
+    monkeypatch.setattr(api, 'ADMISSION', Admission({'lstm_tuned': (1, 0), 'rf': (2, 4)}))
+    monkeypatch.setattr(api, 'predict_stock_lstm_tuned', slow)
+    monkeypatch.setattr(api, 'predict_stock', lambda ticker, days: {'model': 'rf'})
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            heavy = asyncio.ensure_future(client.post('/api/v1/predict', json={'ticker': 'AAA', 'model': 'lstm_tuned'}))
+            await asyncio.sleep(0.05)
+            shed = await client.post('/api/v1/predict', json={'ticker': 'AAA', 'model': 'lstm_tuned'})
+            start = time.perf_counter()
+            cheap = await client.post('/api/v1/predict', json={'ticker': 'AAA', 'model': 'rf'})
+            cheap_s = time.perf_counter() - start
+            release.set()
+            return await heavy, shed, cheap, cheap_s
+
+    heavy, shed, cheap, cheap_s = asyncio.run(scenario())
+    assert shed.status_code == 429 and int(shed.headers['Retry-After']) >= 1
+    assert cheap.status_code == 200 and cheap.json() == {'model': 'rf'} and cheap_s < 1.0
+    assert heavy.status_code == 200
+
+
+def test_request_timing_out_in_the_queue_frees_its_slot():
+    release = threading.Event()
+    started = []
+    lane = ModelLane('droplane', concurrency=1, queue=2)
+
+    async def scenario():
+        running = asyncio.ensure_future(lane.run(release.wait, timeout=5))
+        await asyncio.sleep(0.05)
+        for _ in range(3):
+            with pytest.raises(asyncio.TimeoutError):
+                await lane.run(started.append, 'queued', timeout=0.01)
+        assert lane.stats()['waiting'] == 0
+        release.set()
+        await running
+        return await lane.run(lambda: 'after', timeout=5)
+
+    assert asyncio.run(scenario()) == 'after'
+    assert started == []
+    stats = lane.stats()
+    assert stats['waiting'] == 0 and stats['running'] == 0 and stats['dropped'] == 3 and stats['rejected'] == 0
+    assert ADMISSION_QUEUED.value(model='droplane') == 0
+    assert ADMISSION_DROPPED.value(model='droplane') == 3
@@ -1,5 +1,11 @@
 from __future__ import annotations
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pytest
 from fastapi.testclient import TestClient
+import src.core as core
+from src.api import main
 from src.api.main import app
 
 
@@ -21,3 +27,62 @@ def test_model_not_found():
 def test_predict_invalid_ticker():
     r = client.post('/api/v1/predict', json={'ticker': 'AAPL!', 'days': 5})
     assert r.status_code == 400
+
+
+_needs_models = pytest.mark.skipif(main.SKIP_MODELS, reason='model backends are stubbed when SKIP_MODELS is set')
+
+
+@pytest.fixture()
+def prices(monkeypatch):
+    idx = pd.bdate_range('2024-01-01', periods=60)
+    df = pd.DataFrame({'Close': np.linspace(100.0, 110.0, len(idx))}, index=idx)
+    monkeypatch.setattr(core, '_load_data', lambda ticker: df)
+    return df
+
+
+@_needs_models
+def test_predict_arima_reaches_the_service(prices, monkeypatch):
+    from src.models import arima_service
+
+    class Forecast:
+        def __init__(self, steps):
+            self.predicted_mean = np.full(steps, 111.0)
+
+        def conf_int(self, alpha=0.05):
+            return np.column_stack([self.predicted_mean - 1, self.predicted_mean + 1])
+
+    class Results:
+        def get_forecast(self, steps):
+            return Forecast(steps)
+
+    state = {'results': Results(), 'order': (1, 1, 1), 'estimated_at': datetime(2024, 3, 1), 'update': 'cached'}
+    monkeypatch.setattr(arima_service, 'update_state', lambda ticker, df=None, refit=False: state)
+    r = client.post('/api/v1/predict', json={'ticker': 'AAA', 'days': 3, 'model': 'arima'})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body['predictions'] == [111.0] * 3 and body['update'] == 'cached'
+
+
+@_needs_models
+def test_predict_ensemble_reports_members(prices, monkeypatch):
+    from src.models import ensemble_service
+    monkeypatch.setattr(core, '_feature_engineer', lambda frame: frame)
+
+    def rf(ticker, days, df=None, fe=None):
+        return {'predictions': [1.0] * days, 'confidence': 0.5}
+
+    def arima(ticker, days, df=None):
+        return {'predictions': [4.0] * days, 'confidence': 1.0}
+
+    def xgb(ticker, days):
+        raise ValueError('boom')
+
+    funcs = {'rf': rf, 'arima': arima, 'xgb': xgb}
+    monkeypatch.setattr(ensemble_service, '_member_fn', lambda m, which: funcs.get(m))
+    monkeypatch.setenv('ENSEMBLE_MEMBERS', 'rf,arima,xgb,lstm')
+    r = client.post('/api/v1/predict', json={'ticker': 'AAA', 'days': 3, 'model': 'ensemble'})
+    assert r.status_code == 200, r.text
+    members = r.json()['members']
+    assert {m: v['status'] for m, v in members.items()} == {'rf': 'ok', 'arima': 'ok', 'xgb': 'error', 'lstm': 'unavailable'}
+    assert all(v['latency_ms'] >= 0 for v in members.values())
+    assert r.json()['predictions'] == pytest.approx([2.5] * 3)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('statsmodels')
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+import src.core as core
+from src.models import arima_service
+
+
+@pytest.fixture()
+def prices(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, 'MODELS_DIR', str(tmp_path))
+    arima_service.clear_state_cache()
+    rng = np.random.default_rng(0)
+    idx = pd.bdate_range('2023-01-02', periods=320)
+    yield pd.DataFrame({'Close': 100 + np.cumsum(rng.normal(0, 1, len(idx)))}, index=idx)
+    arima_service.clear_state_cache()
+
+
+def test_new_bars_extend_the_filter_without_refitting(prices):
+    first = arima_service.update_state('AAA', prices.iloc[:300])
+    assert first['update'] == 'fit'
+    assert arima_service.update_state('AAA', prices.iloc[:300])['update'] == 'cached'
+    extended = arima_service.update_state('AAA', prices)
+    assert extended['update'] == 'extend' and extended['estimated_at'] == first['estimated_at']
+    np.testing.assert_allclose(extended['results'].params, first['results'].params)
+    # Same forecast as filtering the full series with the stored parameters
+    full = SARIMAX(prices['Close'].values, order=arima_service.ARIMA_ORDER).filter(first['results'].params)
+    np.testing.assert_allclose(extended['results'].get_forecast(5).predicted_mean,
+                               full.get_forecast(5).predicted_mean, rtol=1e-6)
+    # A fresh process picks the state up from disk
+    arima_service.clear_state_cache()
+    assert arima_service.update_state('AAA', prices)['update'] == 'cached'
+
+
+def test_refit_when_due_or_history_changed(prices, monkeypatch):
+    arima_service.update_state('AAA', prices.iloc[:300])
+    restated = prices.copy()
+    restated.iloc[299, 0] += 5
+    assert arima_service.update_state('AAA', restated)['update'] == 'fit'
+    assert arima_service.update_state('AAA', restated, refit=True)['update'] == 'fit'
+    monkeypatch.setattr(arima_service, 'ARIMA_REFIT_DAYS', 0)
+    assert arima_service.update_state('AAA', restated)['update'] == 'fit'
+
+
+@pytest.mark.parametrize('change', ['restate_early_bar', 'drop_early_bar'])
+def test_refit_when_earlier_history_changed(prices, change):
+    arima_service.update_state('AAA', prices.iloc[:300])
+    changed = prices.copy()
+    if change == 'restate_early_bar':
+        changed.iloc[50, 0] += 5
+    else:
+        changed = changed.drop(changed.index[50])
+    # The last fitted bar is unchanged, only history before it differs
+    assert changed.loc[prices.index[299], 'Close'] == prices['Close'].iloc[299]
+    assert arima_service.update_state('AAA', changed)['update'] == 'fit'
+
+
+def test_predict_uses_cached_state(prices, monkeypatch):
+    monkeypatch.setattr(core, '_load_data', lambda ticker: prices)
+    out = arima_service.predict_stock_arima('AAA', 10)
+    assert len(out['predictions']) == 10 and len(out['intervals']) == 10 and out['update'] == 'fit'
+    assert arima_service.predict_stock_arima('AAA', 10)['update'] == 'cached'
@@ -0,0 +1,36 @@
+from __future__ import annotations
+from types import SimpleNamespace
+import pytest
+from benchmarks import run
+from benchmarks.cases import BENCHMARKS
+from benchmarks.run import compare_results, time_case
+
+
+def _result(**medians):
+    return {'results': {name: {'median': m} for name, m in medians.items()}}
+
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    baseline = _result(a=1.0, b=1.0, c=1.0)
+    current = _result(a=1.05, b=1.5, c=0.5, d=9.0)
+    regressions = compare_results(current, baseline, threshold=0.10)
+    assert [r['name'] for r in regressions] == ['b']
+    assert regressions[0]['ratio'] == 1.5
+
+
+def test_time_case_reports_summary_stats(monkeypatch):
+    calls = []
+    # Timed runs of 1s, 6s and 2s: two clock reads per run
+    clock = iter([0.0, 1.0, 10.0, 16.0, 20.0, 22.0])
+    monkeypatch.setattr(run, 'time', SimpleNamespace(perf_counter=lambda: next(clock)))
+    stats = time_case(lambda: calls.append(1), repeat=3, warmup=2)
+    assert len(calls) == 5
+    assert stats == {'repeat': 3, 'min': 1.0, 'median': 2.0, 'mean': 3.0, 'stdev': pytest.approx(7 ** 0.5)}
+
+
+def test_hot_paths_are_registered():
+    for name in ('core.feature_engineer', 'research.engineer_features', 'core.predict_stock_1d',
+                 'core.predict_stock_30d', 'core.predict_stock_365d', 'core.train_model',
+                 'core.evaluate_model_walkforward', 'research.backtester_run',
+                 'research.portfolio_backtester_run', 'api.predict_30d'):
+        assert name in BENCHMARKS
@@ -0,0 +1,91 @@
+from __future__ import annotations
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+import src.api.main as api
+from benchmarks.env import OfflineEnv
+from src.cancellation import Cancelled, DeadlineExceeded, cancel_scope, checkpoint
+from src.jobs import JobManager, CANCELLED, FAILED, FINISHED
+
+
+def _spin(stopped: threading.Event):
+    """Work that only ends through cancellation."""
+    try:
+        while True:
+            checkpoint()
+            time.sleep(0.01)
+    except Cancelled:
+        stopped.set()
+        raise
+
+
+def _wait(jm, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = jm.get(job_id)
+        if job['status'] in FINISHED:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def _expire(params, ctx):
+    with cancel_scope(0):
+        checkpoint()
+
+
+def test_scopes_nest_and_checkpoint_is_a_noop_outside_them():
+    checkpoint()
+    with cancel_scope(60) as outer:
+        with cancel_scope() as inner:
+            assert inner.deadline == outer.deadline
+            outer.cancel()
+            with pytest.raises(Cancelled):
+                checkpoint()
+    with cancel_scope(0):
+        with pytest.raises(DeadlineExceeded):
+            checkpoint()
+
+
+def test_predict_stock_stops_between_steps(monkeypatch):
+    with OfflineEnv(['CNL'], days=420) as env:
+        env.ensure_model('CNL')
+        steps = []
+        real = env.core._bundle_predict
+
+        def counted(bundle, X):
+            steps.append(1)
+            if len(steps) == 3:
+                token.cancel()
+            return real(bundle, X)
+
+        monkeypatch.setattr(env.core, '_bundle_predict', counted)
+        with cancel_scope() as token:
+            with pytest.raises(Cancelled):
+                env.core.predict_stock('CNL', 30)
+        assert len(steps) == 3
+
+
+def test_timed_out_request_stops_its_worker(monkeypatch):
+    stopped = threading.Event()
+    monkeypatch.setattr(api, '_predictor', lambda model: (lambda ticker, days: _spin(stopped), 0.2))
+    r = TestClient(api.app).post('/api/v1/predict', json={'ticker': 'AAA', 'model': 'rf'})
+    assert r.status_code == 504
+    assert stopped.wait(2)
+
+
+def test_cancelling_a_job_reaches_model_code(tmp_path):
+    stopped = threading.Event()
+    jm = JobManager(str(tmp_path / 'jobs.db'))
+    # Neither handler calls ctx.progress/check: only the job's token can stop them
+    jm.register('spin', lambda params, ctx: _spin(stopped))
+    jm.register('deadline', _expire)
+    job, _ = jm.submit('spin', {})
+    while jm.get(job['id'])['status'] != 'running':
+        time.sleep(0.01)
+    jm.cancel(job['id'])
+    assert _wait(jm, job['id'])['status'] == CANCELLED and stopped.is_set()
+    expired, _ = jm.submit('deadline', {})
+    assert _wait(jm, expired['id'])['status'] == FAILED
+    jm.shutdown()
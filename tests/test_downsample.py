@@ -0,0 +1,126 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+import src.api.main as api
+from src.downsample import lttb, ohlc
+from src.metrics import CACHE_REQUESTS
+
+
+def _reference_lttb(y, points):
+    """Textbook LTTB, one point at a time."""
+    n = len(y)
+    every = (n - 2) / (points - 2)
+    out, a = [0], 0
+    for i in range(points - 2):
+        lo, hi = int(round(i * every)) + 1, int(round((i + 1) * every)) + 1
+        nlo, nhi = hi, int(round((i + 2) * every)) + 1 if i < points - 3 else n
+        nx = np.mean(np.arange(nlo, nhi)) if i < points - 3 else n - 1
+        ny = np.mean(y[nlo:nhi]) if i < points - 3 else y[-1]
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((a - nx) * (y[j] - y[a]) - (a - j) * (ny - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        out.append(best)
+        a = best
+    return out + [n - 1]
+
+
+def _frame(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({'Open': close + rng.normal(0, 0.5, n), 'High': close + 2, 'Low': close - 2, 'Close': close,
+                         'Volume': rng.integers(1, 1000, n).astype(float)}, index=pd.bdate_range('2005-01-03', periods=n))
+
+
+def test_lttb_matches_the_reference_algorithm():
+    y = _frame(1000)['Close'].to_numpy()
+    rows, first, last = lttb(y, 50)
+    assert rows.tolist() == _reference_lttb(y, 50)
+    assert (first <= rows).all() and (rows <= last).all() and first[1:].tolist() == (last[:-1] + 1).tolist()
+
+
+def test_ohlc_buckets_keep_extremes_and_totals():
+    df = _frame(1003)
+    first, last, o, h, l, c, v = ohlc(*(df[k].to_numpy() for k in ('Open', 'High', 'Low', 'Close', 'Volume')), 100)
+    assert len(o) == 100 and first[0] == 0 and last[-1] == 1002
+    groups = df.groupby(np.repeat(np.arange(100), last - first + 1))
+    np.testing.assert_allclose(h, groups['High'].max())
+    np.testing.assert_allclose(l, groups['Low'].min())
+    np.testing.assert_allclose(o, groups['Open'].first())
+    np.testing.assert_allclose(c, groups['Close'].last())
+    assert v.sum() == df['Volume'].sum()
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    df = _frame()
+    monkeypatch.setattr(api, '_load_data', lambda ticker: df)
+    api._HISTORY_CACHE.clear()
+    api._HISTORY_DATA.clear()
+    yield TestClient(api.app)
+    api._HISTORY_CACHE.clear()
+    api._HISTORY_DATA.clear()
+
+
+def test_history_endpoint_downsamples_and_caches(client):
+    full = client.get('/api/v1/stocks/aaa/history').json()
+    assert len(full['data']) == 5000
+    assert set(full['data'][0]) == {'date', 'open', 'high', 'low', 'close', 'volume', 'sma5', 'sma20'}
+    hits = CACHE_REQUESTS.value(cache='history', result='hit')
+    body = client.get('/api/v1/stocks/aaa/history', params={'points': 600}).json()
+    assert len(body['data']) == 600 and body['downsampled'] == {'method': 'ohlc', 'points': 600, 'source_points': 5000}
+    assert body['data'][0]['bucket_start'] == full['data'][0]['date']
+    assert body['data'][-1]['bucket_end'] == full['data'][-1]['date']
+    assert client.get('/api/v1/stocks/aaa/history', params={'points': 600}).json() == body
+    assert CACHE_REQUESTS.value(cache='history', result='hit') == hits + 1
+    year = client.get('/api/v1/stocks/aaa/history', params={'range': '1Y', 'points': 100, 'method': 'lttb'}).json()
+    assert year['downsampled']['source_points'] == 252 and len(year['data']) == 100
+    assert {r['date'] for r in year['data']} <= {r['date'] for r in full['data'][-252:]}
+    assert client.get('/api/v1/stocks/aaa/history', params={'range': 'week'}).status_code == 400
+    assert client.get('/api/v1/stocks/aaa/history', params={'points': 10, 'method': 'mean'}).status_code == 400
+
+
+def test_history_cache_hit_skips_the_data_load_and_sees_restatements(client, monkeypatch):
+    frames = [_frame(300)]
+    loads = []
+    monkeypatch.setattr(api, '_load_data', lambda ticker: loads.append(ticker) or frames[-1])
+    first = client.get('/api/v1/stocks/bbb/history', params={'points': 50}).json()
+    assert client.get('/api/v1/stocks/bbb/history', params={'points': 50}).json() == first
+    assert loads == ['BBB']
+    # Same last date, restated close: once the data TTL lapses the response is rebuilt
+    restated = frames[0].copy()
+    restated.iloc[10, restated.columns.get_loc('High')] += 50
+    frames.append(restated)
+    monkeypatch.setattr(api, 'HISTORY_DATA_TTL', 0)
+    second = client.get('/api/v1/stocks/bbb/history', params={'points': 50}).json()
+    assert len(loads) == 2 and second != first
+    assert second['data'][1]['high'] == pytest.approx(restated['High'].iloc[10])
+
+
+def test_history_frames_are_bounded_and_expire(client, monkeypatch):
+    monkeypatch.setattr(api, 'HISTORY_DATA_SIZE', 2)
+    for t in ('aaa', 'bbb', 'ccc'):
+        client.get(f'/api/v1/stocks/{t}/history', params={'range': '1M'})
+    assert list(api._HISTORY_DATA) == ['BBB', 'CCC']
+    client.get('/api/v1/stocks/bbb/history', params={'range': '6M'})
+    client.get('/api/v1/stocks/ddd/history', params={'range': '1M'})
+    assert list(api._HISTORY_DATA) == ['BBB', 'DDD']
+    monkeypatch.setattr(api, 'HISTORY_DATA_TTL', 0)
+    client.get('/api/v1/stocks/eee/history', params={'range': '1M'})
+    assert list(api._HISTORY_DATA) == ['EEE']
+
+
+def test_downsampled_rows_carry_daily_smas(client):
+    df = _frame()
+    daily = {p: df['Close'].rolling(p).mean() for p in (5, 20)}
+    body = client.get('/api/v1/stocks/aaa/history', params={'range': '1Y', 'points': 50}).json()
+    # Each candle carries the daily SMA at its last bar, not an average of candles
+    for row in body['data']:
+        end = pd.Timestamp(row['bucket_end'])
+        assert row['sma5'] == pytest.approx(daily[5][end]) and row['sma20'] == pytest.approx(daily[20][end])
+    # Computed on the full series, so the first bar of a trimmed window already has its SMA 20
+    raw = client.get('/api/v1/stocks/aaa/history', params={'range': '1M'}).json()['data']
+    assert raw[0]['sma20'] == pytest.approx(daily[20][pd.Timestamp(raw[0]['date'])])
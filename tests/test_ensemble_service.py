@@ -0,0 +1,85 @@
+from __future__ import annotations
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pytest
+import src.core as core
+from src.cancellation import Cancelled, checkpoint
+from src.models import ensemble_service
+
+
+@pytest.fixture()
+def members(monkeypatch):
+    loads, seen, stopped = [], [], threading.Event()
+    df = pd.DataFrame({'Close': [10.0, 11.0]}, index=pd.bdate_range('2024-01-01', periods=2))
+    monkeypatch.setattr(core, '_load_data', lambda ticker: loads.append(ticker) or df)
+    monkeypatch.setattr(core, '_feature_engineer', lambda frame: frame.assign(Feature=1.0))
+
+    def rf(ticker, days, df=None, fe=None):
+        seen.append((df, fe))
+        return {'predictions': [1.0] * days, 'intervals': [[0.0, 2.0]] * days, 'confidence': 0.5}
+
+    def arima(ticker, days, df=None):
+        seen.append((df, None))
+        return {'predictions': [4.0] * days, 'confidence': 1.0}
+
+    def lstm(ticker, days):
+        try:
+            while True:
+                checkpoint()
+                time.sleep(0.01)
+        except Cancelled:
+            stopped.set()
+            raise
+
+    def xgb(ticker, days):
+        raise ValueError('boom')
+
+    funcs = {'rf': rf, 'arima': arima, 'lstm': lstm, 'xgb': xgb}
+    monkeypatch.setattr(ensemble_service, '_member_fn', lambda m, which: funcs.get(m))
+    monkeypatch.setenv('ENSEMBLE_WEIGHTS', 'rf=2,arima=1,lstm=3')
+    monkeypatch.setenv('ENSEMBLE_TIMEOUTS', 'lstm=0.2')
+    return loads, seen, stopped
+
+
+def test_slow_and_failing_members_are_dropped_with_renormalised_weights(members):
+    loads, seen, stopped = members
+    out = ensemble_service.predict_stock_ensemble('AAA', 3)
+    np.testing.assert_allclose(out['predictions'], [2.0] * 3)  # (2 * 1 + 1 * 4) / 3
+    np.testing.assert_allclose(out['intervals'][0], [(2 * 0 + 4) / 3, (2 * 2 + 4) / 3])
+    m = out['members']
+    assert m['rf']['status'] == 'ok' and m['arima']['status'] == 'ok'
+    assert m['lstm']['status'] == 'timeout' and m['xgb'] == {**m['xgb'], 'status': 'error', 'error': 'boom'}
+    assert m['transformer']['status'] == 'unavailable'
+    assert m['rf']['weight'] == pytest.approx(2 / 3) and m['lstm']['weight'] == 0.0
+    assert all(r['latency_ms'] >= 0 for r in m.values()) and m['lstm']['latency_ms'] >= 200
+    # Inputs were loaded once and shared with the members that take them
+    assert loads == ['AAA'] and seen[0][0] is seen[1][0]
+    fes = [fe for _, fe in seen if fe is not None]
+    assert len(fes) == 1 and 'Feature' in fes[0]
+    assert stopped.wait(2)
+
+
+def test_all_members_missing_models_is_not_found(monkeypatch):
+    monkeypatch.setattr(core, '_load_data', lambda ticker: pd.DataFrame({'Close': [1.0]}, index=pd.bdate_range('2024-01-01', periods=1)))
+    monkeypatch.setattr(core, '_feature_engineer', lambda frame: frame)
+
+    def missing(ticker, days):
+        raise FileNotFoundError('No model found for ticker')
+
+    monkeypatch.setattr(ensemble_service, '_member_fn', lambda m, which: missing)
+    with pytest.raises(FileNotFoundError):
+        ensemble_service.predict_stock_ensemble('AAA', 3)
+
+
+def test_member_timeout_starts_when_it_runs(members, monkeypatch):
+    _, _, stopped = members
+    monkeypatch.setenv('ENSEMBLE_MEMBERS', 'lstm,rf')
+    monkeypatch.setenv('ENSEMBLE_WORKERS', '1')
+    monkeypatch.setenv('ENSEMBLE_TIMEOUTS', 'lstm=0.2,rf=0.1')
+    out = ensemble_service.predict_stock_ensemble('AAA', 2)
+    # rf waited behind lstm for longer than its own timeout but still got its full budget once started
+    assert out['members']['lstm']['status'] == 'timeout' and stopped.is_set()
+    assert out['members']['rf']['status'] == 'ok' and out['members']['rf']['latency_ms'] < 100
+    np.testing.assert_allclose(out['predictions'], [1.0, 1.0])
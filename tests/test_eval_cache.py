@@ -0,0 +1,55 @@
+from __future__ import annotations
+import os
+import pytest
+from benchmarks.env import OfflineEnv
+
+TICKER = 'EVC'
+
+
+@pytest.fixture()
+def env(monkeypatch):
+    with OfflineEnv([TICKER], days=420) as env:
+        env.ensure_model(TICKER)
+        env.core.clear_eval_cache()
+        calls = []
+        real = env.core._feature_engineer
+        monkeypatch.setattr(env.core, '_feature_engineer', lambda df: calls.append(1) or real(df))
+        env.calls = calls
+        yield env
+        env.core.clear_eval_cache()
+
+
+def _reports(env):
+    return env.core.get_store(env.core.REPORTS_DIR).query(ticker=TICKER, kind='metrics')
+
+
+def test_repeat_evaluation_is_memoized_and_written_once(env):
+    first = env.core.evaluate_model(TICKER)
+    second = env.core.evaluate_model(TICKER)
+    assert second == first and len(env.calls) == 1
+    assert len(_reports(env)) == 1
+    # A fresh process finds the report on disk instead of recomputing
+    env.core.clear_eval_cache()
+    assert env.core.evaluate_model(TICKER) == first and len(env.calls) == 1
+    # Mutating a returned result does not leak into the cache
+    second['test_metrics']['rmse'] = -1
+    assert env.core.evaluate_model(TICKER)['test_metrics'] == first['test_metrics']
+
+
+def test_changed_data_is_recomputed(env):
+    first = env.core.evaluate_model(TICKER)
+    raw = os.path.join(env.dir, 'data', 'raw')
+    path = os.path.join(raw, os.listdir(raw)[0])
+    with open(path) as f:
+        lines = f.read().splitlines()
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines[:-1]) + '\n')
+    second = env.core.evaluate_model(TICKER)
+    assert second['data_hash'] != first['data_hash'] and len(env.calls) == 2
+    assert len(_reports(env)) == 2
+
+
+def test_walkforward_is_memoized(env):
+    a = env.core.evaluate_model_walkforward(TICKER, steps=10)
+    assert env.core.evaluate_model_walkforward(TICKER, steps=10) == a
+    assert len(env.calls) == 1
@@ -0,0 +1,43 @@
+from __future__ import annotations
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from src.fast_forest import CompiledForest, compile_forest
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 8))
+    y = 3 * X[:, 0] + np.sin(X[:, 1]) + 0.1 * rng.normal(size=400)
+    return X, y, rng.normal(size=(700, 8))
+
+
+@pytest.mark.parametrize('params', [
+    dict(n_estimators=50, random_state=42, n_jobs=1),
+    dict(n_estimators=30, random_state=0, n_jobs=1, max_depth=4, min_samples_leaf=5),
+])
+def test_predictions_are_bit_identical_to_sklearn(data, params):
+    X, y, X_new = data
+    model = RandomForestRegressor(**params).fit(X, y)
+    compiled = CompiledForest(model, max_batch=64)
+    assert np.array_equal(compiled.predict(X_new), model.predict(X_new))
+    assert np.array_equal(compiled.predict(X_new[-1:]), model.predict(X_new[-1:]))
+    assert np.array_equal(compiled.predict(X_new[0]), model.predict(X_new[:1]))
+
+
+def test_nan_rows_fall_back_to_sklearn(data):
+    X, y, X_new = data
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    row = X_new[:1].copy()
+    row[0, 2] = np.nan
+    assert np.array_equal(CompiledForest(model).predict(row), model.predict(row))
+
+
+def test_compile_forest_rejects_unfitted_and_multioutput(data):
+    X, y, _ = data
+    assert compile_forest(RandomForestRegressor()) is None
+    multi = RandomForestRegressor(n_estimators=5).fit(X, np.c_[y, y])
+    assert compile_forest(multi) is None
+    with pytest.raises(ValueError):
+        compile_forest(RandomForestRegressor(n_estimators=5).fit(X, y)).predict(X[:, :3])
@@ -0,0 +1,51 @@
+from __future__ import annotations
+import os
+import pytest
+from benchmarks.env import OfflineEnv
+
+TICKER = 'FCC'
+
+
+def _strip(out):
+    return {k: v for k, v in out.items() if k != 'timestamp'}
+
+
+@pytest.fixture()
+def env(monkeypatch):
+    with OfflineEnv([TICKER], days=420) as env:
+        env.ensure_model(TICKER)
+        env.core.clear_forecast_cache()
+        steps = []
+        real = env.core._bundle_predict
+        monkeypatch.setattr(env.core, '_bundle_predict', lambda bundle, X: steps.append(1) or real(bundle, X))
+        env.steps = steps
+        yield env
+        env.core.clear_forecast_cache()
+
+
+def test_shorter_horizons_are_prefixes_and_longer_ones_resume(env):
+    month = env.core.predict_stock(TICKER, 30)
+    assert len(env.steps) == 30
+    week = env.core.predict_stock(TICKER, 7)
+    assert len(env.steps) == 30
+    assert week['predictions'] == month['predictions'][:7] and week['intervals'] == month['intervals'][:7]
+    quarter = env.core.predict_stock(TICKER, 90)
+    assert len(env.steps) == 90 and quarter['predictions'][:30] == month['predictions']
+    # Resuming gives exactly what a rollout from scratch gives
+    env.core.clear_forecast_cache()
+    assert _strip(env.core.predict_stock(TICKER, 90)) == _strip(quarter)
+    # Callers mutating a result do not touch the cache
+    week['intervals'][0][0] = -1.0
+    assert env.core.predict_stock(TICKER, 7)['intervals'] == month['intervals'][:7]
+
+
+def test_new_data_starts_a_new_trajectory(env):
+    env.core.predict_stock(TICKER, 10)
+    raw = os.path.join(env.dir, 'data', 'raw')
+    path = os.path.join(raw, os.listdir(raw)[0])
+    with open(path) as f:
+        lines = f.read().splitlines()
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines[:-1]) + '\n')
+    env.core.predict_stock(TICKER, 10)
+    assert len(env.steps) == 20
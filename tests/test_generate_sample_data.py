@@ -0,0 +1,43 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from generate_sample_data import generate_market, generate_sample_data, write_market_parquet
+
+
+def test_sample_data_is_reproducible_and_leaves_global_rng_alone():
+    np.random.seed(1)
+    expected = np.random.rand()
+    np.random.seed(1)
+    a = generate_sample_data(days=200, seed=7)
+    assert np.random.rand() == expected
+    b = generate_sample_data(days=200, seed=7)
+    pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True))
+    assert (a['High'] >= a[['Open', 'Close']].max(axis=1)).all()
+    assert (a['Low'] <= a[['Open', 'Close']].min(axis=1)).all()
+
+
+def test_market_ohlc_consistency_and_correlation():
+    df = generate_market(8, years=2, dynamics='regime', correlation=0.6, seed=3, chunk_rows=1000)
+    assert len(df) == 8 * 504
+    assert (df['High'] >= df[['Open', 'Close']].max(axis=1)).all()
+    assert (df['Low'] <= df[['Open', 'Close']].min(axis=1)).all()
+    assert (df['Volume'] > 0).all()
+    returns = np.log(df.pivot(index='Date', columns='Ticker', values='Close')).diff().dropna()
+    corr = returns.corr().values[np.triu_indices(8, 1)]
+    assert 0.45 < corr.mean() < 0.75
+
+
+def test_market_chunking_keeps_price_paths_continuous():
+    df = generate_market(['AAA'], years=1, correlation=0.0, seed=0, chunk_rows=50)
+    gaps = np.log(df['Open'] / df['Close'].shift(1)).dropna()
+    assert gaps.abs().max() < 0.05
+
+
+def test_intraday_parquet_streaming(tmp_path):
+    path = str(tmp_path / 'market.parquet')
+    summary = write_market_parquet(path, tickers=3, years=0.02, freq='30min', chunk_rows=20)
+    df = pd.read_parquet(path)
+    assert summary['rows'] == len(df) == 3 * 5 * 13
+    times = df['Date'].dt.strftime('%H:%M')
+    assert times.min() == '09:30' and times.max() == '15:30'
+    assert sorted(df['Ticker'].unique()) == ['T0000', 'T0001', 'T0002']
@@ -0,0 +1,171 @@
+from __future__ import annotations
+import threading
+import time
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+import src.api.main as api
+from src.cancellation import checkpoint
+from src.jobs import JobManager, CANCELLED, FAILED, PENDING, SUCCEEDED, report_progress
+
+
+def _wait(jm, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = jm.get(job_id)
+        if job['status'] not in (PENDING, 'running'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def test_jobs_run_dedupe_and_report_progress(tmp_path):
+    gate = threading.Event()
+
+    def handler(params, ctx):
+        ctx.progress(0.5, 'halfway')
+        gate.wait(5)
+        if params['x'] < 0:
+            raise ValueError('negative')
+        return {'double': params['x'] * 2}
+
+    jm = JobManager(str(tmp_path / 'jobs.db'))
+    jm.register('calc', handler, workers=1)
+    a, created = jm.submit('calc', {'x': 2})
+    b, created_b = jm.submit('calc', {'x': 2})
+    assert created and not created_b and a['id'] == b['id']
+    c, _ = jm.submit('calc', {'x': -1})
+    gate.set()
+    assert _wait(jm, a['id'])['result'] == {'double': 4}
+    failed = _wait(jm, c['id'])
+    assert failed['status'] == FAILED and failed['error'] == 'negative'
+    # Finished jobs are not reused
+    assert jm.submit('calc', {'x': 2})[1]
+    jm.shutdown()
+
+
+def test_cancel_pending_and_running_jobs(tmp_path):
+    started, release = threading.Event(), threading.Event()
+
+    def handler(params, ctx):
+        started.set()
+        while not release.is_set():
+            ctx.progress(0.1)
+            time.sleep(0.01)
+        return 'done'
+
+    jm = JobManager(str(tmp_path / 'jobs.db'))
+    jm.register('slow', handler, workers=1)
+    running, _ = jm.submit('slow', {'n': 1})
+    queued, _ = jm.submit('slow', {'n': 2})
+    assert started.wait(5)
+    assert jm.cancel(queued['id'])['status'] == CANCELLED
+    jm.cancel(running['id'])
+    assert _wait(jm, running['id'])['status'] == CANCELLED
+    release.set()
+    jm.shutdown()
+
+
+def test_pending_jobs_resume_after_restart(tmp_path):
+    db = str(tmp_path / 'jobs.db')
+    first = JobManager(db)
+    first.register('calc', lambda p, ctx: p['x'] + 1)
+    first._started = True  # no workers: simulate a process that died before running the job
+    first._enqueue = lambda kind, job_id: None
+    job, _ = first.submit('calc', {'x': 1})
+    second = JobManager(db)
+    second.register('calc', lambda p, ctx: p['x'] + 1)
+    assert second.start() == 1
+    assert _wait(second, job['id'])['result'] == 2
+    second.shutdown()
+
+
+
+def test_only_jobs_with_expired_leases_are_reclaimed(tmp_path, monkeypatch):
+    import src.jobs as jobs
+    db = str(tmp_path / 'jobs.db')
+    seed = JobManager(db)
+    seed.register('calc', lambda p, ctx: p['x'] + 1)
+    seed._started = True
+    seed._enqueue = lambda kind, job_id: None
+    live, _ = seed.submit('calc', {'x': 1})
+    dead, _ = seed.submit('calc', {'x': 2})
+    now = time.time()
+    # One job held by a worker that is still heartbeating, one by a worker that died
+    seed._update(live['id'], status='running', owner='other', heartbeat_at=now)
+    seed._update(dead['id'], status='running', owner='gone', heartbeat_at=now - 2 * jobs.JOBS_LEASE_SEC)
+    worker = JobManager(db)
+    worker.register('calc', lambda p, ctx: p['x'] + 1)
+    assert worker.start() == 1
+    assert _wait(worker, dead['id'])['result'] == 3
+    assert worker.get(live['id'])['status'] == 'running' and worker.get(live['id'])['owner'] == 'other'
+    # Once the other worker stops heartbeating, the background check takes its job over
+    monkeypatch.setattr(jobs, 'JOBS_LEASE_SEC', 0.2)
+    worker2 = JobManager(db)
+    worker2.register('calc', lambda p, ctx: p['x'] + 1)
+    worker2.start()
+    assert _wait(worker2, live['id'])['result'] == 2
+    worker.shutdown()
+    worker2.shutdown()
+
+
+def test_report_progress_updates_the_job_and_honours_remote_cancels(tmp_path):
+    db = str(tmp_path / 'jobs.db')
+    halfway, resume = threading.Event(), threading.Event()
+
+    def handler(params, ctx):
+        for step in range(1, 101):
+            checkpoint()
+            report_progress(step / 100, f'step {step}')
+            if step == 50:
+                halfway.set()
+                resume.wait(5)
+        return 'done'
+
+    worker = JobManager(db)
+    worker.register('walk', handler)
+    job, _ = worker.submit('walk', {})
+    assert halfway.wait(5)
+    running = worker.get(job['id'])
+    assert running['progress'] == 0.5 and running['message'] == 'step 50'
+    # Cancel through another worker's manager: the next progress report stops the job
+    JobManager(db).cancel(job['id'])
+    resume.set()
+    assert _wait(worker, job['id'])['status'] == CANCELLED
+    assert worker.get(job['id'])['progress'] < 1.0
+    worker.shutdown()
+    assert report_progress(0.5) is None  # no job in this context
+
+
+def test_server_start_resumes_persisted_jobs(tmp_path, monkeypatch):
+    db = str(tmp_path / 'jobs.db')
+    previous = JobManager(db)
+    previous.register('train', api._train_job)
+    previous._started = True  # a server that stopped before running the job
+    previous._enqueue = lambda kind, job_id: None
+    job, _ = previous.submit('train', {'ticker': 'AAA'})
+    monkeypatch.setattr(api, 'JOBS_DB', db)
+    monkeypatch.setattr(api, '_job_manager', None)
+    monkeypatch.setattr(api, 'train_model', lambda t: SimpleNamespace(
+        ticker=t, model_path=f'models/{t}.pkl', metrics={'rmse': 1.0}, timestamp='20240101000000'))
+    with TestClient(api.app) as client:
+        jm = api._job_manager
+        # No job endpoint was called: start-up alone queued the job
+        assert _wait(jm, job['id'])['result']['model_path'] == 'models/AAA.pkl'
+        client.get('/api/v1/health')
+    assert api._job_manager is None
+
+
+def test_tune_endpoint_returns_a_job(tmp_path, monkeypatch):
+    jm = JobManager(str(tmp_path / 'jobs.db'))
+    jm.register('tune', api._tune_job)
+    monkeypatch.setattr(api, '_job_manager', jm)
+    monkeypatch.setattr(api, 'train_stock_lstm_tuned', lambda t, n, timeout: f'models/{t}_{n}.json')
+    client = TestClient(api.app)
+    r = client.post('/api/v1/tune', json={'ticker': 'aapl', 'n_trials': 3})
+    assert r.status_code == 202
+    job_id = r.json()['job_id']
+    assert _wait(jm, job_id)['status'] == SUCCEEDED
+    assert client.get(f'/api/v1/jobs/{job_id}/progress').json()['progress'] == 1.0
+    assert client.get(f'/api/v1/jobs/{job_id}/result').json()['data'] == {'ticker': 'AAPL', 'bundle': 'models/AAPL_3.json'}
+    assert client.get('/api/v1/jobs/nope').status_code == 404
+    jm.shutdown()
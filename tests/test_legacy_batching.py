@@ -0,0 +1,112 @@
+from __future__ import annotations
+import threading
+import time
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+import api.main as legacy
+
+
+class FakeModel:
+    """Keras-like model: fixed per-call overhead, output is the window sum."""
+
+    def __init__(self, overhead: float = 0.02):
+        self.overhead = overhead
+        self.calls = []
+
+    def predict(self, X, verbose=0):
+        self.calls.append(len(X))
+        time.sleep(self.overhead)
+        return X.sum(axis=(1, 2)).reshape(-1, 1)
+
+
+def _concurrent(batcher, n):
+    results = [None] * n
+
+    def _worker(i):
+        results[i] = batcher.predict(np.full((legacy.LOOKBACK, 1), float(i)))
+    threads = [threading.Thread(target=_worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_windows_are_coalesced_and_fanned_back():
+    model = FakeModel()
+    batcher = legacy.MicroBatcher(model, max_size=8, max_wait_ms=50)
+    results = _concurrent(batcher, 16)
+    for i, r in enumerate(results):
+        assert r.shape == (1, 1) and r[0, 0] == i * legacy.LOOKBACK
+    assert sum(model.calls) == 16
+    assert len(model.calls) < 16 and max(model.calls) <= 8
+    stats = batcher.stats()
+    assert stats['requests'] == 16 and stats['batches'] == len(model.calls)
+    assert stats['largest_batch'] == max(model.calls)
+
+
+def test_model_errors_reach_every_waiting_caller():
+    class Broken:
+        def predict(self, X, verbose=0):
+            raise RuntimeError('boom')
+    batcher = legacy.MicroBatcher(Broken(), max_size=4, max_wait_ms=1)
+    try:
+        batcher.predict(np.zeros((legacy.LOOKBACK, 1)))
+    except RuntimeError as e:
+        assert str(e) == 'boom'
+    else:
+        raise AssertionError('expected the model error')
+
+
+def test_health_reports_batching(monkeypatch):
+    model = FakeModel(overhead=0.0)
+    monkeypatch.setitem(legacy.MODEL_CACHE, 'fake.keras', {'model': model})
+    legacy._predict_window(legacy.MODEL_CACHE['fake.keras'], np.ones((legacy.LOOKBACK, 1)))
+    body = TestClient(legacy.app).get('/health').json()
+    assert body['batching']['max_size'] == legacy.BATCH_MAX_SIZE
+    assert body['batching']['models']['fake.keras']['requests'] == 1
+
+
+def test_close_stops_the_worker_and_later_windows_run_directly():
+    model = FakeModel(overhead=0.0)
+    batcher = legacy.MicroBatcher(model, max_size=4, max_wait_ms=1)
+    batcher.predict(np.ones((legacy.LOOKBACK, 1)))
+    worker = batcher._thread
+    batcher.close()
+    worker.join(2)
+    assert not worker.is_alive()
+    assert batcher.predict(np.ones((legacy.LOOKBACK, 1)))[0, 0] == legacy.LOOKBACK
+    assert batcher._thread is None and batcher.stats()['requests'] == 1
+
+
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_fatal_model_error_fails_the_batch_and_a_new_worker_takes_over():
+    class Fatal(FakeModel):
+        def predict(self, X, verbose=0):
+            if not self.calls:
+                self.calls.append(len(X))
+                raise SystemExit(1)
+            return super().predict(X, verbose)
+    batcher = legacy.MicroBatcher(Fatal(overhead=0.0), max_size=4, max_wait_ms=1)
+    try:
+        batcher.predict(np.zeros((legacy.LOOKBACK, 1)))
+    except SystemExit:
+        pass
+    else:
+        raise AssertionError('expected the model error')
+    # The dead worker is replaced on the next call instead of leaving it blocked forever
+    assert batcher.predict(np.ones((legacy.LOOKBACK, 1)))[0, 0] == legacy.LOOKBACK
+
+
+def test_evicted_models_have_their_batcher_closed(monkeypatch):
+    monkeypatch.setattr(legacy, 'MODEL_CACHE', legacy.OrderedDict())
+    monkeypatch.setattr(legacy, 'MODEL_CACHE_SIZE', 1)
+    first = legacy._cached_model('a.keras', lambda: {'model': FakeModel(overhead=0.0)})
+    legacy._predict_window(first, np.ones((legacy.LOOKBACK, 1)))
+    worker = first['batcher']._thread
+    assert legacy._cached_model('a.keras', lambda: None) is first
+    legacy._cached_model('b.keras', lambda: {'model': FakeModel(overhead=0.0)})
+    assert list(legacy.MODEL_CACHE) == ['b.keras']
+    worker.join(2)
+    assert not worker.is_alive()
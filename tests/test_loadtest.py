@@ -0,0 +1,44 @@
+from __future__ import annotations
+import asyncio
+import csv
+import httpx
+import pytest
+from benchmarks.env import OfflineEnv
+from benchmarks.loadtest import install_stub_models, parse_mix, run_load, summarize, write_csv
+
+
+def test_parse_mix_normalizes_and_rejects_unknown_endpoints():
+    assert parse_mix('predict=3,history=1') == {'predict': 0.75, 'history': 0.25}
+    with pytest.raises(ValueError):
+        parse_mix('train=1')
+
+
+def test_summarize_rates_and_percentiles():
+    records = [{'endpoint': 'history', 'latency_ms': float(i), 'outcome': 'ok'} for i in range(1, 101)]
+    records[0]['outcome'] = 'error'
+    records[1]['outcome'] = 'timeout'
+    s = summarize(records, elapsed=2.0)
+    assert s['overall']['throughput_rps'] == 50.0
+    assert s['endpoints']['history']['p50_ms'] == pytest.approx(50.5)
+    assert s['overall']['error_rate'] == s['overall']['timeout_rate'] == 0.01
+
+
+def test_in_process_run_with_stub_models(tmp_path):
+    tickers = ['LTA', 'LTB']
+    with OfflineEnv(tickers=tickers, days=300) as env:
+        api = install_stub_models(env)
+
+        async def _run():
+            transport = httpx.ASGITransport(app=api.app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+                return await run_load(client, parse_mix('predict=1,history=1,indicators=1,backtest=1'),
+                                      tickers, users=3, requests=24)
+        result = asyncio.run(_run())
+    records = result['records']
+    assert len(records) == 24
+    assert all(r['outcome'] == 'ok' for r in records), records
+    assert {r['endpoint'] for r in records} == {'predict', 'history', 'indicators', 'backtest'}
+    path = str(tmp_path / 'load.csv')
+    write_csv(records, path)
+    rows = list(csv.DictReader(open(path)))
+    assert len(rows) == 24 and float(rows[0]['t']) <= float(rows[-1]['t'])
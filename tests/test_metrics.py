@@ -0,0 +1,57 @@
+from __future__ import annotations
+from fastapi.testclient import TestClient
+import src.api.main as api
+from src.metrics import PREDICTIONS, REGISTRY, Histogram, Registry, span, start_request_timings, end_request_timings, server_timing_header
+
+
+client = TestClient(api.app)
+
+
+def test_metrics_endpoint_exposes_request_latency():
+    client.get('/api/v1/health')
+    r = client.get('/metrics')
+    assert r.status_code == 200
+    assert r.headers['content-type'].startswith('text/plain')
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/v1/health",status="200",le="+Inf"}' in r.text
+    assert '# TYPE http_requests_in_flight gauge' in r.text
+
+
+def test_predict_records_counts_and_server_timing(monkeypatch):
+    def fake_predict(ticker, days):
+        with span('inference'):
+            return {'ticker': ticker, 'predictions': [1.0] * days}
+    monkeypatch.setattr(api, 'predict_stock', fake_predict)
+    before = PREDICTIONS.value(model='rf', status='ok')
+    r = client.post('/api/v1/predict', json={'ticker': 'AAPL', 'days': 3})
+    assert r.status_code == 200
+    assert PREDICTIONS.value(model='rf', status='ok') == before + 1
+    stages = [part.split(';')[0] for part in r.headers['Server-Timing'].split(', ')]
+    assert 'inference' in stages and 'model_rf' in stages and 'total' in stages
+
+
+def test_span_accumulates_request_timings():
+    timings, token = start_request_timings()
+    try:
+        with span('load_data'):
+            pass
+        with span('load_data'):
+            pass
+    finally:
+        end_request_timings(token)
+    assert list(timings) == ['load_data']
+    assert server_timing_header({'load_data': 0.0125}) == 'load_data;dur=12.50'
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    h = Histogram('test_latency_seconds', 'Test histogram.', ('stage',), buckets=(0.1, 1.0), registry=registry)
+    for v in (0.05, 0.5, 5.0):
+        h.observe(v, stage='x')
+    lines = h.render()
+    assert 'test_latency_seconds_bucket{stage="x",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{stage="x",le="1.0"} 2' in lines
+    assert 'test_latency_seconds_bucket{stage="x",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{stage="x"} 3' in lines
+    # Built on a local registry, so it never shows up in /metrics
+    assert 'test_latency_seconds_count{stage="x"} 3' in registry.render()
+    assert 'test_latency_seconds' not in REGISTRY.render()
@@ -0,0 +1,105 @@
+from __future__ import annotations
+import json
+from collections import OrderedDict
+import os
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+import api.main as legacy
+import model_registry
+import stock_market_prediction as smp
+from numpy_lstm import NumpyLSTM, export_model
+
+
+class _Layer:
+    def __init__(self, config, weights):
+        self._config, self._weights = config, weights
+
+    def get_config(self):
+        return dict(self._config)
+
+    def get_weights(self):
+        return list(self._weights)
+
+
+def _export(path, seed=0, units=4):
+    """Write an LSTM-Dense export without TensorFlow."""
+    rng = np.random.default_rng(seed)
+    lstm = type('LSTM', (_Layer,), {})({}, [rng.normal(0, 0.4, (1, 4 * units)), rng.normal(0, 0.4, (units, 4 * units)),
+                                            rng.normal(0, 0.1, 4 * units)])
+    dense = type('Dense', (_Layer,), {})({'activation': 'linear'}, [rng.normal(0, 0.4, (units, 1)), np.zeros(1)])
+    return export_model(type('Model', (), {'layers': [lstm, dense]})(), str(path))
+
+
+def _write(models_dir, name, bundle):
+    with open(os.path.join(models_dir, name), 'w') as f:
+        json.dump(bundle, f)
+
+
+def _pooled(models_dir, tickers, created_at='20250102000000'):
+    npz = _export(os.path.join(models_dir, f'lstm_pooled_u_{created_at}.npz'))
+    model_path = npz.replace('.npz', '.keras')
+    open(model_path, 'w').close()
+    _write(models_dir, f'pooled_u_{created_at}_abc.pkl', {
+        'pooled': True, 'name': 'u', 'model_path': model_path, 'npz_path': npz, 'created_at': created_at,
+        'hash': 'abc', 'tickers': {t: {'scaler_min_': [-i * 0.1], 'scaler_scale_': [0.01]} for i, t in enumerate(tickers)},
+    })
+    return npz
+
+
+def _frames(tickers, n=80):
+    idx = pd.date_range('2024-01-01', periods=n, freq='B', name='Date')
+    return {t: pd.DataFrame({'Close': 100 + 10 * i + np.sin(np.arange(n) / (3 + i))}, index=idx)
+            for i, t in enumerate(tickers)}
+
+
+def test_find_bundle_prefers_newest_and_resolves_pooled_scalers(tmp_path):
+    d = str(tmp_path)
+    _write(d, 'model_AAA_20250101000000_old.pkl', {'ticker': 'AAA', 'created_at': '20250101000000',
+                                                    'scaler_min_': [0.0], 'scaler_scale_': [1.0]})
+    with open(os.path.join(d, 'model_AAA_20250301000000.pkl'), 'wb') as f:
+        f.write(b'\x80\x04joblib')  # RandomForest bundle sharing the directory
+    _pooled(d, ['AAA', 'BBB'])
+    a = model_registry.find_bundle('AAA', d)
+    assert a['pooled'] and a['ticker'] == 'AAA' and a['scaler_min_'] == [0.0] and 'tickers' not in a
+    assert model_registry.find_bundle('BBB', d)['scaler_min_'] == [-0.1]
+    assert model_registry.find_bundle('CCC', d) is None
+    _write(d, 'model_AAA_20250201000000_new.pkl', {'ticker': 'AAA', 'created_at': '20250201000000',
+                                                    'scaler_min_': [0.5], 'scaler_scale_': [1.0]})
+    assert not model_registry.find_bundle('AAA', d).get('pooled')
+    kinds = {b['kind']: b['tickers'] for b in model_registry.list_bundles(d)}
+    assert kinds['pooled'] == ['AAA', 'BBB']
+
+
+def test_predict_many_scores_a_pooled_universe_in_one_pass(tmp_path, monkeypatch):
+    tickers = ['AAA', 'BBB', 'CCC']
+    npz = _pooled(str(tmp_path), tickers)
+    monkeypatch.setattr(smp, 'MODELS_DIR', str(tmp_path))
+    model = NumpyLSTM.load(npz)
+    calls = []
+    monkeypatch.setattr(smp, 'load_lstm', lambda *a: calls.append(a) or model)
+    frames = _frames(tickers)
+    out = smp.predict_many(tickers, frames)
+    assert len(calls) == 1 and [o['ticker'] for o in out] == tickers
+    for i, (t, o) in enumerate(zip(tickers, out)):
+        window = frames[t]['Close'].values[-smp.LOOKBACK:] * 0.01 - i * 0.1
+        single = model.predict(window.reshape(1, -1, 1))[0, 0]
+        assert np.isclose(o['prediction_next'], (single + i * 0.1) / 0.01, rtol=1e-5)
+        assert o['pooled'] and o['model_version'] == 'abc'
+
+
+def test_legacy_batch_endpoint_matches_single_predictions(tmp_path, monkeypatch):
+    tickers = ['AAA', 'BBB']
+    _pooled(str(tmp_path), tickers)
+    frames = _frames(tickers)
+    monkeypatch.setattr(legacy, 'MODELS_DIR', str(tmp_path))
+    monkeypatch.setattr(legacy, 'MODEL_CACHE', OrderedDict())
+    monkeypatch.setattr(legacy, 'BATCH_MAX_SIZE', 1)
+    monkeypatch.setattr(legacy, '_read_closes', lambda t, p, i: frames[t])
+    client = TestClient(legacy.app)
+    batch = client.post('/predict/batch', json={'tickers': ['aaa', 'bbb']}).json()['predictions']
+    single = [client.post('/predict', json={'ticker': t}).json() for t in tickers]
+    assert len(legacy.MODEL_CACHE) == 1
+    for b, s in zip(batch, single):
+        assert b['ticker'] == s['ticker'] and np.isclose(b['prediction_next'], s['prediction_next'], rtol=1e-5)
+    assert batch[0]['prediction_next'] != batch[1]['prediction_next']
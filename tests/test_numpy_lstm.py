@@ -0,0 +1,98 @@
+from __future__ import annotations
+import math
+import numpy as np
+import pytest
+import numpy_lstm
+from numpy_lstm import NumpyLSTM, export_model, load_lstm
+
+
+class _Layer:
+    def __init__(self, config, weights):
+        self._config, self._weights = config, weights
+
+    def get_config(self):
+        return dict(self._config)
+
+    def get_weights(self):
+        return list(self._weights)
+
+
+def _layer(kind, config, weights=()):
+    return type(kind, (_Layer,), {})(config, weights)
+
+
+def _keras_like_model(rng, units=5, features=1):
+    """Stand-in exposing the Keras layer API for an LSTM(rs)-Dropout-LSTM-Dropout-Dense stack."""
+    def lstm_weights(n_in):
+        return [rng.normal(0, 0.4, (n_in, 4 * units)).astype(np.float32),
+                rng.normal(0, 0.4, (units, 4 * units)).astype(np.float32),
+                rng.normal(0, 0.1, 4 * units).astype(np.float32)]
+    return type('Model', (), {'layers': [
+        _layer('InputLayer', {}),
+        _layer('LSTM', {'return_sequences': True, 'activation': 'tanh', 'recurrent_activation': 'sigmoid'}, lstm_weights(features)),
+        _layer('Dropout', {'rate': 0.2}),
+        _layer('LSTM', {'return_sequences': False}, lstm_weights(units)),
+        _layer('Dropout', {'rate': 0.2}),
+        _layer('Dense', {'activation': 'linear'}, [rng.normal(0, 0.4, (units, 1)).astype(np.float32),
+                                                    np.array([0.3], dtype=np.float32)]),
+    ]})()
+
+
+def _reference(model, window):
+    """Scalar, loop-per-unit LSTM following the Keras equations (gate order i, f, c, o)."""
+    sig = lambda v: 1.0 / (1.0 + math.exp(-v))
+    seq = [list(map(float, row)) for row in window]
+    lstm_layers = [l for l in model.layers if type(l).__name__ == 'LSTM']
+    for layer in lstm_layers:
+        W, U, b = layer.get_weights()
+        u = U.shape[0]
+        h, c, out = [0.0] * u, [0.0] * u, []
+        for x in seq:
+            z = [b[j] + sum(x[k] * W[k, j] for k in range(len(x))) + sum(h[k] * U[k, j] for k in range(u))
+                 for j in range(4 * u)]
+            c = [sig(z[u + j]) * c[j] + sig(z[j]) * math.tanh(z[2 * u + j]) for j in range(u)]
+            h = [sig(z[3 * u + j]) * math.tanh(c[j]) for j in range(u)]
+            out.append(h)
+        seq = out
+    kernel, bias = model.layers[-1].get_weights()
+    return sum(seq[-1][k] * kernel[k, 0] for k in range(len(seq[-1]))) + bias[0]
+
+
+def test_forward_pass_matches_reference(tmp_path):
+    rng = np.random.default_rng(0)
+    model = _keras_like_model(rng)
+    path = export_model(model, str(tmp_path / 'm.npz'))
+    windows = rng.uniform(0, 1, (4, 12, 1))
+    out = NumpyLSTM.load(path).predict(windows, verbose=0)
+    assert out.shape == (4, 1)
+    expected = [_reference(model, w) for w in windows]
+    np.testing.assert_allclose(out[:, 0], expected, rtol=1e-5, atol=1e-6)
+
+
+def test_export_rejects_unsupported_layers(tmp_path):
+    model = type('Model', (), {'layers': [_layer('GRU', {}, [])]})()
+    with pytest.raises(ValueError):
+        export_model(model, str(tmp_path / 'm.npz'))
+
+
+def test_load_prefers_numpy_export_without_tensorflow(tmp_path, monkeypatch):
+    rng = np.random.default_rng(1)
+    model_path = str(tmp_path / 'lstm_X_1.keras')
+    export_model(_keras_like_model(rng), numpy_lstm.npz_path_for(model_path))
+    assert isinstance(load_lstm(model_path), NumpyLSTM)
+    monkeypatch.setattr(numpy_lstm, 'LSTM_BACKEND', 'numpy')
+    with pytest.raises(FileNotFoundError):
+        load_lstm(str(tmp_path / 'missing.keras'))
+
+
+def test_matches_keras_when_available(tmp_path):
+    tf = pytest.importorskip('tensorflow')
+    from tensorflow.keras.layers import LSTM, Dense, Dropout
+    keras_model = tf.keras.Sequential([
+        tf.keras.Input((60, 1)), LSTM(50, return_sequences=True), Dropout(0.2),
+        LSTM(50, return_sequences=True), Dropout(0.2), LSTM(50), Dropout(0.2), Dense(1),
+    ])
+    windows = np.random.default_rng(2).uniform(0, 1, (8, 60, 1)).astype(np.float32)
+    path = export_model(keras_model, str(tmp_path / 'k.npz'))
+    np.testing.assert_allclose(NumpyLSTM.load(path).predict(windows), keras_model.predict(windows, verbose=0),
+                               rtol=1e-4, atol=1e-5)
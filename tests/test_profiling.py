@@ -0,0 +1,61 @@
+from __future__ import annotations
+import os
+import pstats
+import time
+from fastapi.testclient import TestClient
+import src.api.main as api
+import src.profiling as profiling
+from src.profiling import profile
+
+
+client = TestClient(api.app)
+
+
+def _busy(seconds: float) -> int:
+    end = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+def test_sample_mode_writes_folded_stacks(tmp_path):
+    with profile('busy', mode='sample', interval=0.001, out_dir=str(tmp_path)) as info:
+        _busy(0.1)
+    assert info['path'].endswith('.folded')
+    lines = open(info['path']).read().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) > 0
+    assert any('_busy' in line for line in lines)
+
+
+def test_cprofile_mode_writes_pstats(tmp_path):
+    with profile('busy', mode='cprofile', out_dir=str(tmp_path)) as info:
+        _busy(0.01)
+    stats = pstats.Stats(info['path'])
+    assert any(func[2] == '_busy' for func in stats.stats)
+
+
+def _fake_predict(ticker, days):
+    _busy(0.02)
+    return {'ticker': ticker, 'predictions': [0.0] * days}
+
+
+def test_profile_flag_ignored_when_disabled(monkeypatch):
+    monkeypatch.setattr(api, 'PROFILING_ENABLED', False)
+    monkeypatch.setattr(api, 'predict_stock', _fake_predict)
+    r = client.post('/api/v1/predict', json={'ticker': 'AAPL', 'days': 2}, headers={'X-Profile': '1'})
+    assert r.status_code == 200
+    assert 'x-profile-path' not in r.headers
+
+
+def test_profile_flag_writes_profile_when_enabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(api, 'PROFILING_ENABLED', True)
+    monkeypatch.setattr(api, 'predict_stock', _fake_predict)
+    monkeypatch.setattr(profiling, 'PROFILES_DIR', str(tmp_path))
+    r = client.get('/api/v1/stocks/AAPL/predict', params={'days': 2, 'profile': 'cprofile'})
+    assert r.status_code == 200
+    path = r.headers['x-profile-path']
+    assert os.path.dirname(path) == str(tmp_path) and path.endswith('.prof')
+    assert any(func[2] == '_fake_predict' for func in pstats.Stats(path).stats)
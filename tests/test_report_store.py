@@ -0,0 +1,58 @@
+from __future__ import annotations
+import json
+import os
+import pytest
+from fastapi.testclient import TestClient
+import src.api.main as api
+from src.report_store import ReportStore, import_reports
+
+
+def _metrics(rmse):
+    return {'test_metrics': {'rmse': rmse, 'mae': rmse / 2}}
+
+
+def test_append_dedupes_by_key_and_queries_history(tmp_path):
+    store = ReportStore(str(tmp_path / 'r.db'))
+    assert store.append('metrics', _metrics(1.0), ticker='AAA', model='rf', key='k1', created_at='2025-01-01T00:00:00')
+    assert not store.append('metrics', _metrics(9.0), ticker='AAA', model='rf', key='k1')
+    store.append('metrics', _metrics(2.0), ticker='AAA', model='rf', created_at='2025-02-01T00:00:00')
+    store.append('metrics', _metrics(3.0), ticker='BBB', model='rf', created_at='2025-03-01T00:00:00')
+    store.append('backtest', {'price_metrics': {}}, ticker='AAA', model='lstm', created_at='2025-03-01T00:00:00')
+    assert store.count() == 4 and store.get('k1') == _metrics(1.0)
+
+    series = store.query(ticker='AAA', kind='metrics', metric='test_metrics.rmse')
+    assert [r['value'] for r in series] == [1.0, 2.0]
+    assert series[0]['timestamp'] == '2025-01-01T00:00:00'
+    assert [r['value'] for r in store.query(model='rf', metric='test_metrics.rmse', start='2025-01-15')] == [2.0, 3.0]
+    assert [r['value'] for r in store.query(model='rf', metric='test_metrics.rmse', limit=1)] == [3.0]
+    assert store.query(ticker='AAA', model='lstm')[0]['payload'] == {'price_metrics': {}}
+    with pytest.raises(ValueError):
+        store.query(metric="x') OR 1=1 --")
+
+
+def test_import_legacy_files_is_idempotent(tmp_path):
+    reports = tmp_path / 'reports'
+    reports.mkdir()
+    (reports / 'metrics_AAA_1761747696.json').write_text(json.dumps(
+        {'ticker': 'AAA', 'trained_on': '20250101000000', 'timestamp': '2025-01-02T00:00:00', **_metrics(1.5)}))
+    (reports / 'training_20251028223826.json').write_text(json.dumps(
+        {'ticker': 'AAA', 'bundle': {'hash': 'abc'}, 'timestamp': '2025-01-03T00:00:00'}))
+    (reports / 'backtest_AAA_1.json').write_text('{not json')
+    (reports / 'notes.json').write_text('{}')
+    store = ReportStore(str(tmp_path / 'r.db'))
+    assert import_reports(str(reports), store) == {'imported': 2, 'existing': 0, 'skipped': 1}
+    assert import_reports(str(reports), store, delete=True) == {'imported': 0, 'existing': 2, 'skipped': 1}
+    assert sorted(os.listdir(reports)) == ['backtest_AAA_1.json', 'notes.json']
+    training = store.query(kind='training')[0]
+    assert training['model'] == 'lstm' and training['model_version'] == 'abc'
+    assert store.query(ticker='AAA', metric='test_metrics.rmse')[0]['value'] == 1.5
+
+
+def test_reports_endpoint(tmp_path, monkeypatch):
+    monkeypatch.setenv('REPORTS_DB', str(tmp_path / 'api.db'))
+    store = api.get_store(api.REPORTS_DIR)
+    store.append('metrics', _metrics(0.5), ticker='AAA', model='rf')
+    client = TestClient(api.app)
+    body = client.get('/api/v1/reports', params={'ticker': 'aaa', 'metric': 'test_metrics.mae'}).json()
+    assert [r['value'] for r in body['data']] == [0.25]
+    assert client.get('/api/v1/reports', params={'metric': 'a;b'}).status_code == 400
@@ -0,0 +1,56 @@
+from __future__ import annotations
+import threading
+from fastapi.testclient import TestClient
+import src.api.main as api
+from src.warmup import Warmup
+
+
+def _predictor(calls):
+    def predictor(model):
+        def fn(ticker, days):
+            if model == 'broken':
+                raise FileNotFoundError('No model found for ticker')
+            calls.append((model, ticker, days))
+        return fn, 5.0
+    return predictor
+
+
+def test_warmup_runs_every_step_and_tolerates_failures():
+    calls = []
+    w = Warmup(lambda t: calls.append(('data', t)), lambda t: calls.append(('model', t)), _predictor(calls),
+               tickers=['aaa', 'bbb'], models=['rf', 'broken'])
+    assert not w.ready
+    w.run()
+    assert w.ready
+    assert calls == [('data', 'AAA'), ('data', 'BBB'), ('model', 'AAA'), ('model', 'BBB'),
+                     ('rf', 'AAA', 1), ('rf', 'BBB', 1)]
+    stats = w.stats()
+    assert stats['failed'] == 2 and len(stats['steps']) == 8
+    assert {s['error'] for s in stats['steps'] if not s['ok']} == {'No model found for ticker'}
+
+
+def test_expired_deadline_skips_remaining_steps():
+    calls = []
+    w = Warmup(lambda t: calls.append(t), lambda t: None, _predictor(calls), tickers=['AAA'], models=['rf'], deadline=0)
+    w.run()
+    assert w.ready and calls == [] and w.stats()['failed'] == 3
+
+
+def test_ready_endpoint_holds_traffic_until_warm(monkeypatch, tmp_path):
+    release = threading.Event()
+    # The lifespan also starts the job manager; keep its database out of reports/
+    monkeypatch.setattr(api, 'JOBS_DB', str(tmp_path / 'jobs.db'))
+    monkeypatch.setattr(api, '_job_manager', None)
+    monkeypatch.setenv('WARMUP_TICKERS', 'AAA')
+    monkeypatch.setenv('WARMUP_MODELS', 'rf')
+    monkeypatch.setattr(api, '_load_data', lambda t: release.wait(5))
+    monkeypatch.setattr(api, '_load_latest_model', lambda t: {})
+    monkeypatch.setattr(api, '_predictor', _predictor([]))
+    with TestClient(api.app) as client:
+        r = client.get('/api/v1/ready')
+        assert r.status_code == 503 and r.json()['warmup']['status'] == 'running'
+        assert client.get('/api/v1/health').json()['ready'] is False
+        release.set()
+        assert api.WARMUP.wait(5)
+        r = client.get('/api/v1/ready')
+        assert r.status_code == 200 and r.json()['warmup']['failed'] == 0
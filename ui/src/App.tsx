@@ -62,7 +62,7 @@ export default function App() {
   vol_forecast?: number[]
   }>(null)
   const [showCI, setShowCI] = useState(true)
-  const [history, setHistory] = useState<{ date: string; open: number; high: number; low: number; close: number; volume?: number | null }[] | null>(null)
+  const [history, setHistory] = useState<{ date: string; open: number; high: number; low: number; close: number; volume?: number | null; bucket_end?: string; sma5?: number | null; sma20?: number | null }[] | null>(null)
   const [dark, setDark] = useState(false)
   const [range, setRange] = useState<'1M'|'3M'|'6M'|'1Y'|'MAX'>('6M')
   const [showSMA, setShowSMA] = useState(true)
@@ -160,7 +160,19 @@ export default function App() {
       })
       const js = await r.json()
       if (!r.ok) throw new Error(js?.detail || 'Tuning failed')
-      setTuneMsg(`Tuned ${js.ticker}. Saved: ${js.bundle}`)
+      // Tuning runs as a background job; poll until it finishes
+      let job = js.job
+      while (job.status === 'pending' || job.status === 'running') {
+        setTuneMsg(`Tuning ${job.params.ticker}: ${job.status}${job.message ? ` (${job.message})` : ''}`)
+        await new Promise(res => setTimeout(res, 2000))
+        const jr = await fetch(`/api/api/v1/jobs/${js.job_id}`)
+        job = await jr.json()
+        if (!jr.ok) throw new Error(job?.detail || 'Tuning status failed')
+      }
+      const rr = await fetch(`/api/api/v1/jobs/${js.job_id}/result`)
+      const res = await rr.json()
+      if (!rr.ok) throw new Error(res?.detail || `Tuning ${job.status}`)
+      setTuneMsg(`Tuned ${res.data.ticker}. Saved: ${res.data.bundle}`)
     } catch (e: any) {
       setTuneMsg(e.message || 'Tuning error')
     } finally {
@@ -193,38 +205,47 @@ export default function App() {
         risk_score: js.risk_score ?? js.data?.risk_score,
         vol_forecast: js.vol_forecast ?? js.data?.vol_forecast
       })
-      // Fetch history for chart
-      const hr = await fetch(`/api/api/v1/stocks/${(js.ticker || t).toUpperCase()}/history`)
-      const hjs = await hr.json()
-      if (hr.ok) setHistory(hjs.data || [])
     } catch (e: any) {
       setError(e.message || 'Error loading details')
     }
   }
 
+  // The server trims to the range and merges bars into at most one candle per pixel column.
+  // Switching range or ticker aborts the previous request, so a slow older response never replaces the chart.
+  const historyTicker = detail?.ticker
+  const historyAsOf = detail?.as_of
+  useEffect(() => {
+    if (!historyTicker) return
+    const ctl = new AbortController()
+    const points = Math.max(100, Math.round(window.innerWidth || 600))
+    fetch(`/api/api/v1/stocks/${historyTicker.toUpperCase()}/history?range=${range}&points=${points}`, { signal: ctl.signal })
+      .then(async hr => {
+        const hjs = await hr.json()
+        if (hr.ok && !ctl.signal.aborted) setHistory(hjs.data || [])
+      })
+      .catch(() => {})
+    return () => ctl.abort()
+  }, [historyTicker, historyAsOf, range])
+
   const chartCandles = useMemo(() => {
     if (!history) return []
-    const sliced = (() => {
-      if (!history?.length) return []
-      const n = history.length
-      const pick = (months: number) => Math.max(0, n - Math.round(months * 21))
-      const startIndex = range === '1M' ? pick(1) : range === '3M' ? pick(3) : range === '6M' ? pick(6) : range === '1Y' ? pick(12) : 0
-      return history.slice(startIndex)
-    })()
-    return sliced.map(h => ({
+    return history.map(h => ({
       time: (Date.parse(h.date) / 1000) as any,
       open: h.open,
       high: h.high,
       low: h.low,
       close: h.close,
       volume: h.volume ?? null,
+      sma5: h.sma5,
+      sma20: h.sma20,
     }))
-  }, [history, range])
+  }, [history])
 
   const chartPredictions = useMemo(() => {
     if (!detail?.predictions) return []
     // start from next day after last history point
-    const startTs = history?.length ? Date.parse(history[history.length - 1].date) / 1000 : Math.floor(Date.now() / 1000)
+    const last = history?.length ? history[history.length - 1] : null
+    const startTs = last ? Date.parse(last.bucket_end || last.date) / 1000 : Math.floor(Date.now() / 1000)
     return (detail.intervals || detail.predictions.map(v => [v, v] as [number, number])).map((iv, idx) => ({
       time: (startTs + 86400 * (idx + 1)) as any,
       value: detail.predictions![idx],
@@ -277,7 +298,8 @@ export default function App() {
   const exportCsv = () => {
     if (!detail?.predictions || !detail?.predictions.length) return
     // Start date: day after last history date or today
-    const baseTs = history?.length ? Date.parse(history[history.length - 1].date) : Date.now()
+    const lastBar = history?.length ? history[history.length - 1] : null
+    const baseTs = lastBar ? Date.parse(lastBar.bucket_end || lastBar.date) : Date.now()
     const rows = [['Date','Prediction','Low95','High95']]
     for (let i = 0; i < detail.predictions.length; i++) {
       const d = new Date(baseTs + (i + 1) * 86400000)
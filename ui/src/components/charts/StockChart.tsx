@@ -8,6 +8,9 @@ export type Candle = {
   low: number
   close: number
   volume?: number | null
+  // Daily SMAs from the history endpoint; a downsampled candle spans many days, so averaging candles would be wrong
+  sma5?: number | null
+  sma20?: number | null
 }
 
 export type PredictionPoint = { time: UTCTimestamp | Time; value: number; low?: number; high?: number }
@@ -103,8 +106,12 @@ export default function StockChart({
         }
         return out
       }
-      sma5.setData(sma(5))
-      sma20.setData(sma(20))
+      // Prefer the server's daily SMAs; only raw daily bars without them are averaged here
+      const daily = (key: 'sma5' | 'sma20') =>
+        candles.filter(c => c[key] != null).map(c => ({ time: c.time as any, value: c[key] as number }))
+      const fromServer = candles.some(c => c.sma5 !== undefined)
+      sma5.setData(fromServer ? daily('sma5') : sma(5))
+      sma20.setData(fromServer ? daily('sma20') : sma(20))
     }
 
     if (predictions && predictions.length) {